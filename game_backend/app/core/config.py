@@ -7,6 +7,11 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Send handwriting strokes to the HW service in the columnar (base64 typed array) format
+    HW_COLUMNAR_PAYLOAD: bool = False
+    # Ask the HW service to skip the quality model when the letter is wrong
+    # (wrong attempts are INCORRECT whatever their quality; score is then 0)
+    HW_SKIP_QUALITY_ON_MISMATCH: bool = False
 
     class Config:
         env_file = ".env"
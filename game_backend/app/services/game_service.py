@@ -1,8 +1,9 @@
 import asyncio
 from datetime import datetime, timezone
 from app.db.supabase import supabase
-import base64
+from app.core.config import get_settings
 import httpx
+from app.services.stroke_payload import encode_columnar_strokes
 
 class GameService:
     
@@ -221,6 +222,9 @@ class GameService:
                 
         # 1. Get AI evaluation (external service call)
         ai_result = await GameService.call_hf_model(component_type, raw_data)
+        # HW service එක ඇඳීම ප්‍රතික්ෂේප කළා (retry): attempt එකක් ලෙස log නොකරන්න
+        if ai_result.get("status") == "retry":
+            return ai_result
         is_correct = ai_result.get("is_correct", False)
         score = ai_result.get("score", 0.0)
         verdict = ai_result.get("verdict", _score_to_verdict(score))
@@ -401,10 +405,13 @@ class GameService:
                 model_target = expected_label if expected_label else target_char
 
                 async with httpx.AsyncClient(timeout=30.0) as client:
-                    payload = {
-                        "expected_char": model_target,
-                        "strokes": formatted_strokes
-                    }
+                    payload = {"expected_char": model_target}
+                    if get_settings().HW_COLUMNAR_PAYLOAD:
+                        payload["columnar_strokes"] = encode_columnar_strokes(formatted_strokes)
+                    else:
+                        payload["strokes"] = formatted_strokes
+                    if get_settings().HW_SKIP_QUALITY_ON_MISMATCH:
+                        payload["skip_quality_on_mismatch"] = True
                     response = await client.post(hf_hw_url, json=payload)
 
                 if response.status_code == 200:
@@ -413,7 +420,20 @@ class GameService:
 
                     analysis = result_json.get('analysis', {})
 
-                    identified_symbol = analysis.get('identified_letter_symbol', '?')
+                    # Rejection cascade (තිත්, රේඛා, scribbles): ලකුණු කළ උත්සාහයක් නොවේ, නැවත අඳින්න
+                    if result_json.get("status") == "retry":
+                        print(f"HW Retry: {analysis.get('retry_reason')}")
+                        return {
+                            "status": "retry",
+                            "is_correct": False,
+                            "score": 0.0,
+                            "verdict": "INCORRECT",
+                            "retry_reason": analysis.get('retry_reason'),
+                            "strokes_actual": analysis.get('strokes_actual', 0),
+                            "strokes_expected": analysis.get('strokes_expected', 0),
+                        }
+
+                    identified_symbol = analysis.get('identified_letter_symbol') or '?'
 
                     is_correct_letter = analysis.get('is_correct_letter', False)
                     # AI මොඩලනයෙ ලබාදෙන්න is_correct_letter අගය False වුවද, හඳුනාගත් අගය සහ බලාපොරොත්තු වන අගය (target_char) සමාන නම් එය True කරන්න.
@@ -425,7 +445,8 @@ class GameService:
                     # අකුර නිවැරදි නම් පමනක් (Quality එක කුමක් වුවත්) එය නිවැරදි (pass) ලෙස සලකන්න
                     is_correct = is_correct_letter
 
-                    score             = float(analysis.get('quality_percentage', 0)) / 100.0
+                    # Quality මොඩලය skip කළ විට (වැරදි අකුර) quality_percentage null වේ
+                    score             = float(analysis.get('quality_percentage') or 0) / 100.0
                     strokes_actual    = analysis.get('strokes_actual', 0)
                     strokes_expected  = analysis.get('strokes_expected', 0)
 
@@ -0,0 +1,33 @@
+"""
+Handwriting service එකේ columnar stroke payload encoder (stdlib only).
+
+Mirrors services/handwriting/app/payload.py `encode_columnar` for the float32
+dtype; services/handwriting/tests/test_payload.py pins the two to the same bytes.
+"""
+from array import array
+import base64
+import sys
+
+
+def encode_columnar_strokes(strokes: list) -> dict:
+    """
+    HW service එකේ columnar payload ආකෘතියට strokes පරිවර්තනය (services/handwriting/app/payload.py).
+    x/y/dx/dy as little-endian float32, p as uint8, offsets as int32 stroke boundaries.
+    """
+    channels = {"x": array("f"), "y": array("f"), "dx": array("f"), "dy": array("f")}
+    pen, offsets = array("B"), array("i", [0])
+    for stroke in strokes:
+        for point in stroke:
+            for key, values in channels.items():
+                values.append(float(point.get(key, 0)))
+            pen.append(int(point.get("p", 0)))
+        offsets.append(len(pen))
+
+    def _b64(values):
+        if sys.byteorder == "big" and values.itemsize > 1:
+            values.byteswap()
+        return base64.b64encode(values.tobytes()).decode("ascii")
+
+    payload = {key: _b64(values) for key, values in channels.items()}
+    payload.update({"dtype": "float32", "p": _b64(pen), "offsets": _b64(offsets)})
+    return payload
@@ -0,0 +1,304 @@
+"""
+@File: backends.py
+@Description: Interchangeable inference backends for the Keras handwriting models.
+
+`model.predict()` builds a data adapter and callback list on every call, which
+dominates the cost of a (N, 150, 5) forward pass. The backends below all take a
+float32 (N, 150, 5) array and return the raw model output as a NumPy array
+(a list of arrays for multi-output models such as the fused model):
+
+    predict     - keras `model.predict` (reference path)
+    compiled    - `tf.function` with a fixed [None, 150, 5] input signature
+    savedmodel  - exported SavedModel `serve` endpoint
+    onnx        - ONNX Runtime on CPU
+    tflite      - TFLite interpreter; HW_MODEL_PRECISION=fp32|fp16|int8 picks
+                  the `<name>.tflite` / `<name>_fp16.tflite` / `<name>_int8.tflite`
+                  artifact written by `python -m app.quantize`
+
+Select one with the HW_INFERENCE_BACKEND environment variable. Exported
+artifacts live next to the .keras file (`<name>_savedmodel/`, `<name>.onnx`);
+the service never exports at startup, a missing artifact is an error. They
+are produced with:
+
+    python -m app.backends export
+    python -m app.backends parity --backends compiled,savedmodel,onnx
+"""
+
+import os
+import sys
+import argparse
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+SEQ_LEN, N_FEATURES = 150, 5
+INPUT_SIGNATURE = [tf.TensorSpec([None, SEQ_LEN, N_FEATURES], tf.float32, name="strokes")]
+
+
+def _to_numpy(outputs):
+    if isinstance(outputs, (list, tuple)):
+        return [np.asarray(o) for o in outputs]
+    return np.asarray(outputs)
+
+
+def artifact_path(model_path, suffix):
+    """`models/foo_v1.keras` -> `models/foo_v1<suffix>`"""
+    return os.path.splitext(model_path)[0] + suffix
+
+
+class KerasPredictBackend:
+    name = "predict"
+
+    def __init__(self, model, model_path=None):
+        self.model = model
+
+    def __call__(self, x):
+        return self.model.predict(x, batch_size=len(x), verbose=0)
+
+
+class CompiledCallBackend:
+    name = "compiled"
+
+    def __init__(self, model, model_path=None):
+        self.model = model
+        self._fn = tf.function(lambda x: model(x, training=False),
+                               input_signature=INPUT_SIGNATURE)
+
+    def __call__(self, x):
+        return _to_numpy(self._fn(tf.convert_to_tensor(x, dtype=tf.float32)))
+
+
+class SavedModelBackend:
+    name = "savedmodel"
+
+    def __init__(self, model, model_path):
+        export_dir = artifact_path(model_path, "_savedmodel")
+        if not os.path.isdir(export_dir):
+            raise RuntimeError(f"SavedModel artifact not found: {export_dir} (run `python -m app.backends export`).")
+        self._archive = tf.saved_model.load(export_dir)
+
+    def __call__(self, x):
+        return _to_numpy(self._archive.serve(tf.convert_to_tensor(x, dtype=tf.float32)))
+
+
+def tflite_path(model_path, precision="fp32"):
+    """`models/foo_v1.keras` -> `models/foo_v1.tflite` / `models/foo_v1_int8.tflite`"""
+    return artifact_path(model_path, ".tflite" if precision == "fp32" else f"_{precision}.tflite")
+
+
+class TFLiteBackend:
+    """
+    TFLite artifacts have a fixed batch of 1 (the LSTM only lowers to the fused
+    TFLite kernel with static shapes), so a batch is run sample by sample.
+    Interpreters are not thread safe: one per inference thread.
+    """
+    name = "tflite"
+
+    def __init__(self, model, model_path, precision="fp32", path=None):
+        path = path or tflite_path(model_path, precision)
+        if not os.path.exists(path):
+            raise RuntimeError(f"TFLite artifact not found: {path} (run `python -m app.quantize`).")
+        with open(path, "rb") as f:
+            self._content = f.read()
+        self._local = threading.local()
+
+    def _runner(self):
+        runner = getattr(self._local, "runner", None)
+        if runner is None:
+            interpreter = tf.lite.Interpreter(model_content=self._content)
+            runner = interpreter.get_signature_runner(next(iter(interpreter.get_signature_list())))
+            self._local.interpreter = interpreter   # runner එකට interpreter එක ජීවත්ව තිබිය යුතුය
+            self._local.input_name = next(iter(runner.get_input_details()))
+            self._local.runner = runner
+        return runner
+
+    def __call__(self, x):
+        runner = self._runner()
+        x = np.asarray(x, dtype=np.float32)
+        rows = [runner(**{self._local.input_name: x[i:i + 1]}) for i in range(len(x))]
+        names = sorted(rows[0]) if rows else []
+        outputs = [np.concatenate([row[k] for row in rows]) for k in names]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model, model_path):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("HW_INFERENCE_BACKEND=onnx requires the 'onnxruntime' package.") from e
+
+        onnx_path = artifact_path(model_path, ".onnx")
+        if not os.path.exists(onnx_path):
+            raise RuntimeError(f"ONNX artifact not found: {onnx_path} (run `python -m app.backends export`).")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(onnx_path, sess_options=opts,
+                                             providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+
+    def __call__(self, x):
+        outputs = self._session.run(None, {self._input_name: np.asarray(x, dtype=np.float32)})
+        return outputs[0] if len(outputs) == 1 else outputs
+
+
+BACKENDS = {b.name: b for b in (KerasPredictBackend, CompiledCallBackend, SavedModelBackend,
+                                 OnnxBackend, TFLiteBackend)}
+PRECISIONS = ("fp32", "fp16", "int8")
+
+
+def load_backend(model, model_path, kind, precision="fp32"):
+    """Backend එක නමින් තෝරා ගැනීම (HW_INFERENCE_BACKEND, HW_MODEL_PRECISION)."""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{kind}'. Choose one of: {', '.join(BACKENDS)}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision '{precision}'. Choose one of: {', '.join(PRECISIONS)}")
+    if kind == TFLiteBackend.name:
+        return TFLiteBackend(model, model_path, precision)
+    if precision != "fp32":
+        raise ValueError(f"HW_MODEL_PRECISION={precision} requires HW_INFERENCE_BACKEND=tflite.")
+    return BACKENDS[kind](model, model_path)
+
+
+# =============================================================================
+# 🟢 EXPORT
+# =============================================================================
+
+def export_savedmodel(model, export_dir):
+    import keras
+
+    archive = keras.export.ExportArchive()
+    archive.track(model)
+    archive.add_endpoint("serve", lambda x: model(x, training=False), input_signature=INPUT_SIGNATURE)
+    archive.write_out(export_dir, verbose=False)
+
+
+def export_tflite(model, tflite_file, precision="fp32"):
+    """
+    Keras model -> TFLite flatbuffer (batch 1). fp16 stores float16 weights;
+    int8 is dynamic-range quantisation (int8 weights, activations quantised on
+    the fly), which keeps the float32 input/output interface.
+    """
+    import shutil
+    import tempfile
+
+    import keras
+
+    export_dir = tempfile.mkdtemp(prefix="hw_tflite_")
+    try:
+        archive = keras.export.ExportArchive()
+        archive.track(model)
+        archive.add_endpoint("serve", lambda x: model(x, training=False),
+                             input_signature=[tf.TensorSpec([1, SEQ_LEN, N_FEATURES], tf.float32, name="strokes")])
+        archive.write_out(export_dir, verbose=False)
+
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        if precision in ("fp16", "int8"):
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if precision == "fp16":
+            converter.target_spec.supported_types = [tf.float16]
+        content = converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+    with open(tflite_file, "wb") as f:
+        f.write(content)
+    return len(content)
+
+
+def export_onnx(model, onnx_path, opset=17):
+    import tf2onnx
+
+    fn = tf.function(lambda x: model(x, training=False), input_signature=INPUT_SIGNATURE)
+    tf2onnx.convert.from_function(fn, input_signature=INPUT_SIGNATURE, opset=opset, output_path=onnx_path)
+
+
+# =============================================================================
+# 🟢 PARITY CHECK
+# =============================================================================
+
+def synthetic_fixtures(n=64, seed=7):
+    """Seeded random-walk drawings passed through the real preprocess_data."""
+    from .utils import preprocess_data
+
+    rng = np.random.default_rng(seed)
+    samples = []
+    while len(samples) < n:
+        strokes = []
+        for _ in range(rng.integers(1, 4)):
+            x, y = rng.uniform(150, 450, size=2)
+            stroke = []
+            for _ in range(rng.integers(20, 120)):
+                dx, dy = rng.normal(0, 6, size=2)
+                x, y = x + dx, y + dy
+                stroke.append({"x": float(x), "y": float(y), "dx": float(dx), "dy": float(dy), "p": 0})
+            strokes.append(stroke)
+        strokes[-1][-1]["p"] = 1
+        processed, _ = preprocess_data(strokes)
+        if processed is not None:
+            samples.append(processed)
+    return np.stack(samples).astype("float32")
+
+
+def parity_report(backends, char_input, qual_input, char_ref, qual_ref, qual_atol):
+    report, ok = {}, True
+    ref_labels = np.argmax(char_ref, axis=1)
+    for kind, (char_backend, qual_backend) in backends.items():
+        labels = np.argmax(char_backend(char_input), axis=1)
+        quality = np.asarray(qual_backend(qual_input)).reshape(-1)
+        argmax_match = bool(np.array_equal(labels, ref_labels))
+        max_drift = float(np.max(np.abs(quality - qual_ref.reshape(-1))))
+        passed = argmax_match and max_drift <= qual_atol
+        ok = ok and passed
+        report[kind] = {"argmax_identical": argmax_match, "max_quality_drift": max_drift, "passed": passed}
+    return ok, report
+
+
+def main(argv=None):
+    from . import main as service
+
+    parser = argparse.ArgumentParser(description="Export and verify handwriting inference backends.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="write SavedModel and ONNX artifacts next to the .keras files")
+    parity = sub.add_parser("parity", help="compare backends against model.predict")
+    parity.add_argument("--backends", default="compiled,savedmodel,onnx")
+    parity.add_argument("--fixtures", help=".npy file of preprocessed (N,150,5) samples")
+    parity.add_argument("--qual-atol", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+    service.load_assets("separate", "predict")
+
+    models = {service.CHAR_MODEL_PATH: service.CHAR_MODEL, service.QUAL_MODEL_PATH: service.QUAL_MODEL}
+
+    if args.command == "export":
+        for path, model in models.items():
+            export_savedmodel(model, artifact_path(path, "_savedmodel"))
+            export_onnx(model, artifact_path(path, ".onnx"))
+            print(f"✅ Exported {os.path.basename(path)}")
+        return 0
+
+    fixtures = np.load(args.fixtures) if args.fixtures else synthetic_fixtures()
+    flat = fixtures.reshape(-1, N_FEATURES)
+    char_input = service.CHAR_SCALER.transform(flat).reshape(fixtures.shape).astype("float32")
+    qual_input = service.QUAL_SCALER.transform(flat).reshape(fixtures.shape).astype("float32")
+
+    char_ref = KerasPredictBackend(service.CHAR_MODEL)(char_input)
+    qual_ref = KerasPredictBackend(service.QUAL_MODEL)(qual_input)
+
+    backends = {
+        kind: (load_backend(service.CHAR_MODEL, service.CHAR_MODEL_PATH, kind),
+               load_backend(service.QUAL_MODEL, service.QUAL_MODEL_PATH, kind))
+        for kind in args.backends.split(",")
+    }
+    ok, report = parity_report(backends, char_input, qual_input, char_ref, qual_ref, args.qual_atol)
+    for kind, row in report.items():
+        print(f"{'✅' if row['passed'] else '❌'} {kind:<11} argmax_identical={row['argmax_identical']} "
+              f"max_quality_drift={row['max_quality_drift']:.2e}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+@File: batching.py
+@Description: Dynamic micro-batching queue in front of the handwriting models.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from .metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    """
+    Concurrent requests වල (150, 5) samples එකතු කර එක forward pass එකකින් ධාවනය කරයි.
+
+    `infer_fn` receives a stacked (N, 150, 5) array and the list of the N
+    `context` values given to submit() (per-sample options, e.g. the quality
+    gate), and must return a sequence of N per-sample results, which are
+    scattered back to the waiting callers.
+    A batch is closed when it reaches `max_batch_size` or when `max_wait_ms`
+    has passed since the worker picked up its first item. When the queue is
+    empty at pick-up time (idle traffic) the item is run on its own straight
+    away, so a lone request never pays the batching wait.
+
+    With an `executor` (executor.InferenceExecutor) the forward pass runs on
+    its thread pool, at most one batch per pool thread; while every thread is
+    busy new items keep queueing and form the next, larger batch.
+    """
+
+    def __init__(self, infer_fn, max_batch_size=32, max_wait_ms=8.0, executor=None):
+        self.infer_fn = infer_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._slots = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            slots = self.executor.max_workers if self.executor is not None else 1
+            self._slots = asyncio.Semaphore(slots)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, sample, context=None):
+        """Sample එක queue එකට දමා එහි ප්‍රතිඵලය ලැබෙන තෙක් රැඳී සිටියි."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((sample, context, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            items = [await self._queue.get()]
+
+            # Idle traffic: nothing else waiting, run the single item now.
+            if not self._queue.empty():
+                deadline = self._loop.time() + self.max_wait
+                while len(items) < self.max_batch_size:
+                    if not self._queue.empty():
+                        items.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+            self._loop.create_task(self._dispatch(items))
+
+    async def _dispatch(self, items):
+        try:
+            await self._run_batch(items)
+        finally:
+            self._slots.release()
+
+    async def _run_batch(self, items):
+        now = time.perf_counter()
+        live = [(sample, context, fut) for sample, context, fut, t0 in items if not fut.done()]
+        for _, _, _, t0 in items:
+            self.queue_wait_hist.observe((now - t0) * 1000.0)
+        if not live:
+            return
+        self.batch_size_hist.observe(len(live))
+
+        try:
+            batch = np.stack([sample for sample, _, _ in live]).astype("float32", copy=False)
+            contexts = [context for _, context, _ in live]
+            if self.executor is not None:
+                results = await self.executor.run(self.infer_fn, batch, contexts)
+            else:
+                results = self.infer_fn(batch, contexts)
+        except Exception as e:
+            for _, _, fut in live:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, _, fut), result in zip(live, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_wait_ms": self.queue_wait_hist.snapshot(),
+        }
@@ -0,0 +1,161 @@
+"""
+@File: bulk.py
+@Description: Offline bulk re-scoring pipeline behind /evaluate_batch.
+
+Items arrive as a JSON list or as NDJSON lines of {id, expected_char, strokes}
+(or columnar_strokes). They are cut into chunks; each chunk is parsed and
+preprocessed (one vectorised resampling pass per part, utils.preprocess_paths)
+by a pool of worker processes while the previous chunk runs through the
+models as one batch, and results are streamed back as NDJSON lines in input
+order. The workers also compute each item's drawing features, so the
+rejection cascade (rejection.py) answers dots, lines and scribbles with a
+"retry" row before the models, as /evaluate does.
+
+This module must not import main.py: spawned pool workers import it to run
+`preprocess_chunk` and must not load TensorFlow.
+"""
+
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pydantic import ValidationError
+
+from .payload import decode_columnar
+from .rejection import path_features
+from .schemas import BatchItem
+from .utils import preprocess_paths, strokes_to_path
+
+
+def parse_item(raw):
+    """
+    One NDJSON line (str) or decoded dict -> (id, expected_char, (P, 5) path or None, stroke count, error).
+    """
+    item_id = None
+    try:
+        data = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        if isinstance(data, dict):
+            item_id = data.get("id")
+        item = BatchItem.model_validate(data)
+    except (ValueError, ValidationError) as e:
+        return item_id, None, None, 0, f"Invalid item: {e}"
+
+    if item.columnar_strokes is not None:
+        try:
+            path, n_strokes = decode_columnar(**item.columnar_strokes.model_dump())
+        except ValueError as e:
+            return item.id, item.expected_char, None, 0, str(e)
+        return item.id, item.expected_char, path, n_strokes, None
+
+    try:
+        path = strokes_to_path(item.strokes)
+    except (AttributeError, TypeError, ValueError):
+        return item.id, item.expected_char, None, len(item.strokes), "Invalid stroke data."
+    return item.id, item.expected_char, path, len(item.strokes), None
+
+
+def preprocess_chunk(raw_items):
+    """
+    Items -> (id, expected_char, processed (150, 5) or None, stroke count, error,
+    rejection.drawing_features dict or None) each. Every parsed path of the chunk is
+    resampled in one vectorised pass (utils.preprocess_paths).
+    """
+    parsed = [parse_item(raw) for raw in raw_items]
+    batch, valid = preprocess_paths([path for _, _, path, _, _ in parsed if path is not None])
+
+    results, k = [], 0
+    for item_id, expected_char, path, n_strokes, error in parsed:
+        if path is None:
+            results.append((item_id, expected_char, None, n_strokes, error, None))
+            continue
+        features = path_features(path, n_strokes)
+        if valid[k]:
+            results.append((item_id, expected_char, batch[k], n_strokes, None, features))
+        else:
+            results.append((item_id, expected_char, None, n_strokes, "Invalid stroke data.", features))
+        k += 1
+    return results
+
+
+def make_pool(workers):
+    """Spawned (not forked) workers: the parent process holds TensorFlow state."""
+    if workers <= 0:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def split_lines(body):
+    """NDJSON body -> non-empty lines."""
+    return [line for line in body.split(b"\n") if line.strip()]
+
+
+def parse_batch_body(body, ndjson):
+    """
+    /evaluate_batch body -> raw items (NDJSON lines are parsed later, per item, by the
+    pool). Raises ValueError unless it is NDJSON or a JSON list. Runs off the event loop.
+    """
+    if ndjson:
+        return split_lines(body)
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Body must be a JSON list or NDJSON.")
+    return items
+
+
+async def _preprocess(pool, raw_items, workers):
+    if pool is None:
+        return await asyncio.to_thread(preprocess_chunk, raw_items)
+
+    loop = asyncio.get_running_loop()
+    parts = [raw_items[i::workers] for i in range(workers)]
+    done = await asyncio.gather(*[loop.run_in_executor(pool, preprocess_chunk, part) for part in parts if part])
+
+    # Round-robin split එක නැවත input අනුපිළිවෙලට සැකසීම
+    ordered = [None] * len(raw_items)
+    for offset, results in enumerate(done):
+        ordered[offset::workers] = results
+    return ordered
+
+
+async def stream_evaluation(raw_items, infer_batch, build_analysis, reject, pool, workers, chunk_size):
+    """
+    Async generator of NDJSON lines, one per input item, in input order.
+
+    `infer_batch` is a coroutine function taking a stacked (N, 150, 5) array and
+    returning N (char_idx, qual_score) pairs; `build_analysis(expected_char, char_idx, qual_score, n_strokes)` returns the
+    same analysis dict as /evaluate. `reject(features, expected_char)` is the
+    rejection cascade: a "retry" analysis dict (the item skips the models) or None.
+    """
+    chunks = [raw_items[i:i + chunk_size] for i in range(0, len(raw_items), chunk_size)]
+    if not chunks:
+        return
+
+    # Chunk k+1 preprocess වන අතරතුර chunk k inference වේ
+    next_prep = asyncio.ensure_future(_preprocess(pool, chunks[0], workers))
+    for k in range(len(chunks)):
+        prepared = await next_prep
+        if k + 1 < len(chunks):
+            next_prep = asyncio.ensure_future(_preprocess(pool, chunks[k + 1], workers))
+
+        # Cascade එක main process එකේ (its counters feed /stats and /metrics)
+        retries = [reject(features, expected_char) if features is not None else None
+                   for _, expected_char, _, _, _, features in prepared]
+        valid = [item[2] for item, retry in zip(prepared, retries) if item[2] is not None and retry is None]
+        scores = iter(())
+        if valid:
+            scores = iter(await infer_batch(np.stack(valid)))
+
+        lines = []
+        for (item_id, expected_char, processed, n_strokes, error, _), retry in zip(prepared, retries):
+            if retry is not None:
+                row = {"id": item_id, "status": "retry", "analysis": retry}
+            elif processed is None:
+                row = {"id": item_id, "status": "error", "detail": error}
+            else:
+                char_idx, qual_score = next(scores)
+                row = {"id": item_id, "status": "success",
+                       "analysis": build_analysis(expected_char, char_idx, qual_score, n_strokes)}
+            lines.append(json.dumps(row, ensure_ascii=False))
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,126 @@
+"""
+@File: cache.py
+@Description: Content-addressed LRU cache of /evaluate results.
+
+Flutter clients retry on flaky Wi-Fi, so the same drawing is often evaluated
+two or three times. Results are keyed by a hash of the resampled (150, 5)
+trajectory (quantised, so float noise in the resampling does not miss), the
+expected character, the stroke count and the model version. The model version
+is a fingerprint of the model files on disk; when any of them changes, or the
+service swaps to another model version (`rewatch`), the whole cache is dropped.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# processed channels [x/canvas, y/canvas, dx, dy, p]: dx/dy are raw pixels, bring
+# them to the same canvas-relative scale before quantising
+CHANNEL_SCALE = np.array([1.0, 1.0, 1.0 / 600, 1.0 / 600, 1.0])
+
+
+def file_fingerprint(paths):
+    """(path, size, mtime) of every model file -> short hex version string."""
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:missing;".encode())
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    def __init__(self, max_size=4096, ttl_s=300.0, quantum=1e-3, watch_paths=(), check_interval_s=5.0):
+        self.max_size = int(max_size)
+        self.ttl_s = float(ttl_s)
+        self.quantum = float(quantum)
+        self.watch_paths = tuple(watch_paths)
+        self.check_interval_s = float(check_interval_s)
+        self.version = file_fingerprint(self.watch_paths)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _check_version(self):
+        """Model ෆයිල් වෙනස් වී ඇත්නම් cache එක හිස් කරයි (check_interval_s වරකට එක් වරක්)."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval_s:
+            return
+        self._last_check = now
+        version = file_fingerprint(self.watch_paths)
+        if version != self.version:
+            with self._lock:
+                self.version = version
+                self._entries.clear()
+                self.invalidations += 1
+
+    def rewatch(self, paths):
+        """Model version swap: watch the new version's files and drop every cached result."""
+        with self._lock:
+            self.watch_paths = tuple(paths)
+            self.version = file_fingerprint(self.watch_paths)
+            self._last_check = time.monotonic()
+            self._entries.clear()
+            self.invalidations += 1
+
+    def key(self, processed, expected_char, n_strokes):
+        self._check_version()
+        scaled = np.asarray(processed, dtype=np.float64) * CHANNEL_SCALE
+        quantised = np.round(scaled / self.quantum).astype(np.int64)
+        h = hashlib.blake2b(quantised.tobytes(), digest_size=16)
+        h.update(f"|{expected_char}|{n_strokes}|{self.version}".encode())
+        return h.digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl_s,
+            "model_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,81 @@
+"""
+@File: executor.py
+@Description: Dedicated inference thread pool with bounded admission (backpressure).
+
+Model calls block for milliseconds to seconds, so they must never run on the
+event loop: one slow forward pass would stall every other request on the
+worker, health checks included. All inference goes through a small dedicated
+ThreadPoolExecutor, and requests are admitted only while fewer than
+`max_queue` of them are waiting for (or running) inference. Beyond that the
+endpoint answers 429 + Retry-After instead of letting latency grow unbounded.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class QueueFullError(Exception):
+    """Admission queue එක පිරී ඇත - client එක Retry-After පසු නැවත උත්සාහ කළ යුතුය."""
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=1, max_queue=64, retry_after_s=1):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.retry_after_s = retry_after_s
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hw-infer")
+        self._lock = threading.Lock()
+        self.in_flight = 0   # admitted requests not yet answered
+        self.submitted = 0   # jobs handed to the pool and not finished
+        self.running = 0     # jobs currently executing on a pool thread
+        self.rejected = 0
+        self.completed = 0
+
+    @contextmanager
+    def admit(self):
+        """Request එකක් inference සඳහා ඇතුළත් කරයි, නැතහොත් QueueFullError."""
+        with self._lock:
+            if self.in_flight >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _tracked(self, fn, args):
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.submitted -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        """Blocking `fn(*args)` inference pool එකේ ධාවනය කර ප්‍රතිඵලය await කරයි."""
+        with self._lock:
+            self.submitted += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._tracked, fn, args)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued_jobs": self.submitted - self.running,
+                "running_jobs": self.running,
+                "completed_jobs": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,100 @@
+"""
+@File: fuse_models.py
+@Description: Build step that fuses Model A, Model B and their StandardScalers into one graph.
+
+The fused model takes the raw (N, 150, 5) output of `preprocess_data` and returns
+[char_probs (N, 38), quality (N, 1)]. Each scaler's mean_/scale_ is folded into a
+StandardScaling layer in front of its model, so serving in HW_MODEL_MODE=fused
+needs neither scikit-learn nor a second model call.
+
+    python -m app.fuse_models            # writes models/sinhala_mithuru_fused_v1.keras
+"""
+
+import sys
+import argparse
+
+import numpy as np
+import keras
+
+
+@keras.saving.register_keras_serializable(package="SinhalaMithuru")
+class StandardScaling(keras.layers.Layer):
+    """
+    (x - mean) / scale, i.e. sklearn StandardScaler.transform as a graph layer.
+    The statistics are non-trainable weights (not captured constants) so the
+    layer survives .keras saving as well as SavedModel / ONNX export.
+    """
+
+    def __init__(self, n_features=5, **kwargs):
+        super().__init__(**kwargs)
+        self.n_features = n_features
+        self.mean = self.add_weight(shape=(n_features,), initializer="zeros", trainable=False, name="mean")
+        self.scale = self.add_weight(shape=(n_features,), initializer="ones", trainable=False, name="scale")
+
+    def call(self, inputs):
+        return (inputs - self.mean) / self.scale
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({"n_features": self.n_features})
+        return config
+
+
+def scaler_to_layer(scaler, name):
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    layer = StandardScaling(n_features, name=name)
+    layer.set_weights([mean.astype("float32"), scale.astype("float32")])
+    return layer
+
+
+def build_fused_model(char_model, qual_model, char_scaler, qual_scaler):
+    inputs = keras.Input(shape=(150, 5), name="Stroke_Input")
+    char_x = scaler_to_layer(char_scaler, "char_scaler")(inputs)
+    qual_x = scaler_to_layer(qual_scaler, "quality_scaler")(inputs)
+    # Both trained models are named "functional"; re-wrap them under unique names
+    char_net = keras.Model(char_model.input, char_model.output, name="char_recognizer")
+    qual_net = keras.Model(qual_model.input, qual_model.output, name="quality_model")
+    char_out = char_net(char_x)
+    qual_out = qual_net(qual_x)
+    return keras.Model(inputs, [char_out, qual_out], name="sinhala_mithuru_fused")
+
+
+def main(argv=None):
+    from . import main as service
+    from .backends import KerasPredictBackend, synthetic_fixtures
+
+    parser = argparse.ArgumentParser(description="Fuse Model A + Model B + scalers into one artifact.")
+    parser.add_argument("--output", default=service.FUSED_MODEL_PATH)
+    parser.add_argument("--qual-atol", type=float, default=1e-4)
+    args = parser.parse_args(argv)
+    service.load_assets("separate", "predict")
+
+    char_scaler = service.CHAR_SCALER
+    qual_scaler = service.QUAL_SCALER
+    fused = build_fused_model(service.CHAR_MODEL, service.QUAL_MODEL, char_scaler, qual_scaler)
+
+    # Separate (sklearn + two calls) path සමඟ සසඳා බැලීම
+    fixtures = synthetic_fixtures()
+    flat = fixtures.reshape(-1, 5)
+    char_ref = KerasPredictBackend(service.CHAR_MODEL)(
+        char_scaler.transform(flat).reshape(fixtures.shape).astype("float32"))
+    qual_ref = KerasPredictBackend(service.QUAL_MODEL)(
+        qual_scaler.transform(flat).reshape(fixtures.shape).astype("float32"))
+    char_pred, qual_pred = fused.predict(fixtures, verbose=0)
+
+    argmax_match = np.array_equal(np.argmax(char_pred, axis=1), np.argmax(char_ref, axis=1))
+    max_drift = float(np.max(np.abs(qual_pred - qual_ref)))
+    print(f"argmax_identical={argmax_match} max_quality_drift={max_drift:.2e}")
+    if not argmax_match or max_drift > args.qual_atol:
+        print("❌ Fused model disagrees with the separate pipeline, not written.")
+        return 1
+
+    fused.save(args.output)
+    print(f"✅ Fused model saved: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+@File: hotswap.py
+@Description: Versioned model artifacts, atomic model swaps and shadow scoring.
+
+Artifacts of one version share the `_vN` suffix in the models directory:
+
+    sinhala_mithuru_char_recognizer_vN.keras  quality_model_vN.keras
+    char_scaler_vN.pkl                        scaler_vN.pkl
+    sinhala_mithuru_fused_vN.keras            (HW_MODEL_MODE=fused)
+
+A version is available when every file its mode needs is present. The serving
+code reads all models of a request from one `ModelSet`, so replacing the
+active set is a single reference assignment: batches already running finish
+on the old set, the next batch uses the new one.
+
+`ShadowScorer` runs a candidate set on a sampled fraction of live samples on
+its own thread, after the primary answer is known, and records how often the
+two versions agree (letter, quality pass/fail, quality score delta).
+"""
+
+import os
+import random
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ARTIFACTS = {
+    "char_model": "sinhala_mithuru_char_recognizer_v{}.keras",
+    "qual_model": "quality_model_v{}.keras",
+    "char_scaler": "char_scaler_v{}.pkl",
+    "qual_scaler": "scaler_v{}.pkl",
+    "fused_model": "sinhala_mithuru_fused_v{}.keras",
+}
+MODE_ARTIFACTS = {
+    "separate": ("char_model", "qual_model", "char_scaler", "qual_scaler"),
+    "fused": ("fused_model",),
+}
+VERSION_RE = re.compile(r"_v(\d+)\.(?:keras|pkl)$")
+
+
+def version_paths(models_dir, version):
+    """Artifact name -> path of one version (whether or not the file exists)."""
+    return {name: os.path.join(models_dir, pattern.format(version)) for name, pattern in ARTIFACTS.items()}
+
+
+def discover_versions(models_dir, mode="separate"):
+    """Sorted versions whose artifacts for `mode` are all present in models_dir."""
+    try:
+        names = os.listdir(models_dir)
+    except OSError:
+        return []
+    candidates = {int(m.group(1)) for m in map(VERSION_RE.search, names) if m}
+    return sorted(v for v in candidates
+                  if all(os.path.exists(version_paths(models_dir, v)[name]) for name in MODE_ARTIFACTS[mode]))
+
+
+def resolve_version(models_dir, requested, mode="separate"):
+    """HW_MODEL_VERSION value ("3", "v3" or "latest") -> int version."""
+    if str(requested).lower() == "latest":
+        versions = discover_versions(models_dir, mode)
+        return versions[-1] if versions else 1
+    return int(str(requested).lower().lstrip("v"))
+
+
+class ModelSet:
+    """Everything one model version needs for inference (unused entries stay None)."""
+
+    def __init__(self, version, paths, char_model=None, qual_model=None, char_scaler=None, qual_scaler=None,
+                 char_backend=None, qual_backend=None, fused_model=None, fused_backend=None,
+                 embedder=None, prototypes=None, timings=None):
+        self.version = version
+        self.paths = paths
+        self.char_model, self.qual_model = char_model, qual_model
+        self.char_scaler, self.qual_scaler = char_scaler, qual_scaler
+        self.char_backend, self.qual_backend = char_backend, qual_backend
+        self.fused_model, self.fused_backend = fused_model, fused_backend
+        # kNN recognition (prototypes.py): Model A embedding backend + PrototypeIndex
+        self.embedder, self.prototypes = embedder, prototypes
+        self.timings = timings or {}
+
+
+class ShadowScorer:
+    """
+    Candidate ModelSet එක sampled live samples මත, request path එකෙන් පිටත, ධාවනය කරයි.
+    `offer` never blocks: samples wait in a queue of at most `max_pending` (the
+    rest are dropped and counted) and the shadow thread scores everything that
+    is waiting as one batch.
+    """
+
+    def __init__(self, max_pending=32, quality_threshold=0.5, seed=None):
+        self.max_pending = int(max_pending)
+        self.quality_threshold = quality_threshold
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hw-shadow")
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._queue = deque()
+        self._draining = False
+        self._score_fn = None
+        self.version = None
+        self.sample_rate = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.sampled = self.compared = self.dropped = self.errors = 0
+        self.label_agree = 0
+        self.quality_compared = self.quality_pass_agree = 0
+        self.quality_abs_delta_sum = self.quality_abs_delta_max = 0.0
+        self.disagreements = Counter()
+
+    def start(self, version, score_fn, sample_rate):
+        """`score_fn((N, 150, 5) batch) -> [(char_idx, qual_score)]` runs the candidate."""
+        with self._lock:
+            self._reset()
+            self.version, self._score_fn, self.sample_rate = version, score_fn, float(sample_rate)
+
+    def stop(self):
+        with self._lock:
+            self._score_fn, self.sample_rate = None, 0.0
+            self._queue.clear()
+
+    @property
+    def active(self):
+        return self._score_fn is not None and self.sample_rate > 0
+
+    def offer(self, processed, primary, labels=None):
+        """
+        Primary (char_idx, qual_score) දන්නා sample එකක් shadow කිරීමට ඉදිරිපත් කරයි.
+        `labels` maps class indices to names for the disagreement counts.
+        """
+        if not self.active or self._random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self._score_fn is None:
+                return False
+            self.sampled += 1
+            if len(self._queue) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._queue.append((processed, primary, labels))
+            if self._draining:
+                return True
+            self._draining = True
+        self._pool.submit(self._drain)
+        return True
+
+    def _drain(self):
+        """Shadow thread: queued samples එක් batch එකක් ලෙස candidate මත, until the queue is empty."""
+        while True:
+            with self._lock:
+                items, score_fn = list(self._queue), self._score_fn
+                self._queue.clear()
+                if not items or score_fn is None:
+                    self._draining = False
+                    return
+            try:
+                results = score_fn(np.stack([item[0] for item in items]).astype("float32"))
+            except Exception as e:
+                with self._lock:
+                    self.errors += len(items)
+                print(f"⚠️ Shadow scoring failed: {e}")
+                continue
+            with self._lock:
+                if score_fn is not self._score_fn:
+                    continue  # candidate discarded or swapped while this batch was running
+                for (_, primary, labels), result in zip(items, results):
+                    self._record(primary, result, labels)
+
+    def _record(self, primary, candidate, labels):
+        char_idx, qual_score = candidate
+        self.compared += 1
+        if char_idx == primary[0]:
+            self.label_agree += 1
+        else:
+            name = (lambda i: labels[i]) if labels else str
+            self.disagreements[f"{name(primary[0])}->{name(char_idx)}"] += 1
+        if qual_score is not None and primary[1] is not None:
+            delta = abs(qual_score - primary[1])
+            self.quality_compared += 1
+            self.quality_abs_delta_sum += delta
+            self.quality_abs_delta_max = max(self.quality_abs_delta_max, delta)
+            self.quality_pass_agree += int((qual_score >= self.quality_threshold)
+                                           == (primary[1] >= self.quality_threshold))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "active": self.active,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "compared": self.compared,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "pending": len(self._queue),
+                "label_agreement": round(self.label_agree / self.compared, 4) if self.compared else None,
+                "quality_pass_agreement": (round(self.quality_pass_agree / self.quality_compared, 4)
+                                           if self.quality_compared else None),
+                "quality_mean_abs_delta": (round(self.quality_abs_delta_sum / self.quality_compared, 4)
+                                           if self.quality_compared else None),
+                "quality_max_abs_delta": round(self.quality_abs_delta_max, 4),
+                "top_disagreements": dict(self.disagreements.most_common(10)),
+            }
+
+    def shutdown(self):
+        self.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,26 +1,117 @@
 import os
+import hmac
 import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 import numpy as np
 import tensorflow as tf
 import keras
 import joblib
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from .utils import preprocess_data #
-
-app = FastAPI(title="Sinhala Mithuru AI Engine")
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from .utils import arc_length, preprocess_batch, preprocess_paths, resample_path, strokes_to_path #
+from .payload import decode_columnar, decode_columnar_strokes
+from .schemas import LevelSubmission, ModelLoadRequest, PrototypeRegistration, StreamStart, WordSubmission
+from .segment import recentre, segment_word
+from .rejection import RULES, RejectionCascade, drawing_features, path_features
+from .batching import MicroBatcher
+from .backends import load_backend, tflite_path
+from .bulk import make_pool, parse_batch_body, stream_evaluation
+from .stream import StrokeBuffer
+from .cache import ResultCache
+from .hotswap import ModelSet, ShadowScorer, discover_versions, resolve_version, version_paths
+from .prototypes import PrototypeIndex, embedding_model, index_path
+from .executor import InferenceExecutor, QueueFullError
+from .metrics import Counter, Family, Gauge, Histogram, Registry, RequestTimingMiddleware
+from .fuse_models import StandardScaling # fused .keras ෆයිල් එක load කිරීමට අවශ්‍යයි
 
 # =============================================================================
 # 🟢 SECTION 1: SYSTEM PATHS & ASSET LOADING
 # =============================================================================
 
 BASE_PATH = "/app"
-CHAR_MODEL_PATH = os.path.join(BASE_PATH, "models/sinhala_mithuru_char_recognizer_v1.keras")
-QUAL_MODEL_PATH = os.path.join(BASE_PATH, "models/quality_model_v1.keras")
-CHAR_SCALER_PATH = os.path.join(BASE_PATH, "models/char_scaler_v1.pkl")
-QUAL_SCALER_PATH = os.path.join(BASE_PATH, "models/scaler_v1.pkl")
+MODELS_DIR = os.path.join(BASE_PATH, "models")
 CONFIG_PATH = os.path.join(BASE_PATH, "app/config.json")
 
+# Micro-batching: concurrent /evaluate requests share one forward pass.
+# HW_BATCH_MAX_SIZE=1 disables the queue (direct single-item inference).
+BATCH_MAX_SIZE = int(os.getenv("HW_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("HW_BATCH_MAX_WAIT_MS", "8"))
+
+# /evaluate_batch: items per inference batch and preprocessing worker processes
+BULK_CHUNK_SIZE = int(os.getenv("HW_BULK_CHUNK_SIZE", "256"))
+BULK_WORKERS = int(os.getenv("HW_BULK_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# Result cache for retried submissions (HW_CACHE_SIZE=0 disables it)
+CACHE_SIZE = int(os.getenv("HW_CACHE_SIZE", "4096"))
+CACHE_TTL_S = float(os.getenv("HW_CACHE_TTL_S", "300"))
+CACHE_QUANTUM = float(os.getenv("HW_CACHE_QUANTUM", "1e-3"))
+
+# Inference runs off the event loop on a dedicated pool; at most
+# HW_INFERENCE_QUEUE_SIZE requests may wait for it before /evaluate answers 429
+INFERENCE_WORKERS = int(os.getenv("HW_INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("HW_INFERENCE_QUEUE_SIZE", "64"))
+RETRY_AFTER_S = int(os.getenv("HW_RETRY_AFTER_S", "1"))
+
+# Inference backend: predict | compiled | savedmodel | onnx | tflite (see backends.py)
+INFERENCE_BACKEND = os.getenv("HW_INFERENCE_BACKEND", "compiled")
+
+# Weight precision: fp32 | fp16 | int8. fp16/int8 need HW_INFERENCE_BACKEND=tflite
+# and the gated artifacts from `python -m app.quantize`
+MODEL_PRECISION = os.getenv("HW_MODEL_PRECISION", "fp32")
+
+# TensorFlow thread pools (0 = TF default, sized to all cores). They are fixed at
+# the first TF op, so they are applied here at import time; pre-forked workers
+# (app/prefork.py) call configure_tf_threads() themselves right after the fork
+TF_INTRA_OP_THREADS = int(os.getenv("HW_TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.getenv("HW_TF_INTER_OP_THREADS", "0"))
+
+def configure_tf_threads(intra_op, inter_op):
+    if intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+configure_tf_threads(TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS)
+
+# Model mode: separate (scalers + Model A + Model B) | fused (one dual-head graph,
+# built with `python -m app.fuse_models`)
+MODEL_MODE = os.getenv("HW_MODEL_MODE", "separate")
+
+# Model version loaded at startup: artifacts with the `_vN` suffix in MODELS_DIR
+# (hotswap.py), "latest" = highest complete version. Other versions are swapped
+# in at runtime through /admin/models, enabled by setting HW_ADMIN_TOKEN
+MODEL_VERSION = resolve_version(MODELS_DIR, os.getenv("HW_MODEL_VERSION", "1"), MODEL_MODE)
+_VERSION_PATHS = version_paths(MODELS_DIR, MODEL_VERSION)
+CHAR_MODEL_PATH, QUAL_MODEL_PATH = _VERSION_PATHS["char_model"], _VERSION_PATHS["qual_model"]
+CHAR_SCALER_PATH, QUAL_SCALER_PATH = _VERSION_PATHS["char_scaler"], _VERSION_PATHS["qual_scaler"]
+FUSED_MODEL_PATH = _VERSION_PATHS["fused_model"]
+ADMIN_TOKEN = os.getenv("HW_ADMIN_TOKEN", "")
+# Shadow scoring: samples waiting for the shadow thread before new ones are dropped
+SHADOW_MAX_PENDING = int(os.getenv("HW_SHADOW_MAX_PENDING", "32"))
+
+# Character recognition: softmax (Model A's trained classes) | knn (nearest prototypes
+# of Model A embeddings, prototypes_vN.npz; new letters via /admin/prototypes/{label})
+RECOGNITION_MODE = os.getenv("HW_RECOGNITION_MODE", "softmax")
+PROTOTYPE_MAX_EXEMPLARS = int(os.getenv("HW_PROTOTYPE_MAX_EXEMPLARS", "64"))
+PROTOTYPE_MIN_SAMPLES = int(os.getenv("HW_PROTOTYPE_MIN_SAMPLES", "10"))
+PROTOTYPE_CENTROID_WEIGHT = float(os.getenv("HW_PROTOTYPE_CENTROID_WEIGHT", "0.5"))
+
+# Run Model B only when Model A's letter matches expected_char (quality is then
+# null in the response). Default for /evaluate requests that do not send
+# `skip_quality_on_mismatch`; the fused graph always computes both heads
+SKIP_QUALITY_ON_MISMATCH = os.getenv("HW_SKIP_QUALITY_ON_MISMATCH", "0") == "1"
+
+# /ws/evaluate: speculative top-k guesses at most once per HW_WS_GUESS_INTERVAL_MS
+# while the child draws (0 disables them), and a cap on points per drawing
+WS_GUESS_INTERVAL_MS = float(os.getenv("HW_WS_GUESS_INTERVAL_MS", "250"))
+WS_TOP_K = int(os.getenv("HW_WS_TOP_K", "3"))
+WS_MAX_POINTS = int(os.getenv("HW_WS_MAX_POINTS", "20000"))
+
+# /evaluate_word: longest accepted expected character sequence
+WORD_MAX_CHARS = int(os.getenv("HW_WORD_MAX_CHARS", "12"))
+
 # මොඩලය පුහුණු කළ අවස්ථාවේ තිබූ නිවැරදි අනුපිළිවෙල
 DYNAMIC_CLASSES = [
     'A', 'AEe', 'Aa', 'Ae', 'E', 'Ee', 'G', 'Gi', 'Gii', 'Gu', 'Guu', 
@@ -29,72 +120,903 @@ DYNAMIC_CLASSES = [
     'Uu', 'Y', 'g', 'k'
 ]
 
-# Assets පූරණය කිරීම
-try:
-    CHAR_MODEL = keras.models.load_model(CHAR_MODEL_PATH)
-    QUAL_MODEL = keras.models.load_model(QUAL_MODEL_PATH)
-    CHAR_SCALER = joblib.load(CHAR_SCALER_PATH)
-    QUAL_SCALER = joblib.load(QUAL_SCALER_PATH)
-    
+# =============================================================================
+# 🟢 SECTION 2: METRICS (/metrics, Prometheus text format)
+# =============================================================================
+
+# Label sets are fixed here so recording never allocates: unknown expected_char
+# values (free client input) fall into "other"
+STAGES = ("parse", "preprocess", "cache_lookup", "infer", "scaler", "char_model", "qual_model", "fused_model",
+          "guess")
+STAGE_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+POINT_BUCKETS = (25, 50, 100, 150, 250, 500, 1000, 2500, 5000, 10000)
+ENDPOINTS = ("/evaluate", "/evaluate_word", "/evaluate_batch")
+
+METRICS = Registry()
+STAGE_SECONDS = METRICS.register(
+    "hw_stage_duration_seconds", "Time spent per /evaluate stage (model stages are per batch).",
+    Family(lambda: Histogram(STAGE_BUCKETS_S), "stage", STAGES))
+INPUT_POINTS = METRICS.register(
+    "hw_input_points", "Raw points per /evaluate submission.", Histogram(POINT_BUCKETS))
+PREDICTED_TOTAL = METRICS.register(
+    "hw_predicted_label_total", "/evaluate results per predicted label.",
+    Family(Counter, "label", DYNAMIC_CLASSES, fallback="other"))
+EXPECTED_TOTAL = METRICS.register(
+    "hw_expected_char_total", "/evaluate submissions per expected_char.",
+    Family(Counter, "expected_char", DYNAMIC_CLASSES, fallback="other"))
+IN_FLIGHT = METRICS.register(
+    "hw_requests_in_flight", "HTTP requests currently being handled.",
+    Family(Gauge, "path", ENDPOINTS, fallback="other"))
+REJECTED_TOTAL = METRICS.register(
+    "hw_rejected_total", "Submissions answered 'retry' by the rejection cascade, per rule.",
+    Family(Counter, "rule", RULES))
+QUALITY_SKIPPED_TOTAL = METRICS.register(
+    "hw_quality_skipped_total", "Samples whose Model B run was skipped (letter mismatch).", Counter())
+MODEL_SWAPS_TOTAL = METRICS.register(
+    "hw_model_swaps_total", "Model versions swapped in through /admin/models.", Counter())
+
+def observe_stage(stage, t0):
+    """Stage එකේ කාලය (t0 සිට) histogram එකට; ඊළඟ stage එකේ t0 ලෙස now ආපසු."""
+    now = time.perf_counter()
+    STAGE_SECONDS.labels(stage).observe(now - t0)
+    return now
+
+def unobserved_stage(stage, t0):
+    """observe_stage for candidate versions (warm-up, shadow scoring): no serving metrics."""
+    return time.perf_counter()
+
+# Assets lifespan handler එක තුළ පූරණය වේ (load_assets); ඊට පෙර සියල්ල None.
+# The module-level names keep the startup version for the offline tools
+# (quantize, fuse_models, backends); serving reads ACTIVE_MODELS only
+CHAR_MODEL = QUAL_MODEL = CHAR_SCALER = QUAL_SCALER = None
+CHAR_BACKEND = QUAL_BACKEND = None
+FUSED_MODEL = FUSED_BACKEND = None
+CHAR_CONFIG = None
+ACTIVE_MODELS = None
+
+# /readyz state: assets loaded and warm-up inferences done
+READY = False
+STARTUP_ERROR = None
+STARTUP_TIMINGS = {}
+
+def load_artifact(step, path):
+    """load_model_set හි default loader: `step` (char_model, qual_scaler, prototypes, ...) -> object read from `path`."""
+    if step.endswith("_model"):
+        return keras.models.load_model(path)
+    if step.endswith("_scaler"):
+        return joblib.load(path)
+    if step == "prototypes":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found (build it with `python -m app.prototypes build`).")
+        return PrototypeIndex.load(path, PROTOTYPE_MAX_EXEMPLARS, PROTOTYPE_CENTROID_WEIGHT)
+    raise ValueError(f"Unknown model set step '{step}'.")
+
+def load_model_set(version, mode=None, backend=None, precision=None, recognition=None, load=None):
+    """
+    එක් model version එකක models සහ scalers පූරණය කරයි -> ModelSet ({step: seconds} in `.timings`).
+    `mode` / `backend` / `precision` / `recognition` default to HW_MODEL_MODE /
+    HW_INFERENCE_BACKEND / HW_MODEL_PRECISION / HW_RECOGNITION_MODE (the offline
+    tools load the separate fp32 models with the predict backend). `load(step, path)`
+    replaces load_artifact (benchmarks/stubs.py builds stand-in models with it).
+    """
+    load = load or load_artifact
+    mode = mode or MODEL_MODE
+    recognition = recognition or RECOGNITION_MODE
+    if recognition == "knn" and mode == "fused":
+        raise ValueError("HW_RECOGNITION_MODE=knn needs HW_MODEL_MODE=separate (Model A embeddings).")
+    backend = backend or INFERENCE_BACKEND
+    precision = precision or (MODEL_PRECISION if backend == INFERENCE_BACKEND else "fp32")
+    paths = version_paths(MODELS_DIR, version)
+    models = ModelSet(version, paths)
+
+    def timed(step, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        models.timings[step] = round(time.perf_counter() - t0, 3)
+        return result
+
+    if mode == "fused":
+        models.fused_model = timed("fused_model", load, "fused_model", paths["fused_model"])
+        models.fused_backend = timed("fused_backend", load_backend, models.fused_model, paths["fused_model"],
+                                     backend, precision)
+    else:
+        models.char_model = timed("char_model", load, "char_model", paths["char_model"])
+        models.qual_model = timed("qual_model", load, "qual_model", paths["qual_model"])
+        models.char_scaler = timed("char_scaler", load, "char_scaler", paths["char_scaler"])
+        models.qual_scaler = timed("qual_scaler", load, "qual_scaler", paths["qual_scaler"])
+        models.char_backend = timed("char_backend", load_backend, models.char_model, paths["char_model"],
+                                    backend, precision)
+        models.qual_backend = timed("qual_backend", load_backend, models.qual_model, paths["qual_model"],
+                                    backend, precision)
+        # Penultimate-layer embedding (kNN recognition, prototype builds): exported
+        # artifacts belong to the full model, so only the in-process backends
+        models.embedder = timed("embedder", load_backend, embedding_model(models.char_model), paths["char_model"],
+                                backend if backend in ("predict", "compiled") else "compiled")
+
+    if recognition == "knn":
+        models.prototypes = timed("prototypes", load, "prototypes", index_path(MODELS_DIR, version))
+    return models
+
+def load_assets(mode=None, backend=None, precision=None, recognition=None, load=None):
+    """
+    HW_MODEL_VERSION models, scalers සහ config.json පූරණය කරයි. Returns {step: seconds}.
+    Arguments as in load_model_set.
+    """
+    global CHAR_MODEL, QUAL_MODEL, CHAR_SCALER, QUAL_SCALER, CHAR_BACKEND, QUAL_BACKEND
+    global FUSED_MODEL, FUSED_BACKEND, CHAR_CONFIG, ACTIVE_MODELS
+    models = load_model_set(MODEL_VERSION, mode, backend, precision, recognition, load)
+    CHAR_MODEL, QUAL_MODEL = models.char_model, models.qual_model
+    CHAR_SCALER, QUAL_SCALER = models.char_scaler, models.qual_scaler
+    CHAR_BACKEND, QUAL_BACKEND = models.char_backend, models.qual_backend
+    FUSED_MODEL, FUSED_BACKEND = models.fused_model, models.fused_backend
+    ACTIVE_MODELS = models
+
+    t0 = time.perf_counter()
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         CHAR_CONFIG = json.load(f)
-    print("✅ All Research Assets Loaded Successfully with Keras 3!")
-except Exception as e:
-    print(f"❌ Critical Error Loading Assets: {e}")
+    merge_prototype_meta(models)
+    return dict(models.timings, config=round(time.perf_counter() - t0, 3))
+
+def merge_prototype_meta(models):
+    """kNN හරහා එක් කළ අලුත් අකුරු: symbol / strokes CHAR_CONFIG වෙත (config.json labels win)."""
+    if models.prototypes is not None:
+        for label, meta in models.prototypes.meta.items():
+            CHAR_CONFIG.setdefault(label, {"symbol": meta.get("symbol", label), "strokes": meta.get("strokes", 1)})
+
+def class_labels(models=None):
+    """Labels that run_models' char_idx points into: Model A's classes or the prototype index labels."""
+    models = models or ACTIVE_MODELS
+    return models.prototypes.labels if models is not None and models.prototypes is not None else DYNAMIC_CLASSES
+
+def warm_up(models=None):
+    """
+    Serving shapes (batch 1 සහ max batch) මත dummy inference - graph tracing සහ
+    allocator warm-up පළමු සැබෑ request එකට නොවැටීමට. Returns {step: seconds}.
+    `models` = a candidate ModelSet (default: the active one).
+    """
+    timings = {}
+    for n in sorted({1, max(1, BATCH_MAX_SIZE)}):
+        t0 = time.perf_counter()
+        run_models(np.zeros((n, 150, 5), dtype="float32"), models=models)
+        timings[f"warmup_batch_{n}"] = round(time.perf_counter() - t0, 3)
+    return timings
 
 # =============================================================================
-# 🟢 SECTION 2: API ENDPOINTS
+# 🟢 SECTION 3: INFERENCE
 # =============================================================================
 
-class LevelSubmission(BaseModel):
-    expected_char: str
-    strokes: list
+def quality_gate(expected_char):
+    """
+    Model B ධාවනය කළ යුතු Model A class indices: expected_char ලේබලය හෝ
+    config.json හි එම සංකේතය ඇති classes (game backend එක සංකේතය යැවිය හැක).
+    """
+    return frozenset(i for i, label in enumerate(class_labels())
+                     if label == expected_char or CHAR_CONFIG.get(label, {}).get("symbol") == expected_char)
+
+def run_models(batch, gates=None, models=None):
+    """
+    Model A සහ Model B එකවර (N, 150, 5) batch එකක් මත ධාවනය කරයි.
+    Returns a list of (char_idx, qual_score) tuples, one per sample.
+
+    `gates` (optional, one per sample) is a set of class indices from
+    quality_gate() or None: a sample whose predicted class is not in its gate
+    skips Model B and gets qual_score None. Fused mode ignores it.
+    `models` runs a candidate ModelSet instead of the active one (stage metrics
+    are then not recorded).
+    """
+    observe = observe_stage if models is None else unobserved_stage
+    # එක් batch එකක් සඳහා එක් ModelSet එකක් පමණි: swap එකක් batch මැදදී බලපාන්නේ නැත
+    models = models or ACTIVE_MODELS
+    n = batch.shape[0]
+    t = time.perf_counter()
+
+    if MODEL_MODE == "fused":
+        # Scalers are folded into the graph: one call returns both heads
+        char_pred, qual_pred = models.fused_backend(batch)
+        observe("fused_model", t)
+        char_idx = np.argmax(char_pred, axis=1)
+        return [(int(char_idx[i]), float(qual_pred[i][0])) for i in range(n)]
+
+    # Z-score Scaling & Inference: Model A පළමුව, එහි ප්‍රතිඵලය අනුව Model B
+    char_input = models.char_scaler.transform(batch.reshape(-1, 5)).reshape(n, 150, 5).astype("float32")
+    t = observe("scaler", t)
+
+    if models.prototypes is not None:
+        # kNN: penultimate-layer embedding -> nearest prototypes, one matmul (prototypes.py)
+        char_idx = models.prototypes.classify(models.embedder(char_input))
+    else:
+        char_idx = np.argmax(models.char_backend(char_input), axis=1)
+    t = observe("char_model", t)
+
+    if gates is None:
+        rows = np.arange(n)
+    else:
+        rows = np.array([i for i in range(n) if gates[i] is None or int(char_idx[i]) in gates[i]], dtype=int)
+        QUALITY_SKIPPED_TOTAL.inc(n - len(rows))
+
+    qual_scores = [None] * n
+    if len(rows):
+        sub = batch[rows]
+        qual_input = models.qual_scaler.transform(sub.reshape(-1, 5)).reshape(len(rows), 150, 5).astype("float32")
+        qual_pred = models.qual_backend(qual_input)
+        observe("qual_model", t)
+        for j, i in enumerate(rows):
+            qual_scores[i] = float(qual_pred[j][0])
+
+    return [(int(char_idx[i]), qual_scores[i]) for i in range(n)]
+
+def char_probabilities(batch, models=None):
+    """Model A පමණක් (WebSocket speculative guesses): (N, 150, 5) -> (N, classes)."""
+    observe = observe_stage if models is None else unobserved_stage
+    models = models or ACTIVE_MODELS
+    t = time.perf_counter()
+    if MODEL_MODE == "fused":
+        char_pred, _ = models.fused_backend(batch)
+    elif models.prototypes is not None:
+        char_pred = models.prototypes.probabilities(embed(batch, models))
+    else:
+        n = batch.shape[0]
+        char_pred = models.char_backend(
+            models.char_scaler.transform(batch.reshape(-1, 5)).reshape(n, 150, 5).astype("float32"))
+    observe("guess", t)
+    return np.asarray(char_pred)
+
+def embed(batch, models=None):
+    """(N, 150, 5) -> (N, dim) Model A penultimate-layer embeddings (separate mode)."""
+    models = models or ACTIVE_MODELS
+    n = batch.shape[0]
+    return np.asarray(models.embedder(
+        models.char_scaler.transform(batch.reshape(-1, 5)).reshape(n, 150, 5).astype("float32")))
+
+INFERENCE = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_queue=INFERENCE_QUEUE_SIZE,
+                              retry_after_s=RETRY_AFTER_S)
+BATCHER = MicroBatcher(run_models, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                       executor=INFERENCE)
+
+def model_files(paths):
+    """Files of one version (version_paths) whose change must drop cached results."""
+    files = ([paths["fused_model"]] if MODEL_MODE == "fused" else
+             [paths["char_model"], paths["qual_model"], paths["char_scaler"], paths["qual_scaler"]])
+    if INFERENCE_BACKEND == "tflite":
+        # Served weights are the TFLite artifacts: a re-published variant must drop the cache
+        files += [tflite_path(p, MODEL_PRECISION) for p in files if p.endswith(".keras")]
+    return files
+
+# Cache version = the active version's files: a swap (activate_candidate) rewatches them
+CACHE = ResultCache(max_size=CACHE_SIZE, ttl_s=CACHE_TTL_S, quantum=CACHE_QUANTUM,
+                    watch_paths=model_files(_VERSION_PATHS))
+
+# Dots, taps, lines and scribbles get a "retry" answer before the models (rejection.py)
+REJECTION = RejectionCascade.from_env()
+
+# Hot swap: a candidate version is loaded and warmed off the event loop, can shadow
+# live traffic, and replaces ACTIVE_MODELS with one assignment (hotswap.py)
+SHADOW = ShadowScorer(max_pending=SHADOW_MAX_PENDING)
+CANDIDATE = None        # warmed ModelSet waiting for /admin/models/activate
+CANDIDATE_STATE = {}    # /admin/models: version, status (loading | ready | failed), error, timings
+CANDIDATE_TASK = None
+
+def prepare_candidate(version):
+    """Version එක load + warm-up (blocking: thread එකක ධාවනය වේ). Returns the ModelSet."""
+    models = load_model_set(version)
+    models.timings.update(warm_up(models))
+    classes = char_probabilities(np.zeros((1, 150, 5), dtype="float32"), models).shape[1]
+    if models.prototypes is None and classes != len(DYNAMIC_CLASSES):
+        raise ValueError(f"Model v{version} has {classes} classes, the service expects {len(DYNAMIC_CLASSES)}.")
+    return models
+
+async def stage_candidate(version, activate, shadow_rate):
+    """Background task of POST /admin/models/{version}/load."""
+    global CANDIDATE
+    try:
+        models = await asyncio.to_thread(prepare_candidate, version)
+    except Exception as e:
+        CANDIDATE_STATE.update(status="failed", error=f"{type(e).__name__}: {e}")
+        print(f"❌ Model v{version} failed to load: {e}")
+        return
+    CANDIDATE = models
+    CANDIDATE_STATE.update(status="ready", timings=models.timings)
+    print(f"✅ Model v{version} loaded and warmed: {json.dumps(models.timings)}")
+    if activate:
+        activate_candidate()
+    elif shadow_rate > 0:
+        SHADOW.start(version, lambda batch: run_models(batch, models=models), shadow_rate)
+
+def activate_candidate():
+    """
+    Warmed candidate -> active. Running batches finish on the old ModelSet (run_models
+    reads ACTIVE_MODELS once); cached results of the old version are dropped.
+    Returns the previous version.
+    """
+    global ACTIVE_MODELS, CANDIDATE
+    previous, models = ACTIVE_MODELS, CANDIDATE
+    SHADOW.stop()
+    ACTIVE_MODELS, CANDIDATE = models, None
+    CANDIDATE_STATE.clear()
+    merge_prototype_meta(models)
+    CACHE.rewatch(model_files(models.paths))
+    MODEL_SWAPS_TOTAL.inc()
+    print(f"🔁 Model v{previous.version} -> v{models.version}")
+    return previous.version
+
+async def infer(processed, gate=None):
+    """Single sample inference, routed through the micro-batcher when enabled."""
+    if BATCH_MAX_SIZE <= 1:
+        results = await INFERENCE.run(run_models, processed[np.newaxis].astype("float32"), [gate])
+        return results[0]
+    return await BATCHER.submit(processed, gate)
+
+async def infer_batch(batch):
+    """Bulk batch inference on the inference pool (no admission limit)."""
+    return await INFERENCE.run(run_models, batch)
+
+BULK_POOL = None
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Startup: assets පූරණය + warm-up. අසාර්ථක වුවහොත් process එක ජීවත්ව තබා
+    (/healthz) /readyz 503 ලබා දෙයි, එවිට orchestrator traffic නොයවයි.
+    """
+    global READY, STARTUP_ERROR, STARTUP_TIMINGS
+    t0 = time.perf_counter()
+    try:
+        STARTUP_TIMINGS = load_assets()
+        print("✅ All Research Assets Loaded Successfully with Keras 3!")
+        STARTUP_TIMINGS.update(warm_up())
+        READY = True
+    except Exception as e:
+        STARTUP_ERROR = f"{type(e).__name__}: {e}"
+        print(f"❌ Critical Error Loading Assets: {e}")
+    STARTUP_TIMINGS["total"] = round(time.perf_counter() - t0, 3)
+    print(f"⏱️ Startup timings (s, mode={MODEL_MODE}, backend={INFERENCE_BACKEND}, precision={MODEL_PRECISION}): "
+          f"{json.dumps(STARTUP_TIMINGS)}")
+
+    yield
+
+    READY = False
+    if CANDIDATE_TASK is not None and not CANDIDATE_TASK.done():
+        CANDIDATE_TASK.cancel()
+    SHADOW.shutdown()
+    if BULK_POOL is not None:
+        BULK_POOL.shutdown(cancel_futures=True)
+    INFERENCE.shutdown()
+
+app = FastAPI(title="Sinhala Mithuru AI Engine", lifespan=lifespan)
+app.add_middleware(RequestTimingMiddleware, in_flight=IN_FLIGHT)
+
+# =============================================================================
+# 🟢 SECTION 4: API ENDPOINTS
+# =============================================================================
+
+def require_ready():
+    """Assets නොමැතිව (startup අසාර්ථක / තවමත් warm-up) inference endpoints 503 ලබා දෙයි."""
+    if not READY:
+        raise HTTPException(status_code=503, detail="Models are not loaded yet.",
+                            headers={"Retry-After": str(RETRY_AFTER_S)})
+
+def preprocess_submission(submission):
+    """
+    Legacy dict strokes හෝ columnar strokes -> (processed (150, 5) or None, stroke count,
+    rejection.drawing_features dict). Same result as preprocess_data / preprocess_path.
+    """
+    try:
+        if submission.columnar_strokes is not None:
+            path, n_strokes = decode_columnar(**submission.columnar_strokes.model_dump())
+        else:
+            path, n_strokes = strokes_to_path(submission.strokes), len(submission.strokes)
+    except (AttributeError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid stroke data: {e}")
+
+    cum_dist = arc_length(path) if len(path) else np.zeros(0, dtype="float32")
+    return resample_path(path, cum_dist), n_strokes, drawing_features(path, cum_dist, n_strokes)
+
+def reject(features, expected_char):
+    """
+    Rejection cascade: retry analysis dict (a rule fired) හෝ None (models වෙත යවන්න).
+    Endpoints answer a rejected drawing with `status: "retry"` (not an attempt to score).
+    """
+    if not REJECTION.enabled:
+        return None
+    expected_strokes = CHAR_CONFIG.get(expected_char, {}).get("strokes")
+    rule = REJECTION.check(features, expected_strokes)
+    if rule is None:
+        return None
+    REJECTED_TOTAL.labels(rule).inc()
+    return {
+        "is_correct_letter": False,
+        "identified_letter_label": None,
+        "identified_letter_symbol": None,
+        "quality_percentage": None,
+        "is_quality_pass": None,
+        "strokes_actual": features["n_strokes"],
+        "strokes_expected": CHAR_CONFIG.get(expected_char, {"strokes": 1})["strokes"],
+        "retry": True,
+        "retry_reason": rule,
+    }
 
 @app.post("/evaluate")
-async def evaluate_handwriting(submission: LevelSubmission):
+async def evaluate_handwriting(submission: LevelSubmission, request: Request):
     """
     පර්යේෂණාත්මක ඇගයීම් Endpoint එක: අකුර සහ ගුණාත්මකභාවය පිරික්සයි.
     """
+    # Body read + JSON parse + pydantic validation (middleware stamp -> here)
+    t = observe_stage("parse", request.state.received_at)
+    require_ready()
+    EXPECTED_TOTAL.labels(submission.expected_char).inc()
+
     # 🧪 1. Preprocessing (Resampling to 150 points)
-    processed, raw_strokes = preprocess_data(submission.strokes)
-    
+    processed, actual_strokes, features = preprocess_submission(submission)
+    INPUT_POINTS.observe(features["n_points"])
+    t = observe_stage("preprocess", t)
+
+    # පැහැදිලිවම වලංගු නොවන ඇඳීම් (තිත්, රේඛා, scribbles): models නොමැතිව "retry"
+    retry = reject(features, submission.expected_char)
+    if retry is not None:
+        return {"status": "retry", "analysis": retry}
+
     if processed is None:
         raise HTTPException(status_code=400, detail="Invalid stroke data.")
 
-    # 🧪 2. Character Recognition (Model A)
-    # Z-score Scaling & Inference
-    char_input = CHAR_SCALER.transform(processed.reshape(-1, 5)).reshape(1, 150, 5)
-    char_pred = CHAR_MODEL.predict(char_input, verbose=0)
-    
+    analysis = await evaluate_sample(processed, submission.expected_char, actual_strokes,
+                                     submission.skip_quality_on_mismatch, t)
+    return {
+        "status": "success",
+        "analysis": analysis
+    }
+
+async def evaluate_sample(processed, expected_char, actual_strokes, skip_quality, t):
+    """
+    Preprocess කළ (150, 5) sample එක -> analysis dict: cache, inference සහ metrics
+    (/evaluate සහ /ws/evaluate). `skip_quality` None = HW_SKIP_QUALITY_ON_MISMATCH.
+    Raises HTTPException(429) when the inference queue is full.
+    """
+    if skip_quality is None:
+        skip_quality = SKIP_QUALITY_ON_MISMATCH
+
+    # Retry එකක් නම් (එකම trajectory) cache එකෙන් ප්‍රතිඵලය
+    cache_key = None
+    if CACHE.enabled:
+        cache_key = CACHE.key(processed, expected_char, actual_strokes)
+        cached = CACHE.get(cache_key)
+        t = observe_stage("cache_lookup", t)
+        # Quality නොමැති (skip කළ) ප්‍රතිඵලයක් quality ඉල්ලන request එකකට නොදෙන්න
+        if cached is not None and (skip_quality or cached["quality_percentage"] is not None):
+            PREDICTED_TOTAL.labels(cached["identified_letter_label"]).inc()
+            return cached
+
+    # 🧪 2 & 3. Character Recognition (Model A) + Quality Assessment (Model B,
+    # skipped on a wrong letter when skip_quality_on_mismatch is on)
+    gate = quality_gate(expected_char) if skip_quality else None
+    try:
+        with INFERENCE.admit():
+            char_idx, qual_score = await infer(processed, gate)
+    except QueueFullError:
+        raise HTTPException(status_code=429, detail="Inference queue is full, please retry.",
+                            headers={"Retry-After": str(RETRY_AFTER_S)})
+    # Queue wait + batched model time as seen by this request
+    observe_stage("infer", t)
+    analysis = build_analysis(expected_char, char_idx, qual_score, actual_strokes)
+    PREDICTED_TOTAL.labels(analysis["identified_letter_label"]).inc()
+    # Shadow mode: candidate version එකද sample එක score කරයි (එහිම thread එකේ, non-blocking)
+    SHADOW.offer(processed, (char_idx, qual_score), class_labels())
+
+    if cache_key is not None:
+        CACHE.put(cache_key, analysis)
+    return analysis
+
+def build_analysis(expected_char, char_idx, qual_score, actual_strokes):
+    """
+    Model outputs -> /evaluate `analysis` dict (shared with /evaluate_batch).
+    qual_score None (Model B skipped) -> quality_percentage / is_quality_pass null.
+    """
     # හඳුනාගත් අකුර (Predicted Class) ලබා ගැනීම
-    char_idx = np.argmax(char_pred)
-    predicted_label = DYNAMIC_CLASSES[char_idx]
+    predicted_label = class_labels()[char_idx]
     
     # හඳුනාගත් අකුරේ සිංහල සංකේතය Config එකෙන් ලබා ගැනීම
     identified_meta = CHAR_CONFIG.get(predicted_label, {"symbol": predicted_label})
     identified_symbol = identified_meta['symbol']
-
-    # 🧪 3. Quality Assessment (Model B)
-    qual_input = QUAL_SCALER.transform(processed.reshape(-1, 5)).reshape(1, 150, 5)
-    qual_score = float(QUAL_MODEL.predict(qual_input, verbose=0)[0][0])
     
     # 🧪 4. Validation & Logic
-    config_data = CHAR_CONFIG.get(submission.expected_char, {"symbol": "", "strokes": 1})
-    actual_strokes = len(raw_strokes)
+    config_data = CHAR_CONFIG.get(expected_char, {"symbol": "", "strokes": 1})
 
     # අකුරේ නිරවද්‍යතාවය පිරික්සීම
-    is_correct_char = (predicted_label == submission.expected_char)
-    is_quality_pass = (qual_score >= 0.5)
+    is_correct_char = (predicted_label == expected_char)
+    quality_evaluated = qual_score is not None
 
+    return {
+        "is_correct_letter": bool(is_correct_char),
+        "identified_letter_label": predicted_label,    # හඳුනාගත් ලේබලය (උදා: 'Aa')
+        "identified_letter_symbol": identified_symbol, # හඳුනාගත් සිංහල අකුර (උදා: 'ආ')
+        "quality_percentage": round(qual_score * 100, 2) if quality_evaluated else None,
+        "is_quality_pass": bool(qual_score >= 0.5) if quality_evaluated else None,
+        "strokes_actual": actual_strokes,
+        "strokes_expected": config_data['strokes']
+    }
+
+@app.post("/evaluate_word")
+async def evaluate_word(submission: WordSubmission, request: Request):
+    """
+    මුළු වචනයක strokes: අකුරු වලට වෙන් කර (segment.py), සියලු අකුරු එක batch
+    forward pass එකකින් ඇගයීම. Returns per-character analysis + a word verdict.
+    """
+    t = observe_stage("parse", request.state.received_at)
+    require_ready()
+    expected = submission.expected_chars
+    if len(expected) > WORD_MAX_CHARS:
+        raise HTTPException(status_code=400, detail=f"At most {WORD_MAX_CHARS} characters per word.")
+
+    # 🧪 1. Strokes -> per-stroke paths (empty strokes dropped, original indices kept)
+    try:
+        if submission.columnar_strokes is not None:
+            stroke_paths = decode_columnar_strokes(**submission.columnar_strokes.model_dump())
+        else:
+            stroke_paths = [strokes_to_path([stroke]) for stroke in submission.strokes]
+    except (AttributeError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid stroke data: {e}")
+    kept = [i for i, path in enumerate(stroke_paths) if len(path)]
+    stroke_paths = [stroke_paths[i] for i in kept]
+    INPUT_POINTS.observe(sum(len(path) for path in stroke_paths))
+
+    # 🧪 2. Segmentation: config.json stroke counts + spatial gaps
+    counts = [CHAR_CONFIG.get(label, {}).get("strokes", 1) for label in expected]
+    try:
+        runs = segment_word(stroke_paths, counts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    segments = [recentre(np.concatenate(stroke_paths[i:j])) for i, j in runs]
+    batch, valid = preprocess_paths(segments)
+    # එක් එක් අකුරටම rejection cascade එක (/evaluate මෙන්): "retry" අකුරු models වෙත නොයයි
+    retries = [reject(path_features(segment, j - i), label)
+               for segment, label, (i, j) in zip(segments, expected, runs)]
+    t = observe_stage("preprocess", t)
+
+    # 🧪 3. Every valid character in one forward pass
+    skip_quality = (SKIP_QUALITY_ON_MISMATCH if submission.skip_quality_on_mismatch is None
+                    else submission.skip_quality_on_mismatch)
+    rows = np.array([k for k in np.flatnonzero(valid) if retries[k] is None], dtype=np.int64)
+    results = []
+    if len(rows):
+        gates = [quality_gate(expected[r]) if skip_quality else None for r in rows]
+        try:
+            with INFERENCE.admit():
+                results = await INFERENCE.run(run_models, batch[rows], gates)
+        except QueueFullError:
+            raise HTTPException(status_code=429, detail="Inference queue is full, please retry.",
+                                headers={"Retry-After": str(RETRY_AFTER_S)})
+    observe_stage("infer", t)
+
+    # 🧪 4. Per-character analysis + word verdict
+    scored = dict(zip(rows.tolist(), results))
+    characters, qualities = [], []
+    for k, (label, (i, j)) in enumerate(zip(expected, runs)):
+        EXPECTED_TOTAL.labels(label).inc()
+        row = {"index": k, "expected_char": label, "stroke_indices": kept[i:j]}
+        if retries[k] is not None:
+            row.update(status="retry", analysis=retries[k])
+        elif k not in scored:
+            row.update(status="error", detail="Invalid stroke data.", analysis=None)
+        else:
+            char_idx, qual_score = scored[k]
+            analysis = build_analysis(label, char_idx, qual_score, j - i)
+            PREDICTED_TOTAL.labels(analysis["identified_letter_label"]).inc()
+            if analysis["quality_percentage"] is not None:
+                qualities.append(analysis["quality_percentage"])
+            row.update(status="success", analysis=analysis)
+        characters.append(row)
+
+    n_correct = sum(1 for c in characters if c["analysis"] and c["analysis"]["is_correct_letter"])
     return {
         "status": "success",
-        "analysis": {
-            "is_correct_letter": bool(is_correct_char),
-            "identified_letter_label": predicted_label,    # හඳුනාගත් ලේබලය (උදා: 'Aa')
-            "identified_letter_symbol": identified_symbol, # හඳුනාගත් සිංහල අකුර (උදා: 'ආ')
-            "quality_percentage": round(qual_score * 100, 2),
-            "is_quality_pass": bool(is_quality_pass),
-            "strokes_actual": actual_strokes,
-            "strokes_expected": config_data['strokes']
-        }
-    }
\ No newline at end of file
+        "word": {
+            "expected_chars": expected,
+            "identified_word_symbols": "".join((c["analysis"] or {}).get("identified_letter_symbol") or "?"
+                                               for c in characters),
+            "is_correct_word": n_correct == len(expected),
+            "correct_characters": n_correct,
+            "quality_percentage": round(float(np.mean(qualities)), 2) if qualities else None,
+        },
+        "characters": characters,
+    }
+
+@app.post("/evaluate_batch")
+async def evaluate_batch(request: Request):
+    """
+    Bulk re-scoring: JSON list එකක් හෝ NDJSON (application/x-ndjson) body එකක් ලෙස
+    {id, expected_char, strokes} items ලබා ගෙන, input අනුපිළිවෙලටම NDJSON ලෙස ප්‍රතිඵල stream කරයි.
+    """
+    global BULK_POOL
+    require_ready()
+    body = await request.body()
+
+    # 50k-item body එකක් parse කිරීම thread එකක: event loop එක අනෙක් requests සඳහා නිදහස්ව
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    try:
+        raw_items = await asyncio.to_thread(parse_batch_body, body, ndjson)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON list or NDJSON.")
+
+    if BULK_POOL is None and BULK_WORKERS > 0:
+        BULK_POOL = make_pool(BULK_WORKERS)
+
+    lines = stream_evaluation(raw_items, infer_batch, build_analysis, reject, BULK_POOL,
+                              BULK_WORKERS, BULK_CHUNK_SIZE)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.websocket("/ws/evaluate")
+async def evaluate_stream(websocket: WebSocket):
+    """
+    ළමයා අඳින අතරතුර ලක්ෂ්‍ය ලබා ගනී (stream.StrokeBuffer), එවිට `end` පණිවිඩයේදී
+    ඉතිරි වන්නේ 150-point interpolation සහ එක් model call එකක් පමණි.
+
+    Client -> server (JSON):
+        {"type": "start", "expected_char": "Aa", "top_k": 3, "skip_quality_on_mismatch": true}
+        {"type": "pen_down"}                      new stroke
+        {"type": "points", "points": [{x, y, dx, dy, p}, ...]}
+        {"type": "pen_up"}
+        {"type": "end"}                           evaluate, then ready for the next `start`
+    Server -> client:
+        {"type": "guess", "points": n, "top_k": [{label, symbol, probability}, ...]}   throttled, best effort
+        {"type": "result", "status": "success", "analysis": {...}}                    same analysis as /evaluate
+        {"type": "error", "status_code": 400 | 429 | 503, "detail": "..."}
+    """
+    await websocket.accept()
+    if not READY:
+        await websocket.send_json({"type": "error", "status_code": 503, "detail": "Models are not loaded yet."})
+        await websocket.close(code=1013)
+        return
+
+    buffer = StrokeBuffer(max_points=WS_MAX_POINTS)
+    start, guess_task, last_guess = None, None, 0.0
+
+    async def send_guess(processed, n_points, k):
+        try:
+            with INFERENCE.admit():
+                probs = (await INFERENCE.run(char_probabilities, processed[np.newaxis].astype("float32")))[0]
+        except QueueFullError:
+            return  # guesses are best effort: a busy server drops them
+        top, labels = np.argsort(probs)[::-1][:k], class_labels()
+        await websocket.send_json({"type": "guess", "points": n_points, "top_k": [
+            {"label": labels[i],
+             "symbol": CHAR_CONFIG.get(labels[i], {"symbol": labels[i]})["symbol"],
+             "probability": round(float(probs[i]), 4)} for i in top]})
+
+    async def send_error(status_code, detail):
+        await websocket.send_json({"type": "error", "status_code": status_code, "detail": detail})
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                await send_error(400, "Messages must be JSON objects.")
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+
+            if kind == "start":
+                try:
+                    start = StreamStart.model_validate(message)
+                except ValueError as e:
+                    await send_error(400, str(e))
+                    continue
+                buffer.reset()
+            elif start is None:
+                await send_error(400, "Send a 'start' message first.")
+            elif kind == "pen_down":
+                buffer.start_stroke()
+            elif kind == "points":
+                try:
+                    buffer.extend(message.get("points") or [])
+                except ValueError as e:
+                    await send_error(400, str(e))
+                    continue
+                k = WS_TOP_K if start.top_k is None else start.top_k
+                now = time.perf_counter()
+                if (k and WS_GUESS_INTERVAL_MS > 0 and (now - last_guess) * 1000.0 >= WS_GUESS_INTERVAL_MS
+                        and (guess_task is None or guess_task.done())):
+                    processed = buffer.processed()
+                    if processed is not None:
+                        last_guess = now
+                        guess_task = asyncio.create_task(send_guess(processed, buffer.n_points, k))
+            elif kind == "pen_up":
+                pass
+            elif kind == "end":
+                # Result එකට පසු පැරණි guess එකක් නොයැවීමට
+                if guess_task is not None and not guess_task.done():
+                    guess_task.cancel()
+                t = time.perf_counter()
+                EXPECTED_TOTAL.labels(start.expected_char).inc()
+                INPUT_POINTS.observe(buffer.n_points)
+                processed = buffer.processed()
+                t = observe_stage("preprocess", t)
+                retry = reject(drawing_features(buffer.path, buffer.cum_dist, buffer.n_strokes), start.expected_char)
+                if retry is not None:
+                    await websocket.send_json({"type": "result", "status": "retry", "analysis": retry})
+                elif processed is None:
+                    await send_error(400, "Invalid stroke data.")
+                else:
+                    try:
+                        analysis = await evaluate_sample(processed, start.expected_char, buffer.n_strokes,
+                                                         start.skip_quality_on_mismatch, t)
+                        await websocket.send_json({"type": "result", "status": "success", "analysis": analysis})
+                    except HTTPException as e:
+                        await send_error(e.status_code, e.detail)
+                start = None
+                buffer.reset()
+            else:
+                await send_error(400, f"Unknown message type: {kind!r}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if guess_task is not None and not guess_task.done():
+            guess_task.cancel()
+
+@app.get("/stats")
+async def service_stats():
+    """Batching histograms, cache counters සහ inference queue - tuning සඳහා."""
+    return {"batching": BATCHER.stats(), "cache": CACHE.stats(), "inference": INFERENCE.stats(),
+            "rejection": REJECTION.stats(), "shadow": SHADOW.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint (text exposition format 0.0.4)."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: process එක සහ event loop එක ප්‍රතිචාර දක්වයි."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: assets පූරණය වී warm-up සම්පූර්ණ නම් පමණක් 200."""
+    body = {"ready": READY, "model_version": ACTIVE_MODELS.version if ACTIVE_MODELS else MODEL_VERSION,
+            "model_mode": MODEL_MODE, "recognition": RECOGNITION_MODE, "backend": INFERENCE_BACKEND,
+            "precision": MODEL_PRECISION, "startup_timings_s": STARTUP_TIMINGS}
+    if not READY:
+        body["error"] = STARTUP_ERROR
+        return JSONResponse(status_code=503, content=body)
+    return body
+# =============================================================================
+# 🟢 SECTION 5: MODEL VERSIONS (ADMIN, HW_ADMIN_TOKEN)
+# =============================================================================
+
+def require_admin(request):
+    """HW_ADMIN_TOKEN නොමැති නම් admin API එක නැත (404); වැරදි X-Admin-Token -> 403."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+def model_status():
+    return {
+        "active_version": ACTIVE_MODELS.version if ACTIVE_MODELS else None,
+        "available_versions": discover_versions(MODELS_DIR, MODEL_MODE),
+        "candidate": dict(CANDIDATE_STATE) or None,
+        "shadow": SHADOW.stats(),
+        "cache_version": CACHE.version,
+    }
+
+@app.get("/admin/models")
+async def admin_models(request: Request):
+    """Active / available versions, candidate load state සහ shadow agreement stats."""
+    require_admin(request)
+    return model_status()
+
+@app.post("/admin/models/{version}/load", status_code=202)
+async def admin_load_model(version: int, request: Request, options: ModelLoadRequest = None):
+    """
+    Version එක background එකේ load + warm-up කරයි (serving නොනවතී). Then, per
+    `options`: activate it at once, or keep it as a candidate that shadows
+    `shadow_rate` of live /evaluate samples until POST /admin/models/activate.
+    """
+    global CANDIDATE, CANDIDATE_TASK
+    require_admin(request)
+    require_ready()
+    options = options or ModelLoadRequest()
+    if CANDIDATE_STATE.get("status") == "loading":
+        raise HTTPException(status_code=409, detail=f"Model v{CANDIDATE_STATE['version']} is still loading.")
+    if version == ACTIVE_MODELS.version:
+        raise HTTPException(status_code=409, detail=f"Model v{version} is already active.")
+    if version not in discover_versions(MODELS_DIR, MODEL_MODE):
+        raise HTTPException(status_code=404, detail=f"Model v{version} artifacts not found in {MODELS_DIR}.")
+
+    # පෙර candidate එක (ඇත්නම්) ඉවත් කර නව එක පූරණය
+    SHADOW.stop()
+    CANDIDATE = None
+    CANDIDATE_STATE.clear()
+    CANDIDATE_STATE.update(version=version, status="loading", activate=options.activate,
+                           shadow_rate=options.shadow_rate, error=None, timings={})
+    CANDIDATE_TASK = asyncio.create_task(stage_candidate(version, options.activate, options.shadow_rate))
+    return model_status()
+
+@app.post("/admin/models/activate")
+async def admin_activate_model(request: Request):
+    """Warm candidate එක active කරයි (atomic swap, cache එක නව version එකට)."""
+    require_admin(request)
+    if CANDIDATE is None:
+        raise HTTPException(status_code=409, detail="No warmed candidate to activate (load a version first).")
+    previous = activate_candidate()
+    return dict(model_status(), previous_version=previous)
+
+@app.delete("/admin/models/candidate")
+async def admin_discard_candidate(request: Request):
+    """Candidate එක සහ shadow scoring ඉවත් කරයි (active version එකට බලපෑමක් නැත)."""
+    global CANDIDATE
+    require_admin(request)
+    if CANDIDATE_STATE.get("status") == "loading":
+        raise HTTPException(status_code=409, detail="A load in progress cannot be cancelled; discard it when ready.")
+    SHADOW.stop()
+    CANDIDATE = None
+    CANDIDATE_STATE.clear()
+    return model_status()
+
+def require_prototypes():
+    """kNN recognition ක්‍රියාත්මක නොවේ නම් prototype admin API එක 409."""
+    require_ready()
+    if ACTIVE_MODELS.prototypes is None:
+        raise HTTPException(status_code=409, detail="Prototype labels need HW_RECOGNITION_MODE=knn.")
+    return ACTIVE_MODELS
+
+async def save_prototypes(models):
+    """Index එක disk එකට (thread එකක) සහ පැරණි ප්‍රතිඵල cache එකෙන් ඉවත් කිරීම."""
+    await asyncio.to_thread(models.prototypes.save, index_path(MODELS_DIR, models.version))
+    CACHE.clear()
+
+@app.get("/admin/prototypes")
+async def admin_prototypes(request: Request):
+    """kNN index: labels, exemplars per label."""
+    require_admin(request)
+    models = require_prototypes()
+    return dict(models.prototypes.stats(), model_version=models.version)
+
+@app.post("/admin/prototypes/{label}")
+async def admin_register_prototypes(label: str, registration: PrototypeRegistration, request: Request):
+    """
+    අකුරකට උදාහරණ ඇඳීම් (handwriting_v1 records) -> embeddings -> prototype index.
+    A new label is recognised from the next request on; no retraining.
+    """
+    require_admin(request)
+    models = require_prototypes()
+    if any(sample.get("label") not in (None, label) for sample in registration.samples):
+        raise HTTPException(status_code=400, detail=f"Every sample must be labelled '{label}' (or unlabelled).")
+    try:
+        batch, valid = preprocess_batch([sample.get("strokes", []) for sample in registration.samples])
+    except (AttributeError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid stroke data: {e}")
+    if valid.sum() < PROTOTYPE_MIN_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"{int(valid.sum())} usable drawings, "
+                                                    f"at least {PROTOTYPE_MIN_SAMPLES} are needed.")
+
+    embeddings = await INFERENCE.run(embed, batch[valid], models)
+    strokes = registration.strokes
+    if strokes is None and label not in CHAR_CONFIG:
+        counts = [s.get("stroke_count", len(s.get("strokes", []))) for s, ok in zip(registration.samples, valid) if ok]
+        strokes = int(np.median(counts))
+    new_label = label not in CHAR_CONFIG
+    exemplars = models.prototypes.register(label, embeddings, symbol=registration.symbol if new_label else None,
+                                           strokes=strokes if new_label else None, replace=registration.replace)
+    merge_prototype_meta(models)
+    await save_prototypes(models)
+    print(f"🧩 Prototypes for '{label}': {exemplars} exemplars ({int(valid.sum())} new)")
+    return {"label": label, "index": models.prototypes.labels.index(label), "new_label": new_label,
+            "accepted": int(valid.sum()), "invalid": int(len(valid) - valid.sum()), "exemplars": exemplars,
+            "config": CHAR_CONFIG.get(label)}
+
+@app.delete("/admin/prototypes/{label}")
+async def admin_remove_prototypes(label: str, request: Request):
+    """
+    Label එකේ prototypes ඉවත් කරයි: it is no longer predicted. 409 for the last
+    label with prototypes (an empty index cannot answer /evaluate).
+    """
+    require_admin(request)
+    models = require_prototypes()
+    try:
+        removed = models.prototypes.remove(label)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=f"{e} Register another label before removing it.")
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No prototypes for '{label}'.")
+    await save_prototypes(models)
+    return dict(models.prototypes.stats(), model_version=models.version)
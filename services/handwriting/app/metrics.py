@@ -0,0 +1,149 @@
+"""
+@File: metrics.py
+@Description: Lightweight in-process metric primitives for the Handwriting Engine.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _braces(labels):
+    labels = labels.rstrip(",")
+    return f"{{{labels}}}" if labels else ""
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Buckets are upper bounds (inclusive), an implicit
+    +Inf bucket catches everything above the last bound.
+    """
+
+    prom_type = "histogram"
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Cumulative bucket counts, count and sum (Prometheus semantics)."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, c in zip(self.buckets, counts):
+            running += c
+            cumulative[str(bound)] = running
+        running += counts[-1]
+        cumulative["+Inf"] = running
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+    def render(self, name, labels=""):
+        """Prometheus text lines for this histogram (`labels` like 'stage="char_model",')."""
+        snap = self.snapshot()
+        lines = [f'{name}_bucket{{{labels}le="{le}"}} {count}' for le, count in snap["buckets"].items()]
+        lines.append(f"{name}_sum{_braces(labels)} {snap['sum']}")
+        lines.append(f"{name}_count{_braces(labels)} {snap['count']}")
+        return lines
+
+
+class Counter:
+    prom_type = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labels=""):
+        return [f"{name}{_braces(labels)} {self.value}"]
+
+
+class Gauge(Counter):
+    prom_type = "gauge"
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    @contextmanager
+    def track(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Family:
+    """
+    One label, values fixed at construction (no per-request allocation, bounded
+    cardinality). Unknown values go to `fallback` when it is given.
+    """
+
+    def __init__(self, factory, label, values, fallback=None):
+        self.label = label
+        self.fallback = fallback
+        self.children = {value: factory() for value in values}
+        if fallback is not None:
+            self.children.setdefault(fallback, factory())
+        self.prom_type = next(iter(self.children.values())).prom_type
+
+    def labels(self, value):
+        child = self.children.get(value)
+        return child if child is not None else self.children[self.fallback]
+
+    def render(self, name):
+        lines = []
+        for value, child in self.children.items():
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            lines.extend(child.render(name, f'{self.label}="{escaped}",'))
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, name, help_text, metric):
+        self._metrics.append((name, help_text, metric))
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, help_text, metric in self._metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric.prom_type}")
+            lines.extend(metric.render(name))
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware: stamps `request.state.received_at` before the body is read
+    (so endpoints can time JSON parsing + validation) and tracks in-flight
+    requests per path in `in_flight` (a Gauge Family keyed by path).
+    """
+
+    def __init__(self, app, in_flight):
+        self.app = app
+        self.in_flight = in_flight
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        with self.in_flight.labels(scope["path"]).track():
+            await self.app(scope, receive, send)
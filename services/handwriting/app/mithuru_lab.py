@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import messagebox
 import requests
 import json
+from payload import encode_columnar
 
 class SinhalaMithuruLab:
     def __init__(self, root):
@@ -88,10 +89,10 @@ class SinhalaMithuruLab:
 
         expected = self.char_input.get().strip()
         
-        # දත්ත JSON ව්‍යුහය
+        # දත්ත JSON ව්‍යුහය (Columnar format: canvas ඛණ්ඩාංක පූර්ණ සංඛ්‍යා නිසා int16)
         payload = {
             "expected_char": expected,
-            "strokes": self.strokes
+            "columnar_strokes": encode_columnar(self.strokes, dtype="int16")
         }
 
         try:
@@ -108,17 +109,22 @@ class SinhalaMithuruLab:
                 
                 # --- තරු ගණනය කිරීම (1 - 5) ---
                 # මෙහිදී ප්‍රතිශතය 20න් බෙදා ආසන්නතම පූර්ණ සංඛ්‍යාව ලබා ගනී
-                star_count = max(1, min(5, round(quality / 20)))
-                stars = "⭐" * star_count
+                # (වැරදි අකුරක quality මොඩලය skip කළ විට quality = None)
+                if quality is not None:
+                    star_count = max(1, min(5, round(quality / 20)))
+                    stars = "⭐" * star_count
                 
-                if is_correct:
+                if res.get('retry'):
+                    output = f"🔁 අකුර හඳුනාගත නොහැක ({res['retry_reason']}). නැවත උත්සාහ කරන්න.\n"
+                elif is_correct:
                     output = f"විශිෂ්ටයි! ✅ ඔබ ' {identified} ' අකුර නිවැරදිව ලිව්වා.\n"
                 else:
                     output = f"වැරදියි! ❌ ඔබ ලියා ඇත්තේ ' {identified} ' අකුරයි.\n"
                     output += f"(බලාපොරොත්තු වූයේ: {self.char_input.get()} )\n"
                 
                 # තරු සහ ප්‍රතිශතය එක් කිරීම
-                output += f"✨ ගුණාත්මකභාවය: {quality}% ({stars})\n"
+                if quality is not None:
+                    output += f"✨ ගුණාත්මකභාවය: {quality}% ({stars})\n"
                 
                 self.result_var.set(output)
             else:
@@ -0,0 +1,125 @@
+"""
+@File: payload.py
+@Description: Columnar (binary) stroke payload codec for the Handwriting Engine.
+
+The legacy payload sends every point as a JSON object ({'x','y','dx','dy','p'}),
+so a 5,000 point drawing costs 5,000 dicts to parse and validate. The columnar
+format sends each channel as one base64 little-endian typed array:
+
+    {
+        "dtype":   "float32" | "int16",   # x, y, dx, dy element type
+        "x":       "<base64>",
+        "y":       "<base64>",
+        "dx":      "<base64>",           # optional, zeros if absent
+        "dy":      "<base64>",           # optional, zeros if absent
+        "p":       "<base64 uint8>",     # optional, zeros if absent
+        "offsets": "<base64 int32>"      # stroke boundaries [0, e1, ..., n_points]
+    }
+
+Decoding uses np.frombuffer only; no per-point Python objects are created.
+This module depends on NumPy alone so clients (mithuru_lab.py) can import it.
+"""
+
+import base64
+
+import numpy as np
+
+DTYPES = {"float32": np.dtype("<f4"), "int16": np.dtype("<i2")}
+OFFSET_DTYPE = np.dtype("<i4")
+PEN_DTYPE = np.dtype("u1")
+
+
+def _b64_array(data, dtype):
+    return base64.b64encode(np.ascontiguousarray(data, dtype=dtype).tobytes()).decode("ascii")
+
+
+def _array_b64(text, dtype, name):
+    try:
+        raw = base64.b64decode(text, validate=True)
+    except ValueError as e:
+        raise ValueError(f"'{name}' is not valid base64.") from e
+    if len(raw) % dtype.itemsize:
+        raise ValueError(f"'{name}' length is not a multiple of {dtype.itemsize} bytes.")
+    return np.frombuffer(raw, dtype=dtype)
+
+
+def encode_columnar(strokes, dtype="float32"):
+    """
+    Legacy stroke list (list of lists of point dicts, or [x, y] pairs) -> columnar dict.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'.")
+
+    xs, ys, dxs, dys, ps, offsets = [], [], [], [], [], [0]
+    for stroke in strokes:
+        for point in stroke:
+            if isinstance(point, dict):
+                xs.append(point.get('x', 0)); ys.append(point.get('y', 0))
+                dxs.append(point.get('dx', 0)); dys.append(point.get('dy', 0))
+                ps.append(point.get('p', 0))
+            else:
+                xs.append(point[0]); ys.append(point[1])
+                dxs.append(0); dys.append(0); ps.append(0)
+        offsets.append(len(xs))
+
+    np_dtype = DTYPES[dtype]
+    if np_dtype.kind == "i":
+        as_int = lambda v: np.rint(np.asarray(v, dtype=np.float64))
+        xs, ys, dxs, dys = as_int(xs), as_int(ys), as_int(dxs), as_int(dys)
+
+    return {
+        "dtype": dtype,
+        "x": _b64_array(xs, np_dtype),
+        "y": _b64_array(ys, np_dtype),
+        "dx": _b64_array(dxs, np_dtype),
+        "dy": _b64_array(dys, np_dtype),
+        "p": _b64_array(ps, PEN_DTYPE),
+        "offsets": _b64_array(offsets, OFFSET_DTYPE),
+    }
+
+
+def decode_columnar(dtype, x, y, offsets, dx=None, dy=None, p=None):
+    """
+    Columnar fields -> ((P, 5) float32 path [x, y, dx, dy, p], stroke count).
+    Raises ValueError on malformed input.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'.")
+    np_dtype = DTYPES[dtype]
+
+    xs = _array_b64(x, np_dtype, "x")
+    ys = _array_b64(y, np_dtype, "y")
+    bounds = _array_b64(offsets, OFFSET_DTYPE, "offsets")
+    n_points = len(xs)
+
+    if len(ys) != n_points:
+        raise ValueError("'x' and 'y' must have the same length.")
+    if len(bounds) < 1 or bounds[0] != 0 or bounds[-1] != n_points or np.any(np.diff(bounds) < 0):
+        raise ValueError("'offsets' must be non-decreasing stroke boundaries from 0 to the point count.")
+
+    path = np.zeros((n_points, 5), dtype=np.float32)
+    path[:, 0] = xs
+    path[:, 1] = ys
+
+    # නැති channel එකක් 0: legacy preprocess_data හි p_val.get('dx', 0) මෙන්
+    for column, name, text in ((2, "dx", dx), (3, "dy", dy)):
+        if text is not None:
+            values = _array_b64(text, np_dtype, name)
+            if len(values) != n_points:
+                raise ValueError(f"'{name}' must match the point count.")
+            path[:, column] = values
+
+    if p is not None:
+        ps = _array_b64(p, PEN_DTYPE, "p")
+        if len(ps) != n_points:
+            raise ValueError("'p' must match the point count.")
+        path[:, 4] = ps
+
+    return path, len(bounds) - 1
+
+
+def decode_columnar_strokes(**fields):
+    """Columnar fields -> list of per-stroke (P_i, 5) float32 paths (decode_columnar split at the offsets)."""
+    path, _ = decode_columnar(**fields)
+    bounds = _array_b64(fields["offsets"], OFFSET_DTYPE, "offsets")
+    return [path[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
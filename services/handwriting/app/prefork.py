@@ -0,0 +1,145 @@
+"""
+@File: prefork.py
+@Description: Pre-fork serving mode: import once, fork uvicorn workers with explicit CPU budgets.
+
+`uvicorn --workers N` spawns N fresh interpreters that each import TensorFlow
+and Keras from scratch and size TensorFlow's thread pools to every core, so
+N workers run N x cores threads. Here the master imports TensorFlow, Keras
+and the app once, freezes the GC (so collections in the workers do not touch,
+and copy, the inherited objects), binds the listening socket and forks N
+workers that serve from it; the imported modules are shared copy-on-write.
+
+The models themselves are loaded by each worker after the fork (lifespan
+handler): TensorFlow's runtime is not fork-safe, a worker forked after the
+master has run a TF op hangs on its first inference. The weights are small
+(< 1 MB per model); the shared part that matters is the imported runtime.
+
+Each worker sets its intra-op / inter-op thread counts before its first TF
+op, and with --pin-cpus is pinned to its own slice of cores (intra-op threads
+default to the slice size), so N workers never oversubscribe the machine.
+
+    python -m app.prefork --workers 4 --port 8000 --pin-cpus
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+
+def core_slices(workers, cpus=None):
+    """Available cores -> one contiguous slice per worker (slices repeat when workers > cores)."""
+    cpus = sorted(cpus if cpus is not None else os.sched_getaffinity(0))
+    per_worker = max(1, len(cpus) // workers)
+    slices = []
+    for i in range(workers):
+        start = (i * per_worker) % len(cpus)
+        slices.append(cpus[start:start + per_worker])
+    return slices
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index, sock, cores, intra_op, inter_op, log_level):
+    import uvicorn
+
+    from . import main as service
+
+    if cores:
+        os.sched_setaffinity(0, cores)
+    service.configure_tf_threads(intra_op, inter_op)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    print(f"👷 Worker {index} (pid {os.getpid()}) cores={cores or 'all'} "
+          f"intra_op={intra_op} inter_op={inter_op}", flush=True)
+
+    config = uvicorn.Config(service.app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker server for the handwriting engine.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("HW_PREFORK_WORKERS", "2")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pin-cpus", action="store_true", default=os.getenv("HW_PREFORK_PIN_CPUS", "0") == "1")
+    parser.add_argument("--intra-op-threads", type=int, help="default: cores per worker")
+    parser.add_argument("--inter-op-threads", type=int, default=1)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    slices = core_slices(args.workers)
+    intra = args.intra_op_threads or len(slices[0])
+
+    # TensorFlow / Keras / app import එක master එකේ පමණයි (TF op කිසිවක් ධාවනය නොකර)
+    from . import main as service  # noqa: F401
+
+    print(f"🚀 Pre-fork master (pid {os.getpid()}): {args.workers} workers, "
+          f"intra_op={intra}, inter_op={args.inter_op_threads}, pin_cpus={args.pin_cpus}", flush=True)
+
+    sock = bind_socket(args.host, args.port)
+    gc.collect()
+    gc.freeze()
+
+    workers, stopping = {}, False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(index, sock, slices[index] if args.pin_cpus else None,
+                           intra, args.inter_op_threads, args.log_level)
+            except BaseException as e:  # worker එකේ දෝෂයක් master එකට නොපැමිණිය යුතුය
+                print(f"❌ Worker {index} crashed: {e}", flush=True)
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for i in range(args.workers):
+        spawn(i)
+
+    # Supervisor: අනපේක්ෂිතව නතර වූ worker නැවත fork කිරීම
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = workers.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}; restarting.", flush=True)
+            time.sleep(1)
+            spawn(index)
+
+    sock.close()
+    print("👋 Pre-fork master stopped.", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+@File: prototypes.py
+@Description: Nearest-prototype character recognition on Model A embeddings (HW_RECOGNITION_MODE=knn).
+
+Model A's softmax only knows the labels it was trained on. In kNN mode the
+classification layer is dropped: a drawing is embedded with the layer that
+feeds it (the penultimate layer, 128-d for v1) and compared with stored
+prototypes of every label, so a new letter only needs a few dozen example
+drawings (POST /admin/prototypes/{label}), not a retraining cycle.
+
+Per label the index keeps the L2-normalised exemplar embeddings and their
+normalised mean (the centroid). All of them are stacked in one matrix, so a
+batch is scored with a single matrix multiply:
+
+    sims  = normalise(embeddings) @ [centroids; exemplars].T         (N, L + M)
+    score = CENTROID_WEIGHT * centroid sim + (1 - CENTROID_WEIGHT) * best exemplar sim
+
+CENTROID_WEIGHT and the exemplar cap trade robustness (centroids) against
+letters written in several distinct ways (exemplars); tune them on a real
+collection with `eval` (HW_PROTOTYPE_CENTROID_WEIGHT, HW_PROTOTYPE_MAX_EXEMPLARS).
+
+The index belongs to one model version (`prototypes_vN.npz` next to the
+model): embeddings of another version are not comparable. Build it from a
+handwriting_v1 collection and check it against the softmax classifier with:
+
+    python -m app.prototypes build --dataset /data/handwriting_v1/json
+    python -m app.prototypes eval --dataset /data/handwriting_v1/json --holdout 0.2
+"""
+
+import os
+import sys
+import json
+import argparse
+import threading
+
+import numpy as np
+
+CENTROID_WEIGHT = 0.5
+# Guess "probabilities" (/ws/evaluate): softmax over scores * GUESS_TEMPERATURE
+GUESS_TEMPERATURE = 20.0
+
+
+def index_path(models_dir, version):
+    return os.path.join(models_dir, f"prototypes_v{version}.npz")
+
+
+def embedding_model(char_model):
+    """Model A up to the input of its classification layer (the penultimate-layer embedding)."""
+    import keras
+
+    return keras.Model(char_model.inputs, char_model.layers[-1].input, name="char_embedding")
+
+
+def read_collection(json_dir):
+    """handwriting_v1 collection tool JSON files ({filename, label, stroke_count, strokes}) -> list of dicts."""
+    records = []
+    for name in sorted(os.listdir(json_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(json_dir, name), "r", encoding="utf-8") as f:
+            records.append(json.load(f))
+    return records
+
+
+def _normalise(x):
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+class PrototypeIndex:
+    """
+    Labels are append-only: run_models returns indices into `labels`, so an
+    index never changes meaning. Removing a label only drops its prototypes.
+    Readers use an immutable snapshot that `_rebuild` replaces in one assignment.
+    """
+
+    def __init__(self, dim, max_exemplars=64, centroid_weight=CENTROID_WEIGHT):
+        self.dim = int(dim)
+        self.max_exemplars = int(max_exemplars)
+        self.centroid_weight = float(centroid_weight)
+        self.labels = []
+        self.meta = {}          # label -> {"symbol", "strokes"} for labels outside config.json
+        self._exemplars = {}    # label -> (n, dim) normalised embeddings
+        self._lock = threading.Lock()
+        self._rebuild()
+
+    def _rebuild(self):
+        active = [i for i, label in enumerate(self.labels) if len(self._exemplars.get(label, ()))]
+        blocks = [self._exemplars[self.labels[i]] for i in active]
+        counts = np.array([len(b) for b in blocks], dtype=np.int64)
+        centroids = _normalise(np.stack([b.mean(axis=0) for b in blocks])) if blocks else np.zeros((0, self.dim))
+        exemplars = np.concatenate(blocks) if blocks else np.zeros((0, self.dim), dtype=np.float32)
+        matrix = np.ascontiguousarray(np.concatenate([centroids, exemplars]).T, dtype=np.float32)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]) if len(counts) else counts
+        self._snapshot = (matrix, starts, np.array(active, dtype=np.int64), len(self.labels))
+
+    @property
+    def active_labels(self):
+        return [self.labels[i] for i in self._snapshot[2]]
+
+    def scores(self, embeddings):
+        """(N, dim) embeddings -> (N, labels) scores; labels without prototypes get -inf."""
+        matrix, starts, active, n_labels = self._snapshot
+        x = _normalise(embeddings)
+        out = np.full((len(x), n_labels), -np.inf, dtype=np.float32)
+        if not len(active):
+            return out
+        sims = x @ matrix
+        k = len(active)
+        nearest = np.maximum.reduceat(sims[:, k:], starts, axis=1)
+        out[:, active] = self.centroid_weight * sims[:, :k] + (1.0 - self.centroid_weight) * nearest
+        return out
+
+    def classify(self, embeddings):
+        """(N, dim) -> (N,) label indices (into `labels`). Raises RuntimeError on an empty index."""
+        if not len(self._snapshot[2]):
+            raise RuntimeError("The prototype index has no labels.")
+        return np.argmax(self.scores(embeddings), axis=1)
+
+    def probabilities(self, embeddings):
+        """Softmax over GUESS_TEMPERATURE * scores, for the /ws/evaluate top-k guesses."""
+        z = self.scores(embeddings) * GUESS_TEMPERATURE
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def register(self, label, embeddings, symbol=None, strokes=None, replace=False):
+        """
+        Label එකකට exemplars එක් කරයි (new labels are appended). Keeps the newest
+        max_exemplars per label. Returns the label's exemplar count.
+        """
+        embeddings = _normalise(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected (n, {self.dim}) embeddings, got {embeddings.shape}.")
+        with self._lock:
+            if label not in self.labels:
+                self.labels.append(label)
+            previous = self._exemplars.get(label)
+            if previous is not None and not replace:
+                embeddings = np.concatenate([previous, embeddings])
+            self._exemplars[label] = embeddings[-self.max_exemplars:]
+            if symbol is not None or strokes is not None:
+                meta = self.meta.setdefault(label, {})
+                if symbol is not None:
+                    meta["symbol"] = symbol
+                if strokes is not None:
+                    meta["strokes"] = int(strokes)
+            self._rebuild()
+            return len(self._exemplars[label])
+
+    def remove(self, label):
+        """
+        Drops a label's prototypes (its index stays reserved). Returns False if it had none;
+        raises ValueError instead of removing the last label (classify would have nothing to return).
+        """
+        with self._lock:
+            if label not in self._exemplars:
+                return False
+            if len(self._exemplars) == 1:
+                raise ValueError(f"'{label}' is the last label with prototypes.")
+            del self._exemplars[label]
+            self._rebuild()
+            return True
+
+    def save(self, path):
+        """Atomic write (tmp file + rename) of labels, metadata and exemplars."""
+        with self._lock:
+            labels = [label for label in self.labels if label in self._exemplars]
+            blocks = [self._exemplars[label] for label in labels]
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, labels=json.dumps(self.labels, ensure_ascii=False),
+                     meta=json.dumps(self.meta, ensure_ascii=False),
+                     exemplar_labels=json.dumps(labels, ensure_ascii=False),
+                     counts=np.array([len(b) for b in blocks], dtype=np.int64),
+                     exemplars=np.concatenate(blocks) if blocks else np.zeros((0, self.dim), dtype=np.float32),
+                     dim=self.dim)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, max_exemplars=64, centroid_weight=CENTROID_WEIGHT):
+        with np.load(path) as data:
+            index = cls(int(data["dim"]), max_exemplars=max_exemplars, centroid_weight=centroid_weight)
+            index.labels = json.loads(str(data["labels"]))
+            index.meta = json.loads(str(data["meta"]))
+            offsets = np.concatenate([[0], np.cumsum(data["counts"])])
+            exemplars = data["exemplars"].astype(np.float32)
+            for i, label in enumerate(json.loads(str(data["exemplar_labels"]))):
+                index._exemplars[label] = exemplars[offsets[i]:offsets[i + 1]][-index.max_exemplars:]
+        index._rebuild()
+        return index
+
+    def stats(self):
+        with self._lock:
+            return {
+                "dim": self.dim,
+                "labels": len(self.labels),
+                "active_labels": len(self._snapshot[2]),
+                "exemplars": {label: len(self._exemplars[label]) for label in self.labels if label in self._exemplars},
+                "max_exemplars": self.max_exemplars,
+                "centroid_weight": self.centroid_weight,
+            }
+
+
+# =============================================================================
+# 🟢 BUILD / EVAL (offline)
+# =============================================================================
+
+def embed_collection(service, records, batch_size=256):
+    """Collection records -> (labels, preprocessed (N, 150, 5), (N, dim) embeddings) of the valid drawings."""
+    from .utils import preprocess_batch
+
+    batch, valid = preprocess_batch([r.get("strokes", []) for r in records])
+    batch = batch[valid]
+    if not len(batch):
+        raise ValueError("No usable drawings in the collection.")
+    embeddings = np.concatenate([service.embed(batch[i:i + batch_size]) for i in range(0, len(batch), batch_size)])
+    return [r.get("label") for r, ok in zip(records, valid) if ok], batch, embeddings
+
+
+def build_index(labels, embeddings, max_exemplars, centroid_weight=CENTROID_WEIGHT):
+    index = PrototypeIndex(embeddings.shape[1], max_exemplars=max_exemplars, centroid_weight=centroid_weight)
+    labels = np.asarray(labels)
+    for label in dict.fromkeys(labels.tolist()):
+        index.register(label, embeddings[labels == label])
+    return index
+
+
+def main(argv=None):
+    from . import main as service
+
+    parser = argparse.ArgumentParser(description="Build / evaluate the kNN prototype index of Model A embeddings.")
+    parser.add_argument("command", choices=("build", "eval"))
+    parser.add_argument("--dataset", required=True, help="directory of handwriting_v1 JSON drawings")
+    parser.add_argument("--output", help="index file (default: models/prototypes_v<HW_MODEL_VERSION>.npz)")
+    parser.add_argument("--max-exemplars", type=int, default=64)
+    parser.add_argument("--centroid-weight", type=float, default=CENTROID_WEIGHT,
+                        help="eval: weight of the centroid vs the nearest exemplar (HW_PROTOTYPE_CENTROID_WEIGHT)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="eval: share of each label held out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    service.load_assets("separate", "compiled", recognition="softmax")
+    labels, batch, embeddings = embed_collection(service, read_collection(args.dataset))
+
+    if args.command == "build":
+        index = build_index(labels, embeddings, args.max_exemplars)
+        output = args.output or index_path(service.MODELS_DIR, service.MODEL_VERSION)
+        index.save(output)
+        print(json.dumps({"output": output, **index.stats()}, ensure_ascii=False, indent=2))
+        return 0
+
+    # eval: per label holdout, kNN on the remaining drawings vs Model A's own softmax
+    rng = np.random.default_rng(args.seed)
+    labels = np.array(labels)
+    test = np.zeros(len(labels), dtype=bool)
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        if len(rows) > 1:
+            test[rng.choice(rows, size=max(1, int(round(len(rows) * args.holdout))), replace=False)] = True
+    if not test.any():
+        print("❌ Every label needs at least two drawings for eval.")
+        return 1
+    index = build_index(labels[~test], embeddings[~test], args.max_exemplars, args.centroid_weight)
+    knn = np.array(index.labels)[index.classify(embeddings[test])]
+    softmax = np.array([service.DYNAMIC_CLASSES[i] for i, _ in service.run_models(batch[test])])
+    print(json.dumps({
+        "train": int((~test).sum()),
+        "test": int(test.sum()),
+        "labels": len(index.labels),
+        "knn_accuracy": round(float(np.mean(knn == labels[test])), 4),
+        "softmax_accuracy": round(float(np.mean(softmax == labels[test])), 4),
+        "knn_softmax_agreement": round(float(np.mean(knn == softmax)), 4),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
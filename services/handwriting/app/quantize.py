@@ -0,0 +1,175 @@
+"""
+@File: quantize.py
+@Description: Reduced-precision (float16 / int8) TFLite variants of the handwriting models.
+
+Converts Model A (character) and Model B (quality) to TFLite at each requested
+precision, then runs every variant over a held-out stroke set and compares it
+with the float32 Keras model:
+
+    top1_agreement      - share of samples where the variant's argmax == float32 argmax
+    mean_quality_drift  - mean |quality_variant - quality_float32|
+    latency / throughput per variant (batch 1, CPU)
+
+A variant is only published (moved to `<name>_<precision>.tflite` next to the
+.keras file) when it meets both thresholds; otherwise the new artifact and any
+previously published one are deleted (HW_MODEL_PRECISION=<precision> then
+fails at startup instead of serving a variant that no longer passes) and the
+command exits non-zero.
+
+    python -m app.quantize --precisions fp16,int8 --dataset /data/handwriting_v1/json
+    HW_INFERENCE_BACKEND=tflite HW_MODEL_PRECISION=int8 uvicorn app.main:app
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from .backends import (CompiledCallBackend, KerasPredictBackend, TFLiteBackend,
+                       export_tflite, synthetic_fixtures, tflite_path)
+
+
+def load_dataset(json_dir, limit=None):
+    """
+    handwriting_v1 collection tool JSON files ({filename, label, stroke_count, strokes})
+    -> preprocessed (N, 150, 5) float32 samples.
+    """
+    from .prototypes import read_collection
+    from .utils import preprocess_batch
+
+    batch, valid = preprocess_batch([record.get("strokes", []) for record in read_collection(json_dir)])
+    samples = batch[valid][:limit] if limit else batch[valid]
+    if not len(samples):
+        raise ValueError(f"No usable drawings in {json_dir}")
+    return samples
+
+
+def measure(backend, x, repeats=1):
+    """Batch 1 latency (p50/p95 ms) and samples/s of `backend` over `x`."""
+    backend(x[:1])  # warm-up
+    latencies, outputs = [], []
+    for _ in range(repeats):
+        outputs = []
+        for i in range(len(x)):
+            t0 = time.perf_counter()
+            outputs.append(backend(x[i:i + 1]))
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+    total_s = sum(latencies) / 1000.0
+    return np.concatenate(outputs), {
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "throughput_per_s": round(len(latencies) / total_s, 1),
+    }
+
+
+def evaluate_variant(char_backend, qual_backend, char_input, qual_input, char_ref, qual_ref):
+    char_out, char_timing = measure(char_backend, char_input)
+    qual_out, qual_timing = measure(qual_backend, qual_input)
+    drift = np.abs(qual_out.reshape(-1) - qual_ref.reshape(-1))
+    return {
+        "top1_agreement": round(float(np.mean(np.argmax(char_out, axis=1) == np.argmax(char_ref, axis=1))), 4),
+        "mean_quality_drift": float(np.mean(drift)),
+        "max_quality_drift": float(np.max(drift)),
+        "char": char_timing,
+        "qual": qual_timing,
+    }
+
+
+def publish(staged, passed):
+    """
+    {final path: staged .tmp path} -> move the staged files into place when the variant
+    `passed`; otherwise delete them and any stale published file. Returns the removed finals.
+    """
+    removed = []
+    for final, tmp in staged.items():
+        if passed:
+            os.replace(tmp, final)
+            continue
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        if os.path.exists(final):
+            os.remove(final)
+            removed.append(final)
+    return removed
+
+
+def main(argv=None):
+    from . import main as service
+
+    parser = argparse.ArgumentParser(description="Build and gate reduced-precision TFLite handwriting models.")
+    parser.add_argument("--precisions", default="fp16,int8", help="comma separated: fp32,fp16,int8")
+    parser.add_argument("--dataset", help="directory of handwriting_v1 JSON drawings (held-out set)")
+    parser.add_argument("--fixtures", help=".npy file of preprocessed (N,150,5) samples")
+    parser.add_argument("--limit", type=int, default=512, help="max held-out samples")
+    parser.add_argument("--min-top1-agreement", type=float, default=0.99)
+    parser.add_argument("--max-mean-quality-drift", type=float, default=0.01)
+    parser.add_argument("--report", help="write the JSON report here as well")
+    args = parser.parse_args(argv)
+    service.load_assets("separate", "predict")
+
+    if args.dataset:
+        held_out = load_dataset(args.dataset, args.limit)
+    elif args.fixtures:
+        held_out = np.load(args.fixtures)[:args.limit].astype("float32")
+    else:
+        print("⚠️ No --dataset given: using synthetic fixtures (agreement numbers are indicative only).")
+        held_out = synthetic_fixtures(n=min(args.limit, 256))
+
+    flat = held_out.reshape(-1, 5)
+    char_input = service.CHAR_SCALER.transform(flat).reshape(held_out.shape).astype("float32")
+    qual_input = service.QUAL_SCALER.transform(flat).reshape(held_out.shape).astype("float32")
+    char_ref = KerasPredictBackend(service.CHAR_MODEL)(char_input)
+    qual_ref = KerasPredictBackend(service.QUAL_MODEL)(qual_input)
+
+    # Float32 baseline (the service's default compiled backend)
+    report = {"samples": int(len(held_out)), "variants": {}}
+    report["variants"]["keras_fp32"] = evaluate_variant(
+        CompiledCallBackend(service.CHAR_MODEL), CompiledCallBackend(service.QUAL_MODEL),
+        char_input, qual_input, char_ref, qual_ref)
+
+    models = {service.CHAR_MODEL_PATH: service.CHAR_MODEL, service.QUAL_MODEL_PATH: service.QUAL_MODEL}
+    ok = True
+    for precision in args.precisions.split(","):
+        # Gate එක සමත් වන තෙක් `.tmp` නමින් - serving path එකට නොපෙනේ
+        staged = {tflite_path(path, precision): tflite_path(path, precision) + ".tmp" for path in models}
+        row = {"passed": False}
+        try:
+            for model, tmp in zip(models.values(), staged.values()):
+                export_tflite(model, tmp, precision)
+
+            char_tmp, qual_tmp = staged.values()
+            row = evaluate_variant(TFLiteBackend(None, None, path=char_tmp), TFLiteBackend(None, None, path=qual_tmp),
+                                   char_input, qual_input, char_ref, qual_ref)
+            row["size_bytes"] = {os.path.basename(f): os.path.getsize(t) for f, t in staged.items()}
+            row["passed"] = (row["top1_agreement"] >= args.min_top1_agreement
+                             and row["mean_quality_drift"] <= args.max_mean_quality_drift)
+        except Exception as e:
+            # එක් precision එකක් අසාර්ථක වීම අනෙක්වා සහ report එක නවත්වන්නේ නැත
+            row = {"passed": False, "error": str(e)}
+        finally:
+            removed = publish(staged, row["passed"])
+        if removed:
+            row["unpublished"] = [os.path.basename(f) for f in removed]
+            print(f"🗑️ Removed stale {precision} artifacts: {', '.join(row['unpublished'])}")
+        ok = ok and row["passed"]
+        report["variants"][f"tflite_{precision}"] = row
+        if "error" in row:
+            print(f"❌ Failed {precision}: {row['error']}")
+        else:
+            print(f"{'✅ Published' if row['passed'] else '❌ Rejected'} {precision}: "
+                  f"top1_agreement={row['top1_agreement']:.4f} mean_quality_drift={row['mean_quality_drift']:.2e}")
+
+    report["thresholds"] = {"min_top1_agreement": args.min_top1_agreement,
+                            "max_mean_quality_drift": args.max_mean_quality_drift}
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+@File: rejection.py
+@Description: Cheap rule cascade in front of the models for clearly invalid drawings.
+
+Young children often submit a dot, a tap, a single straight line or a dense
+scribble. The rules below use only what preprocessing already has (the raw
+path, its cumulative arc-length and the stroke count) and run in
+microseconds. The first rule that fires returns a "retry" answer (`status:
+"retry"`, not a scored attempt) without touching the models; everything else
+goes to Model A / Model B as before.
+
+    rule              fires when                                              HW_ env var (0 disables)
+    min_points        raw points < N                                          HW_REJECT_MIN_POINTS
+    min_arc_length    total ink length < N px (dot, tap)                      HW_REJECT_MIN_ARC_PX
+    min_extent        larger bbox side < N px                                 HW_REJECT_MIN_EXTENT_PX
+    max_aspect        bbox long side / short side > N (a straight line)       HW_REJECT_MAX_ASPECT
+    max_ink_ratio     arc length / (bbox width + height) > N (scribble)       HW_REJECT_MAX_INK_RATIO
+    max_stroke_delta  |strokes - config.json strokes| > N                     HW_REJECT_MAX_STROKE_DELTA
+
+Only min_points is on by default (fewer than 8 points cannot be resampled
+meaningfully). The other rules ship disabled until their thresholds are
+tuned on real submissions; suggested starting points are min_arc_length 25,
+min_extent 15, max_aspect 25, max_ink_ratio 20 and max_stroke_delta 3. Watch
+/stats `rejection` (hits per rule) after enabling one.
+"""
+
+import os
+
+import numpy as np
+
+from .utils import arc_length
+
+RULES = ("min_points", "min_arc_length", "min_extent", "max_aspect", "max_ink_ratio", "max_stroke_delta")
+
+
+def drawing_features(path, cum_dist, n_strokes):
+    """Raw (P, 5) path + its cumulative arc-length (utils.arc_length) -> feature dict."""
+    if len(path) == 0:
+        return {"n_points": 0, "n_strokes": n_strokes, "arc_length": 0.0, "width": 0.0, "height": 0.0}
+    return {
+        "n_points": len(path),
+        "n_strokes": n_strokes,
+        "arc_length": float(cum_dist[-1]),
+        "width": float(path[:, 0].max() - path[:, 0].min()),
+        "height": float(path[:, 1].max() - path[:, 1].min()),
+    }
+
+
+def path_features(path, n_strokes):
+    """Raw (P, 5) path -> feature dict, arc-length computed here (/evaluate_batch, /evaluate_word)."""
+    cum_dist = arc_length(path) if len(path) else np.zeros(0, dtype="float32")
+    return drawing_features(path, cum_dist, n_strokes)
+
+
+class RejectionCascade:
+    def __init__(self, min_points=8, min_arc_length=0.0, min_extent=0.0, max_aspect=0.0,
+                 max_ink_ratio=0.0, max_stroke_delta=0):
+        self.thresholds = {
+            "min_points": min_points, "min_arc_length": min_arc_length, "min_extent": min_extent,
+            "max_aspect": max_aspect, "max_ink_ratio": max_ink_ratio, "max_stroke_delta": max_stroke_delta,
+        }
+        # අඩුම වියදම් rules පළමුව; threshold 0 = rule එක අක්‍රියයි
+        checks = {
+            "min_points": lambda f, t, e: f["n_points"] < t,
+            "min_arc_length": lambda f, t, e: f["arc_length"] < t,
+            "min_extent": lambda f, t, e: max(f["width"], f["height"]) < t,
+            "max_aspect": lambda f, t, e: max(f["width"], f["height"]) > t * max(min(f["width"], f["height"]), 1.0),
+            "max_ink_ratio": lambda f, t, e: f["arc_length"] > t * max(f["width"] + f["height"], 1.0),
+            "max_stroke_delta": lambda f, t, e: e is not None and abs(f["n_strokes"] - e) > t,
+        }
+        self._rules = [(name, self.thresholds[name], checks[name]) for name in RULES if self.thresholds[name]]
+        self.checked = 0
+        self.hits = {name: 0 for name in RULES}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            min_points=int(os.getenv("HW_REJECT_MIN_POINTS", "8")),
+            min_arc_length=float(os.getenv("HW_REJECT_MIN_ARC_PX", "0")),
+            min_extent=float(os.getenv("HW_REJECT_MIN_EXTENT_PX", "0")),
+            max_aspect=float(os.getenv("HW_REJECT_MAX_ASPECT", "0")),
+            max_ink_ratio=float(os.getenv("HW_REJECT_MAX_INK_RATIO", "0")),
+            max_stroke_delta=int(os.getenv("HW_REJECT_MAX_STROKE_DELTA", "0")),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self._rules)
+
+    def check(self, features, expected_strokes=None):
+        """Returns the name of the first rule that fires, or None (send to the models)."""
+        self.checked += 1
+        for name, threshold, fails in self._rules:
+            if fails(features, threshold, expected_strokes):
+                self.hits[name] += 1
+                return name
+        return None
+
+    def stats(self):
+        rejected = sum(self.hits.values())
+        return {
+            "thresholds": self.thresholds,
+            "checked": self.checked,
+            "rejected": rejected,
+            "rejected_ratio": round(rejected / self.checked, 4) if self.checked else 0.0,
+            "hits": dict(self.hits),
+        }
@@ -0,0 +1,85 @@
+"""
+@File: schemas.py
+@Description: Request schemas for the Handwriting Engine API.
+"""
+
+from typing import Literal, Optional, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ColumnarStrokes(BaseModel):
+    """Binary stroke payload (see payload.py for the wire format)."""
+    dtype: Literal["float32", "int16"] = "float32"
+    x: str
+    y: str
+    offsets: str
+    dx: Optional[str] = None
+    dy: Optional[str] = None
+    p: Optional[str] = None
+
+
+def require_one_stroke_format(submission):
+    """Exactly one of `strokes` / `columnar_strokes` (an empty `strokes` list still counts as sent)."""
+    has_strokes = "strokes" in submission.model_fields_set
+    if has_strokes == (submission.columnar_strokes is not None):
+        raise ValueError("Send exactly one of 'strokes' or 'columnar_strokes'.")
+    return submission
+
+
+class LevelSubmission(BaseModel):
+    expected_char: str
+    # Legacy format: list of strokes, each a list of {'x','y','dx','dy','p'} dicts
+    strokes: list = []
+    # Columnar format: flat typed arrays, decoded without per-point objects
+    columnar_strokes: Optional[ColumnarStrokes] = None
+    # /evaluate: skip Model B when the letter is wrong (None = HW_SKIP_QUALITY_ON_MISMATCH)
+    skip_quality_on_mismatch: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _one_stroke_format(self):
+        return require_one_stroke_format(self)
+
+
+class WordSubmission(BaseModel):
+    """/evaluate_word: every stroke of a written word + the expected character labels in order."""
+    expected_chars: list[str] = Field(min_length=1)
+    strokes: list = []
+    columnar_strokes: Optional[ColumnarStrokes] = None
+    skip_quality_on_mismatch: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _one_stroke_format(self):
+        return require_one_stroke_format(self)
+
+
+class BatchItem(LevelSubmission):
+    """/evaluate_batch item: a LevelSubmission with a caller-supplied id."""
+    id: Union[int, str]
+
+
+class StreamStart(BaseModel):
+    """/ws/evaluate `start` message: the letter being drawn and per-session options."""
+    expected_char: str
+    skip_quality_on_mismatch: Optional[bool] = None
+    # Speculative guesses while drawing: top-k labels (0 = no guesses, None = HW_WS_TOP_K)
+    top_k: Optional[int] = Field(default=None, ge=0)
+
+
+class ModelLoadRequest(BaseModel):
+    """POST /admin/models/{version}/load options."""
+    # Swap the version in as soon as it is warm (otherwise: POST /admin/models/activate)
+    activate: bool = False
+    # Fraction of live /evaluate samples also scored by the waiting candidate (ignored with activate)
+    shadow_rate: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class PrototypeRegistration(BaseModel):
+    """POST /admin/prototypes/{label}: example drawings of one letter (HW_RECOGNITION_MODE=knn)."""
+    # handwriting_v1 collection records ({filename, label, stroke_count, strokes}) or {"strokes": [...]}
+    samples: list[dict] = Field(min_length=1)
+    # New labels: Sinhala symbol and stroke count (default: the label / the samples' median)
+    symbol: Optional[str] = None
+    strokes: Optional[int] = Field(default=None, ge=1)
+    # Replace the label's exemplars instead of adding to them
+    replace: bool = False
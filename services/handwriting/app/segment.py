@@ -0,0 +1,83 @@
+"""
+@File: segment.py
+@Description: Splits the strokes of a handwritten word into per-character groups (/evaluate_word).
+
+Strokes are assumed to be written character by character, left to right, so
+every character is a contiguous run of strokes. Among all ways of cutting
+the stroke sequence into one run per expected character, segment_word picks
+the cheapest:
+
+    cost = COUNT_WEIGHT * sum_k |strokes in run k - config.json strokes of char k|
+         - GAP_WEIGHT   * sum_cuts clip(gap / word height, -1, 1)
+
+where the gap at a cut before stroke j is its left edge minus the right-most
+edge of everything drawn before it (a new character starts to the right of
+the previous ones; a second stroke of the same letter usually overlaps it).
+Exact dynamic programming, O(K * S^2) for K characters and S strokes.
+"""
+
+import numpy as np
+
+COUNT_WEIGHT = 1.0
+GAP_WEIGHT = 0.75
+
+
+def stroke_gaps(strokes):
+    """(S,) gap before each stroke, normalised by the word height (gap[0] is unused)."""
+    mins = np.array([s[:, 0].min() for s in strokes])
+    maxs = np.array([s[:, 0].max() for s in strokes])
+    ys = np.concatenate([s[:, 1] for s in strokes])
+    height = max(float(ys.max() - ys.min()), 1.0)
+    reach = np.maximum.accumulate(maxs)
+    gaps = np.zeros(len(strokes))
+    gaps[1:] = (mins[1:] - reach[:-1]) / height
+    return np.clip(gaps, -1.0, 1.0)
+
+
+def segment_word(strokes, expected_counts):
+    """
+    Strokes ((P_i, 5) arrays, drawing order) + expected stroke count per character
+    -> list of (start, end) stroke index ranges, one non-empty run per character.
+    Raises ValueError when there are fewer strokes than characters.
+    """
+    n_strokes, n_chars = len(strokes), len(expected_counts)
+    if n_strokes < n_chars:
+        raise ValueError(f"The word has {n_strokes} strokes but {n_chars} characters are expected.")
+
+    gaps = stroke_gaps(strokes)
+    # best[k, j]: k අකුරු සඳහා පළමු j strokes භාවිතා කළ විට අවම cost
+    best = np.full((n_chars + 1, n_strokes + 1), np.inf)
+    back = np.zeros((n_chars + 1, n_strokes + 1), dtype=int)
+    best[0, 0] = 0.0
+    for k in range(1, n_chars + 1):
+        expected = expected_counts[k - 1]
+        # k-th run ends at j; earlier runs leave room for one stroke per remaining character
+        for j in range(k, n_strokes - (n_chars - k) + 1):
+            for i in range(k - 1, j):
+                if not np.isfinite(best[k - 1, i]):
+                    continue
+                cost = best[k - 1, i] + COUNT_WEIGHT * abs((j - i) - expected)
+                if i > 0:
+                    cost -= GAP_WEIGHT * gaps[i]
+                if cost < best[k, j]:
+                    best[k, j], back[k, j] = cost, i
+
+    runs, j = [], n_strokes
+    for k in range(n_chars, 0, -1):
+        i = int(back[k, j])
+        runs.append((i, j))
+        j = i
+    return runs[::-1]
+
+
+def recentre(path, canvas_size=600):
+    """
+    Character segment එක canvas මධ්‍යයට ගෙන යයි (bounding box centre -> canvas centre):
+    the models were trained on single letters drawn on their own canvas.
+    dx / dy are relative and stay as they are.
+    """
+    path = path.copy()
+    for axis in (0, 1):
+        centre = (path[:, axis].min() + path[:, axis].max()) / 2
+        path[:, axis] += np.float32(canvas_size / 2 - centre)
+    return path
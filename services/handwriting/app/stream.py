@@ -0,0 +1,84 @@
+"""
+@File: stream.py
+@Description: Incremental stroke buffer behind the /ws/evaluate WebSocket.
+
+The client streams points while the child draws. Each batch of points is
+appended to a growing float32 [x, y, dx, dy, p] buffer and the cumulative
+arc-length is extended at the same time, with the same float32 operations as
+`preprocess_path` (utils.py), so the result is bit-for-bit identical to
+preprocessing the whole drawing at the end. At pen-up only the final
+150-point interpolation (`resample_path`) is left to do.
+"""
+
+import numpy as np
+
+from .utils import resample_path
+
+
+class StrokeBuffer:
+    def __init__(self, max_points=20000, capacity=256):
+        self.max_points = int(max_points)
+        self._path = np.empty((capacity, 5), dtype="float32")
+        self._cum = np.empty(capacity, dtype="float32")
+        self.n_points = 0
+        self.n_strokes = 0
+
+    def reset(self):
+        self.n_points = 0
+        self.n_strokes = 0
+
+    def start_stroke(self):
+        self.n_strokes += 1
+
+    def _reserve(self, n):
+        if n <= len(self._path):
+            return
+        capacity = max(n, 2 * len(self._path))
+        path = np.empty((capacity, 5), dtype="float32")
+        cum = np.empty(capacity, dtype="float32")
+        path[:self.n_points] = self._path[:self.n_points]
+        cum[:self.n_points] = self._cum[:self.n_points]
+        self._path, self._cum = path, cum
+
+    def extend(self, points):
+        """
+        Legacy {'x','y','dx','dy','p'} dicts (preprocess_data defaults) buffer එකට එක් කරයි.
+        Raises ValueError for malformed points or when max_points would be exceeded.
+        """
+        if not points:
+            return
+        try:
+            rows = np.array([[p.get('x', 0), p.get('y', 0), p.get('dx', 0), p.get('dy', 0), p.get('p', 0)]
+                             for p in points], dtype='float32')
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError("Points must be {'x','y','dx','dy','p'} objects with numeric values.")
+        n, m = self.n_points, len(rows)
+        if n + m > self.max_points:
+            raise ValueError(f"Drawing exceeds {self.max_points} points.")
+        if self.n_strokes == 0:
+            self.n_strokes = 1  # pen_down නොයවන client: එක් stroke එකක්
+
+        # preprocess_path හි dist / cumsum: float32, වමේ සිට දකුණට එකතු කිරීම
+        segment = np.concatenate([self._path[n - 1:n], rows]) if n else rows
+        dist = np.sqrt(np.sum(np.diff(segment[:, :2], axis=0)**2, axis=1))
+        running = np.empty(len(dist) + 1, dtype="float32")
+        running[0] = self._cum[n - 1] if n else 0
+        running[1:] = dist
+        cum = np.cumsum(running)
+
+        self._reserve(n + m)
+        self._path[n:n + m] = rows
+        self._cum[n:n + m] = cum[1:] if n else cum
+        self.n_points = n + m
+
+    @property
+    def path(self):
+        return self._path[:self.n_points]
+
+    @property
+    def cum_dist(self):
+        return self._cum[:self.n_points]
+
+    def processed(self, max_seq_length=150, canvas_size=600):
+        """Buffer එක -> (150, 5) model input (හෝ ලක්ෂ්‍ය 5ට අඩු / දිගක් නැති නම් None)."""
+        return resample_path(self.path, self.cum_dist, max_seq_length, canvas_size)
@@ -3,8 +3,12 @@
 @Description: Preprocessing utilities for Sinhala Mithuru Handwriting Engine.
 """
 
+from operator import itemgetter
+
 import numpy as np
 
+_POINT_KEYS = itemgetter('x', 'y', 'dx', 'dy', 'p')
+
 def preprocess_data(strokes, max_seq_length=150, canvas_size=600):
     """
     පර්යේෂණාත්මක පූර්ව සැකසුම් පද්ධතිය: අමු දත්ත මොඩලයට ගැළපෙන ලෙස සකසයි.
@@ -24,14 +28,33 @@ def preprocess_data(strokes, max_seq_length=150, canvas_size=600):
         return None, strokes
         
     path = np.array(pts, dtype='float32')
+    return preprocess_path(path, max_seq_length, canvas_size), strokes
+
+def preprocess_path(path, max_seq_length=150, canvas_size=600):
+    """
+    (P, 5) float32 [x, y, dx, dy, p] ලක්ෂ්‍ය array එකක් 150 ලක්ෂ්‍යයකට resample කරයි.
+    Shared by the legacy dict payload and the columnar payload (payload.py).
+    Returns None for degenerate input.
+    """
+    if len(path) < 5:
+        return None
 
     # 2. Linear Interpolation (ලක්ෂ්‍ය 150කට සැකසීම)
     # Rationale: කාලීන විචල්‍යතාවය (Temporal variance) පාලනය කිරීම.
+    return resample_path(path, arc_length(path), max_seq_length, canvas_size)
+
+def arc_length(path):
+    """(P, 5) path -> (P,) float32 cumulative arc-length (also used by rejection.py)."""
     dist = np.sqrt(np.sum(np.diff(path[:, :2], axis=0)**2, axis=1))
-    cum_dist = np.insert(np.cumsum(dist), 0, 0)
-    
-    if cum_dist[-1] == 0: 
-        return None, strokes
+    return np.insert(np.cumsum(dist), 0, 0)
+
+def resample_path(path, cum_dist, max_seq_length=150, canvas_size=600):
+    """
+    Path එක සහ එහි cumulative arc-length (P,) -> (150, 5). preprocess_path සහ
+    stream.py (ලක්ෂ්‍ය එන විට cum_dist ගණනය කරන WebSocket buffer) දෙකම භාවිතා කරයි.
+    """
+    if len(path) < 5 or cum_dist[-1] == 0:
+        return None
 
     interp_d = np.linspace(0, cum_dist[-1], max_seq_length)
     
@@ -45,4 +68,114 @@ def preprocess_data(strokes, max_seq_length=150, canvas_size=600):
     # විශේෂාංග 5 ක් සහිත NumPy Array එක සෑදීම
     processed_sample = np.stack([nx, ny, ndx, ndy, np_state], axis=1)
     
-    return processed_sample, strokes
\ No newline at end of file
+    return processed_sample
+
+def strokes_to_path(strokes):
+    """Legacy strokes (list of {'x','y','dx','dy','p'} dict lists) -> (P, 5) float32, like preprocess_data."""
+    try:
+        # සියලු keys ඇති විට itemgetter (C) - .get() list එකට වඩා ~3x වේගවත්
+        pts = list(map(_POINT_KEYS, (p_val for s in strokes for p_val in s)))
+    except (KeyError, TypeError):
+        pts = [[p_val.get('x', 0), p_val.get('y', 0), p_val.get('dx', 0), p_val.get('dy', 0), p_val.get('p', 0)]
+               for s in strokes for p_val in s]
+    return np.array(pts, dtype='float32').reshape(-1, 5)
+
+def preprocess_batch(list_of_strokes, max_seq_length=150, canvas_size=600):
+    """
+    preprocess_data හි batch අනුවාදය (training notebooks / bulk re-scoring).
+    Returns ((N, 150, 5) float32, (N,) bool validity mask); invalid rows
+    (preprocess_data -> None) are zeros. Valid rows are bit-for-bit equal to
+    preprocess_data(...)[0].astype("float32") (benchmarks/preprocess_batch.py).
+    """
+    return preprocess_paths([strokes_to_path(s) for s in list_of_strokes], max_seq_length, canvas_size)
+
+def preprocess_paths(paths, max_seq_length=150, canvas_size=600):
+    """(P_i, 5) float32 paths ලැයිස්තුවක් (උදා: columnar payloads) -> ((N, 150, 5) float32, (N,) bool)."""
+    flat = np.concatenate(paths).astype('float32', copy=False) if paths else np.zeros((0, 5), dtype='float32')
+    return resample_padded(*pack_paths(flat, [len(p) for p in paths]), max_seq_length, canvas_size)
+
+def pack_paths(flat, lengths):
+    """Concatenated (sum P_i, 5) points + lengths -> zero-padded (N, P_max, 5) float32 and lengths."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    padded = np.zeros((len(lengths), max(2, int(lengths.max(initial=0))), 5), dtype='float32')
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    padded[rows, np.arange(len(flat)) - np.repeat(starts, lengths)] = flat
+    return padded, lengths
+
+def resample_padded(padded, lengths, max_seq_length=150, canvas_size=600):
+    """
+    Padded (N, P_max, 5) float32 + lengths (N,) -> ((N, 150, 5) float32, (N,) bool).
+
+    සියලුම samples සහ channels 5 එකවර: preprocess_path හි np.cumsum / np.linspace /
+    np.interp ගණනය කරන float operations එම අනුපිළිවෙලින්ම ධාවනය කරයි:
+      - arc-length: float32 diff/sqrt, row-wise sequential cumsum (same as 1-D cumsum)
+      - linspace(0, float32 stop, 150): float32 arange * (stop / 149), last = stop
+      - interp: float64; segment j = rightmost index with cum[j] <= x (np.interp's
+        binary search), then slope * (x - xp[j]) + fp[j], with np.interp's
+        exact-hit and NaN fallbacks
+    Rows with a non-finite arc-length (inf / NaN coordinates) go through
+    preprocess_path one by one.
+    """
+    n, width = padded.shape[:2]
+    lengths = np.asarray(lengths, dtype=np.int64)
+    div = max_seq_length - 1
+
+    # 1. Cumulative arc-length (positions >= length are padding and never searched);
+    # dx*dx + dy*dy is the same two-term sum as np.sum(diff**2, axis=1)
+    xs, ys = np.ascontiguousarray(padded[:, :, 0]), np.ascontiguousarray(padded[:, :, 1])
+    dx, dy = xs[:, 1:] - xs[:, :-1], ys[:, 1:] - ys[:, :-1]
+    dist = np.sqrt(dx * dx + dy * dy)
+    cum = np.zeros((n, width), dtype='float32')
+    cum[:, 1:] = np.cumsum(dist, axis=1)
+    total = cum[np.arange(n), np.maximum(lengths - 1, 0)]
+    valid = (lengths >= 5) & (total != 0)
+
+    # 2. Target arc-lengths, as np.linspace computes them for a float32 stop
+    stop = np.where(valid, total, np.float32(1))
+    step = stop / div
+    grid = np.arange(max_seq_length, dtype='float32')
+    x = grid * step[:, None]
+    denormal = step == 0  # np.linspace's step == 0 branch (gh-5437)
+    if denormal.any():
+        x[denormal] = (grid / div) * stop[denormal, None]
+    x[:, -1] = stop
+
+    # 3. Segment index per target point with one searchsorted over every row:
+    # non-negative float32 values sort like their bit patterns, so (row, bits)
+    # int64 keys order row by row while comparing exactly the float values
+    row_keys = np.arange(n, dtype=np.int64)[:, None] << 32
+    in_row = np.arange(width)[None, :] < lengths[:, None]
+    cum_keys = (row_keys | cum.view(np.uint32).astype(np.int64))[in_row]
+    x_keys = row_keys | x.view(np.uint32).astype(np.int64)
+    starts = np.cumsum(lengths) - lengths
+    j = np.searchsorted(cum_keys, x_keys, side='right') - starts[:, None] - 1
+    j = np.clip(j, 0, width - 1)
+    j1 = np.minimum(j + 1, width - 1)
+
+    # 4. Linear interpolation of all 5 channels in float64 (np.interp's arithmetic)
+    base = np.arange(n)[:, None] * width
+    cum_flat, points = cum.reshape(-1), padded.reshape(-1, 5)
+    xd = x.astype(np.float64)
+    xp0, xp1 = cum_flat[base + j].astype(np.float64), cum_flat[base + j1].astype(np.float64)
+    fp0, fp1 = points[base + j].astype(np.float64), points[base + j1].astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (fp1 - fp0) / (xp1 - xp0)[..., None]
+        out = slope * (xd - xp0)[..., None] + fp0
+        nan = np.isnan(out)
+        if nan.any():
+            retry = slope * (xd - xp1)[..., None] + fp1
+            retry = np.where(np.isnan(retry) & (fp0 == fp1), fp0, retry)
+            out = np.where(nan, retry, out)
+    exact = (j == (lengths - 1)[:, None]) | (xp0 == xd)
+    out[exact] = fp0[exact]
+
+    # ඛණ්ඩාංක Normalization සහ pen state (preprocess_path හි මෙන්)
+    out[..., :2] /= canvas_size
+    out[..., 4] = np.round(out[..., 4])
+    out[~valid] = 0
+    out = out.astype('float32')
+
+    for i in np.flatnonzero(valid & ~np.isfinite(total)):
+        out[i] = preprocess_path(padded[i, :lengths[i]], max_seq_length, canvas_size)
+    return out, valid
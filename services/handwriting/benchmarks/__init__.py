@@ -0,0 +1,13 @@
+"""
+Offline benchmarks for the Sinhala Mithuru Handwriting Engine.
+Run from services/handwriting, e.g. `python -m benchmarks.payload_formats`.
+
+    payload_formats - legacy dict vs columnar payload parse + preprocess cost
+    preprocess      - preprocess_data micro-benchmark across point densities
+    preprocess_batch - preprocess_batch parity (bit-for-bit) and speed vs the per-sample loop
+    load_test       - end-to-end /evaluate load test (in-process ASGI, stub or real models)
+
+synthetic.py generates label-shaped stroke data (stroke counts from
+app/config.json) and stubs.py provides models with the real input/output
+shapes, so none of these need the trained artifacts or hand-drawn data.
+"""
@@ -0,0 +1,49 @@
+"""
+@File: common.py
+@Description: Shared helpers for the benchmark scripts (latency summary, JSON report).
+"""
+
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+
+def latency_summary(samples_ms):
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(samples.size),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "max_ms": round(float(samples.max()), 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def emit(benchmark, params, results, output=None):
+    """Print (and optionally save) one JSON report; the commit hash makes runs comparable."""
+    report = {
+        "benchmark": benchmark,
+        "git_revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return report
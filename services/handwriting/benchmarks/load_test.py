@@ -0,0 +1,90 @@
+"""
+@File: load_test.py
+@Description: End-to-end /evaluate load test through an in-process ASGI client.
+
+    python -m benchmarks.load_test [--requests 1000] [--concurrency 16] [--stub full|tiny|real]
+                                   [--density 25] [--output out.json]
+
+The FastAPI app (lifespan included) runs in this process behind
+httpx.ASGITransport, so the numbers cover routing, validation, preprocessing,
+batching and inference but not the network or uvicorn. Service settings come
+from the usual HW_* environment variables. `--stub real` loads the trained
+models from BASE_PATH instead of stubs. Requires httpx.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app import main as service
+
+from .common import emit, latency_summary
+from .stubs import install_stub_assets
+from .synthetic import generate_submissions
+
+
+async def run_load(bodies, concurrency):
+    latencies, statuses = [], {}
+    next_index = 0
+
+    async with service.app.router.lifespan_context(service.app):
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if (await client.get("/readyz")).status_code != 200:
+                raise RuntimeError("Service did not become ready (see startup log above).")
+
+            async def worker():
+                nonlocal next_index
+                while next_index < len(bodies):
+                    body = bodies[next_index]
+                    next_index += 1
+                    t0 = time.perf_counter()
+                    response = await client.post("/evaluate", content=body,
+                                                 headers={"content-type": "application/json"})
+                    latencies.append((time.perf_counter() - t0) * 1000.0)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - started
+            service_stats = (await client.get("/stats")).json()
+
+    return {
+        "latency": latency_summary(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "elapsed_s": round(elapsed, 3),
+        "status_codes": {str(k): v for k, v in sorted(statuses.items())},
+        "batch_size": service_stats["batching"]["batch_size"],
+        "cache": {k: service_stats["cache"][k] for k in ("hits", "misses")},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process /evaluate load test")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--stub", choices=["full", "tiny", "real"], default="full")
+    parser.add_argument("--density", type=float, default=25.0)
+    parser.add_argument("--canvas-size", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    params = dict(vars(args), backend=service.INFERENCE_BACKEND, model_mode=service.MODEL_MODE,
+                  batch_max_size=service.BATCH_MAX_SIZE, inference_workers=service.INFERENCE_WORKERS)
+    if args.stub != "real":
+        params["backend"] = install_stub_assets(service, args.stub)
+
+    # Body serialisation is done up front so the client side costs little
+    bodies = [json.dumps(b).encode() for b in generate_submissions(
+        args.requests, seed=args.seed, canvas_size=args.canvas_size, density=args.density)]
+
+    results = asyncio.run(run_load(bodies, args.concurrency))
+    emit("load_test", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
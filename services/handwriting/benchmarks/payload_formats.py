@@ -0,0 +1,90 @@
+"""
+@File: payload_formats.py
+@Description: Parse + preprocess cost of the legacy dict payload vs the columnar payload.
+
+    python -m benchmarks.payload_formats [--points 150 1000 5000] [--repeat 200]
+
+Each timing covers json.loads of the request body, LevelSubmission validation and
+preprocessing down to the (150, 5) model input, i.e. everything /evaluate does
+before inference.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.payload import decode_columnar, encode_columnar
+from app.schemas import LevelSubmission
+from app.utils import preprocess_data, preprocess_path
+
+
+def make_strokes(n_points, n_strokes=2, seed=0):
+    rng = np.random.default_rng(seed)
+    strokes = []
+    for size in np.array_split(np.arange(n_points), n_strokes):
+        x, y = rng.uniform(150, 450, size=2)
+        stroke = []
+        for _ in size:
+            dx, dy = rng.normal(0, 3, size=2)
+            x, y = x + dx, y + dy
+            stroke.append({"x": float(x), "y": float(y), "dx": float(dx), "dy": float(dy), "p": 0})
+        strokes.append(stroke)
+    strokes[-1][-1]["p"] = 1
+    return strokes
+
+
+def legacy_pipeline(body):
+    submission = LevelSubmission.model_validate(json.loads(body))
+    processed, _ = preprocess_data(submission.strokes)
+    return processed
+
+
+def columnar_pipeline(body):
+    submission = LevelSubmission.model_validate(json.loads(body))
+    path, _ = decode_columnar(**submission.columnar_strokes.model_dump())
+    return preprocess_path(path)
+
+
+def time_ms(fn, body, repeat):
+    fn(body)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(body)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(samples))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--points", type=int, nargs="+", default=[150, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_points in args.points:
+        strokes = make_strokes(n_points)
+        legacy_body = json.dumps({"expected_char": "Aa", "strokes": strokes})
+        columnar_body = json.dumps({"expected_char": "Aa", "columnar_strokes": encode_columnar(strokes)})
+
+        # Both formats must produce the same model input
+        assert np.array_equal(legacy_pipeline(legacy_body), columnar_pipeline(columnar_body))
+
+        legacy_ms = time_ms(legacy_pipeline, legacy_body, args.repeat)
+        columnar_ms = time_ms(columnar_pipeline, columnar_body, args.repeat)
+        results.append({
+            "points": n_points,
+            "legacy_bytes": len(legacy_body),
+            "columnar_bytes": len(columnar_body),
+            "legacy_ms": round(legacy_ms, 4),
+            "columnar_ms": round(columnar_ms, 4),
+            "speedup": round(legacy_ms / columnar_ms, 2),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
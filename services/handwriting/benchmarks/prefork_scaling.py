@@ -0,0 +1,147 @@
+"""
+@File: prefork_scaling.py
+@Description: Memory and throughput of the pre-fork server (app/prefork.py) per worker count.
+
+    python -m benchmarks.prefork_scaling [--workers 1 2 4 8] [--servers prefork uvicorn]
+                                         [--requests 2000] [--concurrency 32] [--pin-cpus] [--output out.json]
+
+For every server and worker count this starts `python -m app.prefork` (or
+plain `uvicorn --workers N` as the baseline), waits for
+/readyz, records RSS and PSS of the master plus its workers (PSS splits
+shared copy-on-write pages between the processes that map them, so its sum
+is the real footprint; the RSS sum counts every shared page once per process),
+then drives /evaluate over real HTTP and reports p50/p95/p99 and requests/s.
+Uses the trained models from BASE_PATH (Linux only: reads /proc).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .common import emit, latency_summary
+from .synthetic import generate_submissions
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _descendants(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        return []
+    return children + [d for c in children for d in _descendants(c)]
+
+
+def memory_kb(pids):
+    """Summed Rss / Pss (kB) from /proc/<pid>/smaps_rollup."""
+    totals = {"rss_kb": 0, "pss_kb": 0}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in ("Rss", "Pss"):
+                        totals[f"{key.lower()}_kb"] += int(value.split()[0])
+        except OSError:
+            pass
+    return totals
+
+
+async def wait_ready(base_url, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return True
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+async def drive(base_url, bodies, concurrency):
+    latencies, statuses, next_index = [], {}, 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal next_index
+            while next_index < len(bodies):
+                body = bodies[next_index]
+                next_index += 1
+                t0 = time.perf_counter()
+                response = await client.post("/evaluate", content=body, headers={"content-type": "application/json"})
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def run_one(server_kind, workers, args, bodies):
+    base_url = f"http://127.0.0.1:{args.port}"
+    if server_kind == "prefork":
+        cmd = [sys.executable, "-m", "app.prefork", "--workers", str(workers), "--host", "127.0.0.1",
+               "--port", str(args.port)] + (["--pin-cpus"] if args.pin_cpus else [])
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(workers), "--host", "127.0.0.1",
+               "--port", str(args.port), "--log-level", "warning"]
+    server = subprocess.Popen(cmd, cwd=SERVICE_DIR)
+    try:
+        if not asyncio.run(wait_ready(base_url, args.startup_timeout)):
+            raise RuntimeError(f"{server_kind} server with {workers} workers did not become ready")
+        time.sleep(args.settle_s)  # ඉතිරි workers ද models පූරණය කර socket එකට සම්බන්ධ වීමට
+
+        pids = [server.pid] + _descendants(server.pid)
+        idle = memory_kb(pids)
+        latencies, statuses, elapsed = asyncio.run(drive(base_url, bodies, args.concurrency))
+        loaded = memory_kb(pids)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "server": server_kind,
+        "workers": workers,
+        "processes": len(pids),
+        "memory_idle": idle,
+        "memory_after_load": loaded,
+        "latency": latency_summary(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "status_codes": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork server RSS / throughput scaling")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--servers", nargs="+", choices=["prefork", "uvicorn"], default=["prefork", "uvicorn"])
+    parser.add_argument("--settle-s", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    bodies = [json.dumps(b).encode() for b in generate_submissions(args.requests)]
+    results = [run_one(kind, n, args, bodies) for kind in args.servers for n in args.workers]
+    emit("prefork_scaling", dict(vars(args), cpus=len(os.sched_getaffinity(0))), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+@File: preprocess.py
+@Description: Micro-benchmark of preprocess_data (resampling to the (150, 5) model input).
+
+    python -m benchmarks.preprocess [--density 10 25 50 100] [--drawings 500] [--output out.json]
+
+Density is points per 100 px of ink, so higher values model fast touch
+sampling rates on tablets.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.utils import preprocess_data
+
+from .common import emit, latency_summary
+from .synthetic import generate_submissions, load_char_config
+
+
+def bench_density(density, drawings, canvas_size, seed, repeat):
+    bodies = generate_submissions(drawings, load_char_config(), seed=seed, canvas_size=canvas_size, density=density)
+    strokes = [body["strokes"] for body in bodies]
+    for s in strokes[:10]:
+        preprocess_data(s)  # warm-up
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for s in strokes:
+            t0 = time.perf_counter()
+            preprocess_data(s, canvas_size=canvas_size)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - started
+
+    points = [sum(len(stroke) for stroke in s) for s in strokes]
+    return {
+        "density": density,
+        "mean_points": round(float(np.mean(points)), 1),
+        "latency": latency_summary(samples),
+        "calls_per_s": round(len(samples) / elapsed, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="preprocess_data micro-benchmark")
+    parser.add_argument("--density", type=float, nargs="+", default=[10, 25, 50, 100])
+    parser.add_argument("--drawings", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--canvas-size", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    results = [bench_density(d, args.drawings, args.canvas_size, args.seed, args.repeat) for d in args.density]
+    emit("preprocess", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
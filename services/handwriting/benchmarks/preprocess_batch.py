@@ -0,0 +1,90 @@
+"""
+@File: preprocess_batch.py
+@Description: Parity check and speed of utils.preprocess_batch against the per-sample preprocess_data.
+
+    python -m benchmarks.preprocess_batch [--drawings 2000] [--density 10 25 100] [--output out.json]
+
+Every valid row of preprocess_batch must be bit-for-bit equal to
+preprocess_data(...)[0].astype("float32"), and the validity mask must match
+preprocess_data returning None. The drawing set mixes synthetic letters at
+several point densities, sub-pixel (float) coordinates, repeated points
+(zero-length segments), points without dx/dy and degenerate drawings
+(< 5 points, a single repeated point). Exits 1 on any mismatch. The same
+set, plus edge cases, runs in tests/test_preprocess.py.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.utils import preprocess_batch, preprocess_data
+
+from .common import emit
+from .synthetic import generate_submissions, load_char_config
+
+
+def parity_set(drawings, densities, seed):
+    rng = np.random.default_rng(seed)
+    config = load_char_config()
+    sets = []
+    for density in densities:
+        strokes = [b["strokes"] for b in generate_submissions(drawings, config, seed=seed, density=density)]
+        sets.append((f"density_{density:g}", strokes))
+
+    base = sets[0][1]
+    jittered = [[[dict(p, x=p["x"] + float(rng.random()), y=p["y"] * 1.0007) for p in s] for s in d] for d in base]
+    repeated = [[[p for p in s for _ in range(int(rng.integers(1, 4)))] for s in d] for d in base]
+    missing_keys = [[[{k: v for k, v in p.items() if k not in ("dx", "dy")} for p in s] for s in d] for d in base]
+    degenerate = [[[{"x": 10, "y": 10, "dx": 0, "dy": 0, "p": 0}] * k] for k in range(0, 12)]
+    degenerate += [[d[0][:k]] for d in base[:20] for k in (1, 4, 5, 6)]
+    sets += [("float_coords", jittered), ("repeated_points", repeated), ("missing_keys", missing_keys),
+             ("degenerate", degenerate)]
+    return sets
+
+
+def check(name, strokes):
+    batch, valid = preprocess_batch(strokes)
+    mismatches = 0
+    for i, s in enumerate(strokes):
+        ref, _ = preprocess_data(s)
+        if ref is None:
+            mismatches += int(valid[i] or np.any(batch[i]))
+        else:
+            mismatches += int(not valid[i] or ref.astype("float32").tobytes() != batch[i].tobytes())
+    return {"set": name, "drawings": len(strokes), "valid": int(valid.sum()), "mismatches": mismatches}
+
+
+def speed(strokes, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        [preprocess_data(s) for s in strokes]
+    loop_s = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        preprocess_batch(strokes)
+    batch_s = (time.perf_counter() - t0) / repeat
+    return {"drawings": len(strokes), "loop_ms": round(loop_s * 1000, 2), "batch_ms": round(batch_s * 1000, 2),
+            "speedup": round(loop_s / batch_s, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="preprocess_batch parity + speed")
+    parser.add_argument("--drawings", type=int, default=2000)
+    parser.add_argument("--density", type=float, nargs="+", default=[10, 25, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    sets = parity_set(args.drawings, args.density, args.seed)
+    parity = [check(name, strokes) for name, strokes in sets]
+    timing = [dict(speed(strokes, args.repeat), set=name) for name, strokes in sets if name.startswith("density")]
+    emit("preprocess_batch", vars(args), {"parity": parity, "speed": timing}, args.output)
+    return 1 if any(row["mismatches"] for row in parity) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
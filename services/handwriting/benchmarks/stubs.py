@@ -0,0 +1,111 @@
+"""
+@File: stubs.py
+@Description: Stand-in handwriting models for benchmarking without the trained artifacts.
+
+`full` stubs copy the layer topology of Model A (Masking -> LSTM 128 -> BN ->
+LSTM 64 -> Dense 38 softmax) and Model B (Conv1D 64 -> BN -> MaxPool -> LSTM
+128 -> LSTM 64 -> Dense 1 sigmoid) with seeded random weights, so inference
+cost is close to the real thing. `tiny` stubs keep only the (N, 150, 5) ->
+(N, 38) / (N, 1) shapes to measure service overhead alone.
+"""
+
+import time
+
+import keras
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from .synthetic import generate_submissions, load_char_config
+
+SEQ_LEN, N_FEATURES, N_CLASSES = 150, 5, 38
+
+
+def build_stub_models(kind="full", seed=0):
+    keras.utils.set_random_seed(seed)
+    layers = keras.layers
+
+    char_in = keras.Input((SEQ_LEN, N_FEATURES))
+    qual_in = keras.Input((SEQ_LEN, N_FEATURES))
+    if kind == "full":
+        x = layers.Masking(mask_value=0.0)(char_in)
+        x = layers.LSTM(128, return_sequences=True)(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.LSTM(64)(x)
+        x = layers.Dense(128, activation="relu")(x)
+        char_out = layers.Dense(N_CLASSES, activation="softmax")(x)
+
+        y = layers.Conv1D(64, 3, padding="same", activation="relu")(qual_in)
+        y = layers.BatchNormalization()(y)
+        y = layers.MaxPooling1D(2)(y)
+        y = layers.LSTM(128, return_sequences=True)(y)
+        y = layers.LSTM(64)(y)
+        y = layers.Dense(32, activation="relu")(y)
+        qual_out = layers.Dense(1, activation="sigmoid")(y)
+    elif kind == "tiny":
+        char_out = layers.Dense(N_CLASSES, activation="softmax")(layers.GlobalAveragePooling1D()(char_in))
+        qual_out = layers.Dense(1, activation="sigmoid")(layers.GlobalAveragePooling1D()(qual_in))
+    else:
+        raise ValueError(f"Unknown stub kind '{kind}' (full | tiny).")
+
+    return (keras.Model(char_in, char_out, name="stub_char_model"),
+            keras.Model(qual_in, qual_out, name="stub_quality_model"))
+
+
+def fit_stub_scaler(n=64, seed=0):
+    """StandardScaler fitted on synthetic drawings (same transform cost as the real one)."""
+    from app.utils import preprocess_data
+
+    samples = [preprocess_data(body["strokes"])[0] for body in generate_submissions(n, seed=seed)]
+    samples = np.stack([s for s in samples if s is not None])
+    return StandardScaler().fit(samples.reshape(-1, N_FEATURES))
+
+
+def build_stub_prototypes(char_model, scaler, max_exemplars, centroid_weight, per_label=4, seed=1):
+    """kNN index of stub Model A embeddings of synthetic drawings, one block per config.json label."""
+    from app.prototypes import build_index, embedding_model
+    from app.utils import preprocess_batch
+
+    bodies = generate_submissions(per_label * len(load_char_config()), seed=seed)
+    batch, valid = preprocess_batch([body["strokes"] for body in bodies])
+    batch = batch[valid]
+    scaled = scaler.transform(batch.reshape(-1, N_FEATURES)).reshape(batch.shape).astype("float32")
+    embeddings = np.asarray(embedding_model(char_model)(scaled))
+    labels = [body["expected_char"] for body, ok in zip(bodies, valid) if ok]
+    return build_index(labels, embeddings, max_exemplars, centroid_weight)
+
+
+def install_stub_assets(service, kind="full"):
+    """
+    Replaces `service.load_assets` (app.main) so the lifespan handler loads stubs
+    instead of the .keras / .pkl / prototype files. Call before entering the
+    lifespan. The ModelSet is still built by main.load_model_set (same backends,
+    embedder and kNN index as a real load), only its `load` step is stubbed.
+    """
+    load_assets = getattr(service.load_assets, "__wrapped__", service.load_assets)
+    backend = service.INFERENCE_BACKEND if service.INFERENCE_BACKEND in ("predict", "compiled") else "compiled"
+
+    def load_stub_assets(mode=None, backend_kind=None, precision=None, recognition=None):
+        t0 = time.perf_counter()
+        char_model, qual_model = build_stub_models(kind)
+        scaler = fit_stub_scaler()
+        stub_time = round(time.perf_counter() - t0, 3)
+
+        def load(step, path):
+            if step == "fused_model":
+                from app.fuse_models import build_fused_model
+                return build_fused_model(char_model, qual_model, scaler, scaler)
+            if step == "prototypes":
+                return build_stub_prototypes(char_model, scaler, service.PROTOTYPE_MAX_EXEMPLARS,
+                                             service.PROTOTYPE_CENTROID_WEIGHT)
+            return {"char_model": char_model, "qual_model": qual_model,
+                    "char_scaler": scaler, "qual_scaler": scaler}[step]
+
+        # Exported backends (savedmodel / onnx / tflite) need artifacts of the real models
+        if backend_kind not in (None, "predict", "compiled"):
+            backend_kind = None
+        timings = load_assets(mode, backend_kind or backend, "fp32", recognition, load=load)
+        return {f"stub_{kind}_models": stub_time, **timings}
+
+    load_stub_assets.__wrapped__ = load_assets
+    service.load_assets = load_stub_assets
+    return backend
@@ -0,0 +1,66 @@
+"""
+@File: synthetic.py
+@Description: Synthetic Sinhala handwriting generator for offline benchmarks.
+
+Drawings follow the shape of real submissions, not the letters themselves:
+each label gets the stroke count from app/config.json, every stroke is a
+smooth random curve (cubic Bezier + hand jitter) sampled at integer canvas
+coordinates with `density` points per 100 px of ink, and points carry the
+same {x, y, dx, dy, p} fields as the Flutter client / collection tool
+(dx, dy relative to the previous point of the stroke, p=1 on the pen lift).
+"""
+
+import json
+import os
+
+import numpy as np
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "config.json")
+
+
+def load_char_config(path=CONFIG_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stroke(rng, canvas_size, density, jitter):
+    margin = canvas_size * 0.15
+    ctrl = rng.uniform(margin, canvas_size - margin, size=(4, 2))
+
+    # Arc length ඇස්තමේන්තුව -> ලක්ෂ්‍ය ගණන (density points / 100 px)
+    t = np.linspace(0.0, 1.0, 64)[:, None]
+    curve = ((1 - t) ** 3 * ctrl[0] + 3 * (1 - t) ** 2 * t * ctrl[1]
+             + 3 * (1 - t) * t ** 2 * ctrl[2] + t ** 3 * ctrl[3])
+    length = float(np.sum(np.linalg.norm(np.diff(curve, axis=0), axis=1)))
+    n_points = max(2, int(round(length * density / 100.0)))
+
+    t = np.sort(rng.uniform(0.0, 1.0, size=n_points))[:, None]
+    pts = ((1 - t) ** 3 * ctrl[0] + 3 * (1 - t) ** 2 * t * ctrl[1]
+           + 3 * (1 - t) * t ** 2 * ctrl[2] + t ** 3 * ctrl[3])
+    pts = np.clip(np.rint(pts + rng.normal(0.0, jitter, size=pts.shape)), 0, canvas_size - 1).astype(int)
+
+    stroke = []
+    last_x, last_y = pts[0]
+    for x, y in pts:
+        stroke.append({"x": int(x), "y": int(y), "dx": int(x - last_x), "dy": int(y - last_y), "p": 0})
+        last_x, last_y = x, y
+    stroke[-1]["p"] = 1
+    return stroke
+
+
+def generate_drawing(label, char_config, rng, canvas_size=600, density=25.0, jitter=1.5):
+    """One drawing of `label` as a legacy stroke list (stroke count from config.json)."""
+    n_strokes = char_config.get(label, {}).get("strokes", 1)
+    return [_stroke(rng, canvas_size, density, jitter) for _ in range(n_strokes)]
+
+
+def generate_submissions(n, char_config=None, seed=0, canvas_size=600, density=25.0, jitter=1.5):
+    """`n` /evaluate request bodies cycling through every label in config.json."""
+    char_config = char_config or load_char_config()
+    labels = sorted(char_config)
+    rng = np.random.default_rng(seed)
+    return [
+        {"expected_char": labels[i % len(labels)],
+         "strokes": generate_drawing(labels[i % len(labels)], char_config, rng, canvas_size, density, jitter)}
+        for i in range(n)
+    ]
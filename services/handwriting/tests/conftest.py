@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# `app` (and `benchmarks`) are imported from the service root, as the Dockerfile runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def service():
+    """app.main (TensorFlow is imported with it)."""
+    pytest.importorskip("tensorflow")
+    from app import main as service
+
+    return service
+
+
+@pytest.fixture(scope="session")
+def client(service):
+    """
+    TestClient of the service with `tiny` stub models (benchmarks/stubs.py), lifespan
+    included: no trained artifacts needed. The real load_assets is restored afterwards.
+    One per session: the lifespan shuts the inference and bulk pools down for good.
+    """
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from benchmarks.stubs import install_stub_assets
+
+    load_assets = service.load_assets
+    install_stub_assets(service, "tiny")
+    try:
+        with TestClient(service.app) as test_client:
+            yield test_client
+    finally:
+        service.load_assets = load_assets
+
@@ -0,0 +1,47 @@
+"""Seeded drawings for the tests: letter-like loops, dots, lines and scribbles as legacy strokes."""
+
+import numpy as np
+
+
+def to_strokes(points, n_strokes=1):
+    """(P, 2) points -> legacy strokes payload in `n_strokes` parts (dx/dy relative within a stroke)."""
+    strokes = []
+    for part in np.array_split(np.asarray(points, dtype=float), n_strokes):
+        if not len(part):
+            continue
+        deltas = np.diff(part, axis=0, prepend=part[:1])
+        strokes.append([{"x": float(x), "y": float(y), "dx": float(dx), "dy": float(dy), "p": 0}
+                        for (x, y), (dx, dy) in zip(part, deltas)])
+    strokes[-1][-1]["p"] = 1
+    return strokes
+
+
+def letter(seed=0, n=80):
+    """A wobbly closed loop (~200 px): every rejection rule lets it through."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, n) + rng.uniform(0, 2 * np.pi)
+    radius = rng.uniform(80, 120)
+    return np.stack([300 + radius * np.cos(t), 300 + 0.8 * radius * np.sin(t)], axis=1) + rng.normal(0, 1.5, (n, 2))
+
+
+def dot(n=3):
+    return np.full((n, 2), 300.0)
+
+
+def tap(n=12, seed=0):
+    """Enough points, but all within a couple of pixels."""
+    return 300 + np.random.default_rng(seed).uniform(-1, 1, (n, 2))
+
+
+def wiggle(n=30):
+    """A small zig-zag: long enough ink inside a ~10 px box."""
+    x = 300 + np.tile([0.0, 10.0], n // 2)
+    return np.stack([x, 300 + np.linspace(0, 10, len(x))], axis=1)
+
+
+def line(n=100):
+    return np.stack([100 + 4.0 * np.arange(n), np.full(n, 300.0)], axis=1)
+
+
+def scribble(n=400, seed=0):
+    return 300 + np.random.default_rng(seed).normal(0, 40, (n, 2))
@@ -0,0 +1,86 @@
+"""
+Every available inference backend (app/backends.py) against Keras model.predict on
+the seeded synthetic_fixtures: identical argmax labels, quality within tolerance.
+SavedModel / ONNX / TFLite are skipped when their artifacts (`python -m app.backends
+export`, `python -m app.quantize`) or runtimes are missing; nothing is exported here.
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from app.backends import (KerasPredictBackend, N_FEATURES, OnnxBackend, SavedModelBackend, TFLiteBackend,
+                          artifact_path, load_backend, synthetic_fixtures, tflite_path)
+
+QUAL_ATOL = 1e-4  # python -m app.backends parity --qual-atol
+
+
+def missing_artifact(kind, model_path):
+    """Reason to skip `kind` for this model, or None when it can run."""
+    if kind == "savedmodel" and not os.path.isdir(artifact_path(model_path, "_savedmodel")):
+        return "no SavedModel artifact (python -m app.backends export)"
+    if kind == "onnx":
+        if importlib.util.find_spec("onnxruntime") is None:
+            return "onnxruntime is not installed"
+        if not os.path.exists(artifact_path(model_path, ".onnx")):
+            return "no ONNX artifact (python -m app.backends export)"
+    if kind == "tflite" and not os.path.exists(tflite_path(model_path)):
+        return "no fp32 TFLite artifact (python -m app.quantize --precisions fp32)"
+    return None
+
+
+@pytest.fixture(scope="module")
+def service():
+    from app import main as service
+
+    if not os.path.exists(service.CHAR_MODEL_PATH) or not os.path.exists(service.QUAL_MODEL_PATH):
+        pytest.skip(f"model files for version {service.MODEL_VERSION} are missing")
+    service.load_assets("separate", "predict")
+    return service
+
+
+@pytest.fixture(scope="module")
+def fixtures(service):
+    """Scaled Model A / Model B inputs and the model.predict reference outputs."""
+    samples = synthetic_fixtures(n=32)
+    flat = samples.reshape(-1, N_FEATURES)
+    char_input = service.CHAR_SCALER.transform(flat).reshape(samples.shape).astype("float32")
+    qual_input = service.QUAL_SCALER.transform(flat).reshape(samples.shape).astype("float32")
+    return {
+        "char_input": char_input,
+        "qual_input": qual_input,
+        "char_ref": KerasPredictBackend(service.CHAR_MODEL)(char_input),
+        "qual_ref": KerasPredictBackend(service.QUAL_MODEL)(qual_input),
+    }
+
+
+@pytest.mark.parametrize("kind", ["compiled", "savedmodel", "onnx", "tflite"])
+def test_backend_matches_predict(service, fixtures, kind):
+    for model_path in (service.CHAR_MODEL_PATH, service.QUAL_MODEL_PATH):
+        reason = missing_artifact(kind, model_path)
+        if reason:
+            pytest.skip(f"{kind}: {reason}")
+
+    char_backend = load_backend(service.CHAR_MODEL, service.CHAR_MODEL_PATH, kind)
+    qual_backend = load_backend(service.QUAL_MODEL, service.QUAL_MODEL_PATH, kind)
+
+    labels = np.argmax(char_backend(fixtures["char_input"]), axis=1)
+    np.testing.assert_array_equal(labels, np.argmax(fixtures["char_ref"], axis=1))
+
+    quality = np.asarray(qual_backend(fixtures["qual_input"])).reshape(-1)
+    np.testing.assert_allclose(quality, fixtures["qual_ref"].reshape(-1), rtol=0, atol=QUAL_ATOL)
+
+
+@pytest.mark.parametrize("backend", [SavedModelBackend, OnnxBackend, TFLiteBackend])
+def test_missing_artifact_is_an_error(tmp_path, backend):
+    """Exported backends never export at serve time: a missing artifact fails startup."""
+    if backend is OnnxBackend and importlib.util.find_spec("onnxruntime") is None:
+        pytest.skip("onnxruntime is not installed")
+    model_path = str(tmp_path / "model_v1.keras")
+    with pytest.raises(RuntimeError, match="not found"):
+        backend(None, model_path)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,91 @@
+"""MicroBatcher (app/batching.py): results reach their own callers, batch limits, the idle fast path."""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.batching import MicroBatcher
+from app.executor import InferenceExecutor
+
+
+def sample(i):
+    return np.full((150, 5), i, dtype="float32")
+
+
+class RecordingModel:
+    """infer_fn stand-in: each sample's id (its fill value) and context, plus every batch size seen."""
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.batches = []
+
+    def __call__(self, batch, contexts):
+        self.batches.append(len(batch))
+        time.sleep(self.delay_s)
+        return [(int(x[0, 0]), context) for x, context in zip(batch, contexts)]
+
+
+async def submit_all(batcher, n):
+    return await asyncio.gather(*[batcher.submit(sample(i), context=f"ctx{i}") for i in range(n)])
+
+
+@pytest.mark.parametrize("with_executor", [False, True])
+def test_every_caller_gets_its_own_result(with_executor):
+    model = RecordingModel()
+    executor = InferenceExecutor(max_workers=2) if with_executor else None
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=50, executor=executor)
+    try:
+        results = asyncio.run(submit_all(batcher, 10))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    assert results == [(i, f"ctx{i}") for i in range(10)]
+    assert sum(model.batches) == 10
+    assert max(model.batches) == 4
+    assert batcher.stats()["batch_size"]["count"] == len(model.batches)
+
+
+def test_lone_request_skips_the_batching_wait():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=32, max_wait_ms=2000)
+
+    async def lone():
+        t0 = time.perf_counter()
+        result = await batcher.submit(sample(7), context="only")
+        return result, time.perf_counter() - t0
+
+    result, elapsed = asyncio.run(lone())
+    assert result == (7, "only")
+    assert model.batches == [1]
+    assert elapsed < 1.0
+
+
+def test_batch_closes_at_max_wait():
+    """Requests arriving after the window closes form the next batch."""
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=32, max_wait_ms=20)
+
+    async def staggered():
+        first = [asyncio.ensure_future(batcher.submit(sample(i))) for i in range(3)]
+        await asyncio.sleep(0.3)
+        second = [asyncio.ensure_future(batcher.submit(sample(i))) for i in range(3, 5)]
+        return await asyncio.gather(*first, *second)
+
+    results = asyncio.run(staggered())
+    assert [r[0] for r in results] == list(range(5))
+    assert model.batches == [3, 2]
+
+
+def test_model_error_reaches_every_caller_in_the_batch():
+    def broken(batch, contexts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*[batcher.submit(sample(i)) for i in range(3)], return_exceptions=True)
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, RuntimeError) and str(e) == "model failed" for e in errors)
@@ -0,0 +1,104 @@
+"""Bulk pipeline (app/bulk.py, /evaluate_batch): body parsing and input order across chunks and workers."""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.bulk import parse_batch_body, stream_evaluation
+
+from drawings import dot, letter, to_strokes
+
+
+def mixed_items():
+    """Good, invalid, retry (dot) and undecodable items, interleaved."""
+    items = []
+    for i in range(12):
+        kind = i % 4
+        if kind == 0:
+            items.append({"id": i, "expected_char": "Aa", "strokes": to_strokes(letter(i), 2)})
+        elif kind == 1:
+            items.append({"id": i, "strokes": to_strokes(letter(i))})
+        elif kind == 2:
+            items.append({"id": i, "expected_char": "Aa", "strokes": to_strokes(dot())})
+        else:
+            items.append({"id": i, "expected_char": "Aa", "strokes": [[1]]})
+    return items
+
+
+EXPECTED_STATUS = {0: "success", 1: "error", 2: "retry", 3: "error"}
+
+
+def rows_of(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_parse_batch_body():
+    assert parse_batch_body(b'[{"id": 1}, 2]', ndjson=False) == [{"id": 1}, 2]
+    assert parse_batch_body(b'{"id": 1}\n\n  \n{"id": 2}\n', ndjson=True) == [b'{"id": 1}', b'{"id": 2}']
+    for body in (b'{"id": 1}', b"not json", b""):
+        with pytest.raises(ValueError):
+            parse_batch_body(body, ndjson=False)
+
+
+@pytest.mark.parametrize("workers", [0, 3])
+def test_stream_evaluation_keeps_input_order(workers):
+    items = mixed_items()
+    calls = []
+
+    async def infer_batch(batch):
+        calls.append(len(batch))
+        return [(0, 0.5)] * len(batch)
+
+    def build_analysis(expected_char, char_idx, qual_score, n_strokes):
+        return {"expected_char": expected_char, "n_strokes": n_strokes}
+
+    def reject(features, expected_char):
+        return {"reason": "too_few_points"} if features["n_points"] < 8 else None
+
+    async def run(pool):
+        lines = stream_evaluation(items, infer_batch, build_analysis, reject, pool, workers, chunk_size=5)
+        return "".join([chunk async for chunk in lines])
+
+    if workers:
+        with ThreadPoolExecutor(workers) as pool:
+            text = asyncio.run(run(pool))
+    else:
+        text = asyncio.run(run(None))
+
+    rows = rows_of(text)
+    assert [r["id"] for r in rows] == [item["id"] for item in items]
+    assert [r["status"] for r in rows] == [EXPECTED_STATUS[i % 4] for i in range(len(items))]
+    assert all(r["analysis"]["n_strokes"] == 2 for r in rows if r["status"] == "success")
+    # Only the good items reach the model, one call per chunk that has any (chunks 0-4, 5-9, 10-11)
+    assert calls == [2, 1]
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_evaluate_batch_keeps_input_order(client, service, monkeypatch, ndjson):
+    monkeypatch.setattr(service, "BULK_CHUNK_SIZE", 3)
+    items = mixed_items()
+    if ndjson:
+        lines = [json.dumps(item) for item in items]
+        lines[5] = "{not json"
+        response = client.post("/evaluate_batch", content="\n".join(lines),
+                               headers={"content-type": "application/x-ndjson"})
+    else:
+        response = client.post("/evaluate_batch", json=items)
+    assert response.status_code == 200
+
+    rows = rows_of(response.text)
+    assert len(rows) == len(items)
+    for k, (row, item) in enumerate(zip(rows, items)):
+        if ndjson and k == 5:
+            assert row == {"id": None, "status": "error", "detail": row["detail"]}
+            continue
+        assert row["id"] == item["id"]
+        assert row["status"] == EXPECTED_STATUS[k % 4]
+
+
+def test_evaluate_batch_rejects_bad_bodies(client):
+    for body in ("not json", '{"id": 1}'):
+        response = client.post("/evaluate_batch", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 400
@@ -0,0 +1,76 @@
+"""ResultCache (app/cache.py): hits on near-identical drawings, TTL, LRU eviction, invalidation on model changes."""
+
+import time
+
+import numpy as np
+
+from app.cache import CHANNEL_SCALE, ResultCache
+
+
+def processed(seed=0):
+    """A (150, 5) trajectory on the cache's 1e-3 grid (dx/dy in pixels), so small noise stays in its cell."""
+    return np.random.default_rng(seed).integers(0, 1000, (150, 5)) * 1e-3 / CHANNEL_SCALE
+
+
+def test_hit_on_the_same_drawing_within_quantum():
+    cache = ResultCache(quantum=1e-3)
+    x = processed()
+    cache.put(cache.key(x, "Aa", 1), {"score": 1})
+    assert cache.get(cache.key(x + 1e-6, "Aa", 1)) == {"score": 1}
+    assert cache.get(cache.key(processed(1), "Aa", 1)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_key_depends_on_label_and_stroke_count():
+    cache = ResultCache()
+    x = processed()
+    keys = {cache.key(x, "Aa", 1), cache.key(x, "Ba", 1), cache.key(x, "Aa", 2)}
+    assert len(keys) == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl_s=0.05)
+    key = cache.key(processed(), "Aa", 1)
+    cache.put(key, "result")
+    assert cache.get(key) == "result"
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_size=2)
+    keys = [cache.key(processed(i), "Aa", 1) for i in range(3)]
+    cache.put(keys[0], 0)
+    cache.put(keys[1], 1)
+    cache.get(keys[0])
+    cache.put(keys[2], 2)
+    assert [cache.get(k) for k in keys] == [0, None, 2]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_model_file_change_invalidates(tmp_path):
+    model_file = tmp_path / "model_v1.keras"
+    model_file.write_bytes(b"weights")
+    cache = ResultCache(watch_paths=[str(model_file)], check_interval_s=0)
+    old_key = cache.key(processed(), "Aa", 1)
+    cache.put(old_key, "old model")
+
+    model_file.write_bytes(b"retrained weights")
+    new_key = cache.key(processed(), "Aa", 1)
+    assert new_key != old_key
+    assert cache.get(new_key) is None
+    assert cache.get(old_key) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_rewatch_drops_every_result(tmp_path):
+    cache = ResultCache(watch_paths=[str(tmp_path / "v1.keras")])
+    key = cache.key(processed(), "Aa", 1)
+    cache.put(key, "v1")
+    version = cache.version
+    cache.rewatch([str(tmp_path / "v2.keras")])
+    assert cache.version != version
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,61 @@
+"""InferenceExecutor (app/executor.py): bounded admission, counters, and the 429 answers it drives."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.executor import InferenceExecutor, QueueFullError
+
+from drawings import letter, to_strokes
+
+
+def test_admit_rejects_beyond_max_queue():
+    executor = InferenceExecutor(max_workers=1, max_queue=2)
+    try:
+        with executor.admit(), executor.admit():
+            with pytest.raises(QueueFullError):
+                with executor.admit():
+                    pass
+            assert executor.stats()["in_flight"] == 2
+        # Slots are released on exit, errors included
+        with pytest.raises(ValueError):
+            with executor.admit():
+                raise ValueError("handler failed")
+        with executor.admit():
+            pass
+        stats = executor.stats()
+        assert (stats["in_flight"], stats["rejected"]) == (0, 1)
+    finally:
+        executor.shutdown()
+
+
+def test_run_uses_the_inference_threads():
+    executor = InferenceExecutor(max_workers=2)
+
+    async def run_all():
+        return await asyncio.gather(*[executor.run(lambda: threading.current_thread().name) for _ in range(4)])
+
+    try:
+        names = asyncio.run(run_all())
+        assert all(name.startswith("hw-infer") for name in names)
+        stats = executor.stats()
+        assert (stats["completed_jobs"], stats["queued_jobs"], stats["running_jobs"]) == (4, 0, 0)
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/evaluate", {"expected_char": "Aa", "strokes": to_strokes(letter(101), 2)}),
+    ("/evaluate_word", {"expected_chars": ["Aa"], "strokes": to_strokes(letter(102), 2)}),
+])
+def test_full_queue_answers_429(client, service, monkeypatch, path, body):
+    rejected = service.INFERENCE.stats()["rejected"]
+    monkeypatch.setattr(service.INFERENCE, "max_queue", 0)
+    response = client.post(path, json=body)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(service.RETRY_AFTER_S)
+    assert service.INFERENCE.stats()["rejected"] == rejected + 1
+
+    monkeypatch.undo()
+    assert client.post(path, json=body).status_code == 200
@@ -0,0 +1,170 @@
+"""Model versions (app/hotswap.py + /admin/models): discovery, ShadowScorer stats, activate and rollback."""
+
+import copy
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.hotswap import ARTIFACTS, ShadowScorer, discover_versions, resolve_version, version_paths
+
+from drawings import letter, to_strokes
+
+TOKEN = "test-admin-token"
+
+
+def publish(models_dir, version, names=tuple(ARTIFACTS)):
+    for name, path in version_paths(str(models_dir), version).items():
+        if name in names:
+            open(path, "wb").close()
+
+
+def wait_for(predicate, timeout_s=30.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def test_discover_and_resolve_versions(tmp_path):
+    publish(tmp_path, 1)
+    publish(tmp_path, 3)
+    publish(tmp_path, 2, names=("char_model", "qual_model"))  # scalers missing
+    publish(tmp_path, 4, names=("fused_model",))
+    assert discover_versions(str(tmp_path)) == [1, 3]
+    assert discover_versions(str(tmp_path), "fused") == [1, 3, 4]
+    assert resolve_version(str(tmp_path), "latest") == 3
+    assert resolve_version(str(tmp_path), "v2") == 2
+    assert resolve_version(str(tmp_path / "missing"), "latest") == 1
+
+
+def sample(i):
+    return np.full((150, 5), i, dtype="float32")
+
+
+def test_shadow_stats():
+    shadow = ShadowScorer(seed=0)
+    # Candidate: same letter except for sample 3, quality 0.1 higher (crosses the 0.5 threshold for sample 2)
+    shadow.start(2, lambda batch: [(3 if x[0, 0] == 3 else 0, 0.35 + 0.1 * x[0, 0]) for x in batch], 1.0)
+    for i in range(4):
+        assert shadow.offer(sample(i), (0, 0.25 + 0.1 * i), labels=["A", "B", "C", "D"])
+    wait_for(lambda: shadow.stats()["compared"] == 4)
+
+    stats = shadow.stats()
+    assert (stats["version"], stats["sampled"], stats["dropped"], stats["errors"]) == (2, 4, 0, 0)
+    assert stats["label_agreement"] == 0.75
+    assert stats["top_disagreements"] == {"A->D": 1}
+    assert stats["quality_pass_agreement"] == 0.75
+    assert stats["quality_mean_abs_delta"] == pytest.approx(0.1)
+    assert stats["quality_max_abs_delta"] == pytest.approx(0.1)
+    shadow.shutdown()
+
+
+def test_shadow_never_blocks_and_counts_drops_and_errors():
+    release = threading.Event()
+
+    def slow(batch):
+        release.wait(5)
+        raise RuntimeError("candidate failed")
+
+    shadow = ShadowScorer(max_pending=2, seed=0)
+    shadow.start(2, slow, 1.0)
+    assert shadow.offer(sample(0), (0, 0.5))
+    wait_for(lambda: shadow.stats()["pending"] == 0)  # taken by the shadow thread, which now blocks
+    assert [shadow.offer(sample(i), (0, 0.5)) for i in range(1, 5)] == [True, True, False, False]
+    release.set()
+    wait_for(lambda: shadow.stats()["errors"] == 3)
+    stats = shadow.stats()
+    assert (stats["sampled"], stats["dropped"], stats["compared"]) == (5, 2, 0)
+    shadow.shutdown()
+
+
+def test_shadow_sample_rate_and_stop():
+    shadow = ShadowScorer(seed=0)
+    assert not shadow.offer(sample(0), (0, 0.5))  # not started
+    shadow.start(2, lambda batch: [(0, 0.5)] * len(batch), 0.0)
+    assert not shadow.active
+    shadow.start(2, lambda batch: [(0, 0.5)] * len(batch), 1.0)
+    shadow.stop()
+    assert not shadow.offer(sample(0), (0, 0.5))
+    assert shadow.stats()["active"] is False
+    shadow.shutdown()
+
+
+@pytest.fixture
+def admin(client, service, monkeypatch, tmp_path):
+    """Admin API on a models dir with v1 and v2; every version loads as a copy of the active stub models."""
+    publish(tmp_path, 1)
+    publish(tmp_path, 2)
+    active = service.ACTIVE_MODELS
+    cache_paths = service.CACHE.watch_paths
+
+    def load_model_set(version, *args, **kwargs):
+        models = copy.copy(active)
+        models.version, models.paths, models.timings = version, version_paths(str(tmp_path), version), {}
+        return models
+
+    monkeypatch.setattr(service, "ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(service, "MODELS_DIR", str(tmp_path))
+    monkeypatch.setattr(service, "load_model_set", load_model_set)
+    monkeypatch.setattr(service, "ACTIVE_MODELS", copy.copy(active))
+    service.ACTIVE_MODELS.version = 1
+    yield lambda method, path, **kw: client.request(method, path, headers={"X-Admin-Token": TOKEN}, **kw)
+    service.SHADOW.stop()
+    service.CANDIDATE = None
+    service.CANDIDATE_STATE.clear()
+    service.CACHE.rewatch(cache_paths)
+
+
+def wait_for_candidate(admin):
+    wait_for(lambda: admin("GET", "/admin/models").json()["candidate"]["status"] != "loading")
+    return admin("GET", "/admin/models").json()
+
+
+def test_shadow_then_activate_then_rollback(admin, client, service):
+    swaps = service.MODEL_SWAPS_TOTAL.value
+    cache_version = service.CACHE.version
+
+    status = admin("POST", "/admin/models/2/load", json={"shadow_rate": 1.0})
+    assert status.status_code == 202
+    assert status.json()["available_versions"] == [1, 2]
+    status = wait_for_candidate(admin)
+    assert status["candidate"]["status"] == "ready" and status["active_version"] == 1
+
+    # Live traffic is served by v1 and scored by v2 in shadow (same weights: full agreement)
+    for seed in range(3):
+        body = {"expected_char": "Aa", "strokes": to_strokes(letter(200 + seed), 2)}
+        assert client.post("/evaluate", json=body).status_code == 200
+    wait_for(lambda: admin("GET", "/admin/models").json()["shadow"]["compared"] == 3)
+    shadow = admin("GET", "/admin/models").json()["shadow"]
+    assert (shadow["version"], shadow["label_agreement"], shadow["quality_max_abs_delta"]) == (2, 1.0, 0.0)
+
+    status = admin("POST", "/admin/models/activate").json()
+    assert (status["active_version"], status["previous_version"], status["candidate"]) == (2, 1, None)
+    assert status["shadow"]["active"] is False
+    assert service.CACHE.version != cache_version
+    assert service.MODEL_SWAPS_TOTAL.value == swaps + 1
+
+    # Rollback = load the previous version with activate
+    assert admin("POST", "/admin/models/1/load", json={"activate": True}).status_code == 202
+    wait_for(lambda: admin("GET", "/admin/models").json()["active_version"] == 1)
+    assert service.MODEL_SWAPS_TOTAL.value == swaps + 2
+    assert client.post("/evaluate", json={"expected_char": "Aa", "strokes": to_strokes(letter(203), 2)}).status_code == 200
+
+
+def test_admin_errors(admin, client, service):
+    assert client.get("/admin/models", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert admin("POST", "/admin/models/activate").status_code == 409      # no candidate
+    assert admin("POST", "/admin/models/1/load").status_code == 409        # already active
+    assert admin("POST", "/admin/models/9/load").status_code == 404        # no artifacts
+    assert admin("POST", "/admin/models/2/load").status_code == 202
+    assert wait_for_candidate(admin)["candidate"]["status"] == "ready"
+    assert admin("DELETE", "/admin/models/candidate").json()["candidate"] is None
+    assert admin("POST", "/admin/models/activate").status_code == 409
+
+
+def test_admin_api_is_hidden_without_a_token(client, service, monkeypatch):
+    monkeypatch.setattr(service, "ADMIN_TOKEN", "")
+    assert client.get("/admin/models", headers={"X-Admin-Token": ""}).status_code == 404
@@ -0,0 +1,78 @@
+"""
+Columnar payload (app/payload.py) parity with the legacy dict payload, and the
+game backend's stdlib encoder pinned to `encode_columnar`.
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from app.payload import decode_columnar, decode_columnar_strokes, encode_columnar
+from app.utils import arc_length, preprocess_data, resample_path
+
+GAME_ENCODER = os.path.join(os.path.dirname(__file__), "..", "..", "..",
+                            "game_backend", "app", "services", "stroke_payload.py")
+
+
+def make_strokes(seed, n_strokes=2, n_points=40, deltas=True):
+    rng = np.random.default_rng(seed)
+    strokes = []
+    for _ in range(n_strokes):
+        x, y = rng.uniform(150, 450, size=2)
+        stroke = []
+        for _ in range(n_points):
+            dx, dy = rng.normal(0, 4, size=2)
+            x, y = x + dx, y + dy
+            point = {"x": float(x), "y": float(y), "p": 0}
+            if deltas:
+                point.update(dx=float(dx), dy=float(dy))
+            stroke.append(point)
+        strokes.append(stroke)
+    strokes[-1][-1]["p"] = 1
+    return strokes
+
+
+def columnar_input(fields):
+    """/evaluate's columnar path: decode_columnar -> resample_path (main.preprocess_submission)."""
+    path, n_strokes = decode_columnar(**fields)
+    return resample_path(path, arc_length(path)), n_strokes
+
+
+@pytest.mark.parametrize("deltas", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_columnar_matches_legacy(seed, deltas):
+    strokes = make_strokes(seed, deltas=deltas)
+    legacy, _ = preprocess_data(strokes)
+    processed, n_strokes = columnar_input(encode_columnar(strokes))
+    assert n_strokes == len(strokes)
+    assert np.array_equal(legacy, processed)
+
+
+def test_missing_dx_dy_columns_are_zero():
+    strokes = make_strokes(7, deltas=False)
+    fields = encode_columnar(strokes)
+    del fields["dx"], fields["dy"]
+    path, _ = decode_columnar(**fields)
+    assert not path[:, 2:4].any()
+    legacy, _ = preprocess_data(strokes)
+    assert np.array_equal(legacy, columnar_input(fields)[0])
+
+
+def test_strokes_split_at_offsets():
+    strokes = make_strokes(3, n_strokes=3)
+    paths = decode_columnar_strokes(**encode_columnar(strokes))
+    assert [len(p) for p in paths] == [len(s) for s in strokes]
+    assert paths[1][0, 0] == np.float32(strokes[1][0]["x"])
+
+
+@pytest.mark.skipif(not os.path.exists(GAME_ENCODER), reason="game_backend is not checked out next to the service")
+@pytest.mark.parametrize("deltas", [True, False])
+def test_game_backend_encoder_matches(deltas):
+    spec = importlib.util.spec_from_file_location("stroke_payload", GAME_ENCODER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    strokes = make_strokes(11, deltas=deltas) + [[]]
+    assert module.encode_columnar_strokes(strokes) == encode_columnar(strokes, "float32")
@@ -0,0 +1,108 @@
+"""
+utils.preprocess_batch / preprocess_paths must be bit-for-bit equal to the per-sample
+preprocess_data (resample_padded re-implements np.cumsum / linspace / interp in batch).
+"""
+
+import numpy as np
+import pytest
+
+from app.utils import preprocess_batch, preprocess_data, preprocess_paths, strokes_to_path
+
+from benchmarks.preprocess_batch import parity_set
+
+
+def point(x, y, p=0):
+    return {"x": x, "y": y, "dx": 0, "dy": 0, "p": p}
+
+
+def assert_parity(drawings):
+    batch, valid = preprocess_batch(drawings)
+    assert batch.shape == (len(drawings), 150, 5) and batch.dtype == np.float32
+    for i, strokes in enumerate(drawings):
+        ref, _ = preprocess_data(strokes)
+        if ref is None:
+            assert not valid[i], i
+            assert not batch[i].any(), i
+        else:
+            assert valid[i], i
+            # Bit patterns: NaN and -0.0 must match too
+            assert np.array_equal(ref.astype("float32").view(np.uint32), batch[i].view(np.uint32)), i
+
+
+def random_walk(rng, n_points, n_strokes=1, step=4.0):
+    strokes = []
+    for size in np.array_split(np.arange(n_points), n_strokes):
+        x, y = rng.uniform(100, 500, size=2)
+        stroke = []
+        for _ in size:
+            dx, dy = rng.normal(0, step, size=2)
+            x, y = x + dx, y + dy
+            stroke.append({"x": float(x), "y": float(y), "dx": float(dx), "dy": float(dy), "p": 0})
+        strokes.append(stroke)
+    return strokes
+
+
+@pytest.mark.parametrize("name, drawings", parity_set(150, [10, 25, 100], seed=0), ids=lambda v: v if isinstance(v, str) else "")
+def test_synthetic_letters(name, drawings):
+    assert_parity(drawings)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_seeded_fuzz(seed):
+    rng = np.random.default_rng(seed)
+    drawings = [random_walk(rng, int(rng.integers(1, 400)), int(rng.integers(1, 4)), float(rng.choice([0.01, 1, 10])))
+                for _ in range(200)]
+    assert_parity(drawings)
+
+
+def test_empty_strokes():
+    assert_parity([[], [[]], [[], []], [[], [point(1, 1)] * 6]])
+
+
+def test_single_point():
+    assert_parity([[[point(10, 10)]], [[point(0, 0)]], [[point(10.5, 3.25, 1)]]])
+
+
+def test_too_few_points_boundary():
+    line = [point(float(i), float(2 * i)) for i in range(6)]
+    assert_parity([[line[:k]] for k in range(7)])
+
+
+def test_zero_length_segments():
+    rng = np.random.default_rng(1)
+    walk = random_walk(rng, 60)[0]
+    # Consecutive duplicates inside the stroke: zero-length segments of the arc-length
+    drawings = [[[p for p in walk for _ in range(k)]] for k in (2, 3)]
+    drawings.append([walk[:10] + [walk[9]] * 20 + walk[10:]])
+    drawings.append([[point(5, 5)] * 30])                       # all repeated: total length 0
+    drawings.append([[point(5, 5)] * 10 + [point(5, 6)]])       # one tiny segment at the end
+    assert_parity(drawings)
+
+
+def test_repeated_points_across_strokes():
+    stroke = [point(100.0 + i, 200.0) for i in range(20)]
+    assert_parity([[stroke, stroke], [stroke, list(reversed(stroke))], [stroke, [stroke[-1]] * 5, stroke]])
+
+
+@pytest.mark.parametrize("n_points", [149, 150, 151, 1000, 5000])
+def test_longer_than_150_points(n_points):
+    rng = np.random.default_rng(n_points)
+    assert_parity([random_walk(rng, n_points, n_strokes) for n_strokes in (1, 2, 5)])
+
+
+def test_non_finite_coordinates():
+    walk = random_walk(np.random.default_rng(2), 30)[0]
+    with np.errstate(invalid="ignore", over="ignore"):
+        assert_parity([[walk[:10] + [point(np.inf, 1.0)] + walk[10:]],
+                       [walk[:10] + [point(np.nan, 1.0)] + walk[10:]]])
+
+
+def test_mixed_batch_and_columnar_paths():
+    rng = np.random.default_rng(3)
+    drawings = [random_walk(rng, 80, 2), [[point(1, 1)]], [], random_walk(rng, 300, 3), [[point(2, 2)] * 9]]
+    assert_parity(drawings)
+    # preprocess_paths (columnar / bulk) == preprocess_batch on the same raw paths
+    batch, valid = preprocess_batch(drawings)
+    paths_batch, paths_valid = preprocess_paths([strokes_to_path(d) for d in drawings])
+    assert np.array_equal(valid, paths_valid)
+    assert np.array_equal(batch.view(np.uint32), paths_batch.view(np.uint32))
@@ -0,0 +1,86 @@
+"""PrototypeIndex (app/prototypes.py): register / remove, scores, and the save / load round-trip."""
+
+import numpy as np
+import pytest
+
+from app.prototypes import PrototypeIndex, build_index, index_path
+
+DIM = 16
+
+
+def cluster(centre, n=5, seed=0):
+    """`n` embeddings around the unit vector e_centre."""
+    rng = np.random.default_rng(seed)
+    x = np.zeros((n, DIM), dtype=np.float32)
+    x[:, centre] = 1.0
+    return x + rng.normal(0, 0.05, (n, DIM)).astype(np.float32)
+
+
+def index_of(*labels, max_exemplars=64):
+    index = PrototypeIndex(DIM, max_exemplars=max_exemplars)
+    for k, label in enumerate(labels):
+        index.register(label, cluster(k, seed=k))
+    return index
+
+
+def test_register_and_classify():
+    index = index_of("A", "Aa", "Ka")
+    assert index.labels == ["A", "Aa", "Ka"]
+    queries = np.concatenate([cluster(k, n=3, seed=10 + k) for k in range(3)])
+    np.testing.assert_array_equal(index.classify(queries), [0, 0, 0, 1, 1, 1, 2, 2, 2])
+    probs = index.probabilities(queries)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_register_appends_keeps_newest_and_replaces():
+    index = PrototypeIndex(DIM, max_exemplars=8)
+    assert index.register("A", cluster(0, n=5)) == 5
+    assert index.register("A", cluster(0, n=5, seed=1)) == 8
+    assert index.register("A", cluster(0, n=2, seed=2), replace=True) == 2
+    with pytest.raises(ValueError, match=f"Expected \\(n, {DIM}\\)"):
+        index.register("B", np.zeros((3, DIM + 1)))
+    assert index.labels == ["A"]
+
+
+def test_remove_keeps_label_indices_stable():
+    index = index_of("A", "Aa", "Ka")
+    assert index.remove("Aa") is True
+    assert index.remove("Aa") is False
+    assert index.labels == ["A", "Aa", "Ka"] and index.active_labels == ["A", "Ka"]
+    scores = index.scores(cluster(1, n=2, seed=5))
+    assert np.all(np.isneginf(scores[:, 1]))
+    assert set(index.classify(cluster(2, n=3, seed=6))) == {2}
+
+    index.remove("A")
+    with pytest.raises(ValueError, match="last label"):
+        index.remove("Ka")
+    with pytest.raises(RuntimeError, match="no labels"):
+        PrototypeIndex(DIM).classify(cluster(0))
+
+
+def test_save_load_round_trip(tmp_path):
+    index = index_of("A", "Aa", "Ka")
+    index.register("Nw", cluster(3, seed=3), symbol="ඥ", strokes=3)
+    index.remove("Aa")
+    path = index_path(str(tmp_path), 2)
+    index.save(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["prototypes_v2.npz"]
+
+    loaded = PrototypeIndex.load(path)
+    assert loaded.labels == index.labels
+    assert loaded.meta == {"Nw": {"symbol": "ඥ", "strokes": 3}}
+    assert loaded.stats() == index.stats()
+    queries = np.concatenate([cluster(k, n=3, seed=20 + k) for k in range(4)])
+    np.testing.assert_array_equal(loaded.scores(queries), index.scores(queries))
+
+    # A smaller exemplar cap on load keeps the newest exemplars
+    capped = PrototypeIndex.load(path, max_exemplars=2)
+    assert capped.stats()["exemplars"] == {"A": 2, "Ka": 2, "Nw": 2}
+
+
+def test_build_index_groups_by_label():
+    labels = ["A", "Ka", "A", "Ka", "A"]
+    embeddings = np.stack([cluster(0 if label == "A" else 1, n=1, seed=i)[0] for i, label in enumerate(labels)])
+    index = build_index(labels, embeddings, max_exemplars=64)
+    assert index.labels == ["A", "Ka"]
+    assert index.stats()["exemplars"] == {"A": 3, "Ka": 2}
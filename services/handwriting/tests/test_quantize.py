@@ -0,0 +1,37 @@
+"""Publishing gated TFLite variants (app/quantize.py): a rejected variant leaves nothing behind."""
+
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from app.quantize import publish
+
+
+def stage(tmp_path, published):
+    staged = {}
+    for name in ("char_v1_int8.tflite", "qual_v1_int8.tflite"):
+        final = tmp_path / name
+        if published:
+            final.write_bytes(b"old")
+        (tmp_path / (name + ".tmp")).write_bytes(b"new")
+        staged[str(final)] = str(final) + ".tmp"
+    return staged
+
+
+def test_passed_variant_replaces_the_published_files(tmp_path):
+    staged = stage(tmp_path, published=True)
+    assert publish(staged, passed=True) == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["char_v1_int8.tflite", "qual_v1_int8.tflite"]
+    assert all(p.read_bytes() == b"new" for p in tmp_path.iterdir())
+
+
+def test_rejected_variant_unpublishes_stale_files(tmp_path):
+    staged = stage(tmp_path, published=True)
+    assert publish(staged, passed=False) == list(staged)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejected_first_run_removes_the_staged_files(tmp_path):
+    staged = stage(tmp_path, published=False)
+    assert publish(staged, passed=False) == []
+    assert list(tmp_path.iterdir()) == []
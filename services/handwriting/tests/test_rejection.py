@@ -0,0 +1,122 @@
+"""Rejection cascade (app/rejection.py): each rule on its drawing, defaults, and the "retry" answers."""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.rejection import RULES, RejectionCascade, path_features
+from app.utils import strokes_to_path
+
+from drawings import dot, letter, line, scribble, tap, to_strokes, wiggle
+
+# The suggested thresholds (rejection.py docstring), every rule on
+TUNED = dict(min_points=8, min_arc_length=25.0, min_extent=15.0, max_aspect=25.0, max_ink_ratio=20.0,
+             max_stroke_delta=3)
+ALL_OFF = dict.fromkeys(TUNED, 0)
+
+
+def features(points, n_strokes=1):
+    strokes = to_strokes(points, n_strokes)
+    return path_features(strokes_to_path(strokes), len(strokes))
+
+
+@pytest.mark.parametrize("rule, points, n_strokes, expected_strokes", [
+    ("min_points", dot(), 1, 1),
+    ("min_arc_length", tap(), 1, 1),
+    ("min_extent", wiggle(), 1, 1),
+    ("max_aspect", line(), 1, 1),
+    ("max_ink_ratio", scribble(), 1, 1),
+    ("max_stroke_delta", letter(), 6, 1),
+])
+def test_each_rule_fires_on_its_drawing(rule, points, n_strokes, expected_strokes):
+    f = features(points, n_strokes)
+    # The tuned cascade stops at this rule (earlier rules let the drawing through)...
+    assert RejectionCascade(**TUNED).check(f, expected_strokes) == rule
+    # ...and the rule fires on its own
+    assert RejectionCascade(**dict(ALL_OFF, **{rule: TUNED[rule]})).check(f, expected_strokes) == rule
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_letter_passes_every_rule(seed):
+    cascade = RejectionCascade(**TUNED)
+    assert cascade.check(features(letter(seed), 2), 2) is None
+    assert cascade.stats()["rejected"] == 0
+
+
+def test_unknown_expected_strokes_skips_stroke_rule():
+    assert RejectionCascade(**TUNED).check(features(letter(), 6), None) is None
+
+
+def test_zero_disables_every_rule():
+    cascade = RejectionCascade(**ALL_OFF)
+    assert not cascade.enabled
+    assert cascade.check(features(dot())) is None
+
+
+def test_defaults_only_reject_too_few_points(monkeypatch):
+    for name in ("MIN_POINTS", "MIN_ARC_PX", "MIN_EXTENT_PX", "MAX_ASPECT", "MAX_INK_RATIO", "MAX_STROKE_DELTA"):
+        monkeypatch.delenv(f"HW_REJECT_{name}", raising=False)
+    cascade = RejectionCascade.from_env()
+    assert [name for name in RULES if cascade.thresholds[name]] == ["min_points"]
+    assert cascade.check(features(dot()), 1) == "min_points"
+    for points, n_strokes in ((tap(), 1), (wiggle(), 1), (line(), 1), (scribble(), 1), (letter(), 6)):
+        assert cascade.check(features(points, n_strokes), 1) is None
+
+
+def test_stats_count_hits_per_rule():
+    cascade = RejectionCascade(**TUNED)
+    for points in (dot(), dot(), line(), letter()):
+        cascade.check(features(points), 1)
+    stats = cascade.stats()
+    assert stats["checked"] == 4 and stats["rejected"] == 3
+    assert stats["hits"]["min_points"] == 2 and stats["hits"]["max_aspect"] == 1
+    assert stats["rejected_ratio"] == 0.75
+
+
+def test_empty_drawing_features():
+    f = path_features(np.zeros((0, 5), dtype=np.float32), 0)
+    assert f["n_points"] == 0 and f["arc_length"] == 0.0
+    assert RejectionCascade().check(f) == "min_points"
+
+
+# -----------------------------------------------------------------------------
+# "retry" answers of the endpoints (default cascade: min_points only)
+# -----------------------------------------------------------------------------
+
+def assert_retry_analysis(analysis, rule="min_points"):
+    assert analysis["retry"] is True and analysis["retry_reason"] == rule
+    assert analysis["is_correct_letter"] is False
+    assert analysis["identified_letter_label"] is None and analysis["identified_letter_symbol"] is None
+    assert analysis["quality_percentage"] is None and analysis["is_quality_pass"] is None
+
+
+def test_evaluate_answers_retry(client):
+    before = client.get("/stats").json()["rejection"]
+    body = client.post("/evaluate", json={"expected_char": "Aa", "strokes": to_strokes(dot())}).json()
+    assert body["status"] == "retry"
+    assert_retry_analysis(body["analysis"])
+    assert body["analysis"]["strokes_actual"] == 1
+
+    scored = client.post("/evaluate", json={"expected_char": "Aa", "strokes": to_strokes(letter(), 2)}).json()
+    assert scored["status"] == "success" and "retry" not in scored["analysis"]
+    after = client.get("/stats").json()["rejection"]
+    assert after["checked"] == before["checked"] + 2
+    assert after["hits"]["min_points"] == before["hits"]["min_points"] + 1
+
+
+def test_evaluate_batch_answers_retry_per_item(client):
+    items = [{"id": 1, "expected_char": "Aa", "strokes": to_strokes(letter(), 2)},
+             {"id": 2, "expected_char": "Aa", "strokes": to_strokes(dot())}]
+    rows = [json.loads(line) for line in client.post("/evaluate_batch", json=items).text.splitlines()]
+    assert [(r["id"], r["status"]) for r in rows] == [(1, "success"), (2, "retry")]
+    assert_retry_analysis(rows[1]["analysis"])
+
+
+def test_evaluate_word_answers_retry_per_character(client):
+    strokes = to_strokes(letter(1)) + to_strokes(dot() + [400, 0]) + to_strokes(letter(2) + [500, 0])
+    body = client.post("/evaluate_word", json={"expected_chars": ["O", "O", "O"], "strokes": strokes}).json()
+    assert [c["status"] for c in body["characters"]] == ["success", "retry", "success"]
+    assert_retry_analysis(body["characters"][1]["analysis"])
+    assert body["word"]["identified_word_symbols"][1] == "?"
+    assert body["word"]["is_correct_word"] is False
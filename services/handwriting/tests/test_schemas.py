@@ -0,0 +1,41 @@
+"""Request schemas (app/schemas.py): exactly one stroke format per submission, 422 otherwise."""
+
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas import BatchItem, LevelSubmission, WordSubmission
+
+from drawings import letter, to_strokes
+
+COLUMNAR = {"x": "", "y": "", "offsets": ""}
+
+
+@pytest.mark.parametrize("schema, fields", [
+    (LevelSubmission, {"expected_char": "Aa"}),
+    (WordSubmission, {"expected_chars": ["Aa"]}),
+    (BatchItem, {"id": 1, "expected_char": "Aa"}),
+])
+def test_exactly_one_stroke_format(schema, fields):
+    assert schema(**fields, strokes=[[{"x": 0, "y": 0, "dx": 0, "dy": 0, "p": 1}]]).columnar_strokes is None
+    assert schema(**fields, strokes=[]).strokes == []
+    assert schema(**fields, columnar_strokes=COLUMNAR).strokes == []
+    for strokes in ({}, {"strokes": [[]], "columnar_strokes": COLUMNAR}):
+        with pytest.raises(ValidationError, match="exactly one of 'strokes' or 'columnar_strokes'"):
+            schema(**fields, **strokes)
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/evaluate", {"expected_char": "Aa"}),
+    ("/evaluate_word", {"expected_chars": ["Aa"]}),
+])
+def test_missing_strokes_is_422(client, path, body):
+    assert client.post(path, json=body).status_code == 422
+
+
+def test_batch_item_without_strokes_is_an_error_row(client):
+    items = [{"id": 1, "expected_char": "Aa"}, {"id": 2, "expected_char": "Aa", "strokes": to_strokes(letter(), 2)}]
+    rows = [json.loads(line) for line in client.post("/evaluate_batch", json=items).text.splitlines()]
+    assert [(r["id"], r["status"]) for r in rows] == [(1, "error"), (2, "success")]
+    assert "exactly one of" in rows[0]["detail"]
@@ -0,0 +1,78 @@
+"""Word segmentation (app/segment.py): the DP against brute force, gaps vs stroke counts, recentring."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from app.segment import COUNT_WEIGHT, GAP_WEIGHT, recentre, segment_word, stroke_gaps
+
+
+def box(x0, x1, y0=0.0, y1=100.0, n=10):
+    """A stroke spanning [x0, x1] x [y0, y1] as a (n, 5) path."""
+    path = np.zeros((n, 5), dtype="float32")
+    path[:, 0] = np.linspace(x0, x1, n)
+    path[:, 1] = np.linspace(y0, y1, n)
+    return path
+
+
+def cost(runs, gaps, expected_counts):
+    total = sum(COUNT_WEIGHT * abs((j - i) - e) for (i, j), e in zip(runs, expected_counts))
+    return total - sum(GAP_WEIGHT * gaps[i] for i, _ in runs[1:])
+
+
+def all_segmentations(n_strokes, n_chars):
+    for cuts in itertools.combinations(range(1, n_strokes), n_chars - 1):
+        bounds = (0,) + cuts + (n_strokes,)
+        yield list(zip(bounds[:-1], bounds[1:]))
+
+
+def test_stroke_gaps_are_relative_to_everything_drawn_before():
+    strokes = [box(0, 100), box(50, 80), box(150, 200), box(-500, -400)]
+    gaps = stroke_gaps(strokes)
+    # height 100: overlap -> negative, 50 px right of the reach (100) -> 0.5, far left -> clipped to -1
+    np.testing.assert_allclose(gaps, [0.0, -0.5, 0.5, -1.0])
+
+
+def test_counts_and_gaps_agree():
+    # Characters of 1, 2 and 1 strokes; the second one's strokes overlap
+    strokes = [box(0, 100), box(200, 300), box(220, 280), box(400, 500)]
+    assert segment_word(strokes, [1, 2, 1]) == [(0, 1), (1, 3), (3, 4)]
+
+
+def test_gap_outweighs_a_wrong_stroke_count():
+    # config.json says one stroke each, but the first letter was written with two overlapping strokes
+    strokes = [box(0, 100), box(20, 90), box(300, 400)]
+    assert segment_word(strokes, [1, 1]) == [(0, 2), (2, 3)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dp_finds_the_cheapest_segmentation(seed):
+    rng = np.random.default_rng(seed)
+    n_strokes = int(rng.integers(2, 8))
+    n_chars = int(rng.integers(1, n_strokes + 1))
+    strokes = [box(x, x + rng.uniform(10, 120), 0, rng.uniform(50, 150)) for x in rng.uniform(0, 600, n_strokes)]
+    expected_counts = rng.integers(1, 4, n_chars).tolist()
+
+    runs = segment_word(strokes, expected_counts)
+    gaps = stroke_gaps(strokes)
+    assert runs[0][0] == 0 and runs[-1][1] == n_strokes
+    assert all(i < j for i, j in runs)
+    assert all(a[1] == b[0] for a, b in zip(runs, runs[1:]))
+    best = min(cost(r, gaps, expected_counts) for r in all_segmentations(n_strokes, n_chars))
+    assert cost(runs, gaps, expected_counts) == pytest.approx(best)
+
+
+def test_fewer_strokes_than_characters():
+    with pytest.raises(ValueError, match="2 strokes but 3 characters"):
+        segment_word([box(0, 10), box(20, 30)], [1, 1, 1])
+
+
+def test_recentre_moves_the_bounding_box_centre_only():
+    path = box(10, 110, 400, 500)
+    path[:, 2:4] = 3.0
+    centred = recentre(path)
+    assert centred[:, 0].min() + centred[:, 0].max() == pytest.approx(600)
+    assert centred[:, 1].min() + centred[:, 1].max() == pytest.approx(600)
+    np.testing.assert_array_equal(centred[:, 2:], path[:, 2:])
+    assert path[0, 0] == 10  # input untouched
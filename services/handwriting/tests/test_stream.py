@@ -0,0 +1,102 @@
+"""/ws/evaluate (app/stream.py + the WebSocket in main.py): incremental buffer parity and the message protocol."""
+
+import numpy as np
+import pytest
+
+from app.stream import StrokeBuffer
+from app.utils import preprocess_data
+
+from drawings import dot, letter, scribble, to_strokes
+
+
+def stream_strokes(buffer, strokes, chunk=7):
+    for stroke in strokes:
+        buffer.start_stroke()
+        for i in range(0, len(stroke), chunk):
+            buffer.extend(stroke[i:i + chunk])
+
+
+@pytest.mark.parametrize("strokes", [to_strokes(letter(3), 1), to_strokes(letter(4), 3), to_strokes(scribble(), 2)])
+@pytest.mark.parametrize("chunk", [1, 7, 1000])
+def test_buffer_matches_preprocess_data_bit_for_bit(strokes, chunk):
+    buffer = StrokeBuffer()
+    stream_strokes(buffer, strokes, chunk)
+    expected, _ = preprocess_data(strokes)
+    assert buffer.n_strokes == len(strokes)
+    assert np.array_equal(buffer.processed().view(np.uint32), expected.view(np.uint32))
+
+
+def test_buffer_errors_and_reset():
+    buffer = StrokeBuffer(max_points=10, capacity=2)
+    buffer.extend(to_strokes(letter(n=8))[0])
+    assert (buffer.n_points, buffer.n_strokes) == (8, 1)  # no pen_down: one stroke
+    with pytest.raises(ValueError, match="exceeds 10 points"):
+        buffer.extend(to_strokes(letter(n=3))[0])
+    with pytest.raises(ValueError, match="numeric values"):
+        buffer.extend([{"x": "left"}])
+    assert buffer.n_points == 8
+    buffer.reset()
+    assert (buffer.n_points, buffer.n_strokes, buffer.processed()) == (0, 0, None)
+
+
+def draw(ws, strokes, chunk=20):
+    for stroke in strokes:
+        ws.send_json({"type": "pen_down"})
+        for i in range(0, len(stroke), chunk):
+            ws.send_json({"type": "points", "points": stroke[i:i + chunk]})
+        ws.send_json({"type": "pen_up"})
+
+
+def test_session_result_matches_evaluate(client):
+    strokes = to_strokes(letter(5), 2)
+    expected = client.post("/evaluate", json={"expected_char": "Aa", "strokes": strokes}).json()
+    with client.websocket_connect("/ws/evaluate") as ws:
+        # Two drawings on one connection: `end` readies it for the next `start`
+        for _ in range(2):
+            ws.send_json({"type": "start", "expected_char": "Aa", "top_k": 0})
+            draw(ws, strokes)
+            ws.send_json({"type": "end"})
+            message = ws.receive_json()
+            assert message == {"type": "result", "status": "success", "analysis": expected["analysis"]}
+
+
+def test_guesses_while_drawing(client, service, monkeypatch):
+    monkeypatch.setattr(service, "WS_GUESS_INTERVAL_MS", 0.001)
+    with client.websocket_connect("/ws/evaluate") as ws:
+        ws.send_json({"type": "start", "expected_char": "Aa", "top_k": 2})
+        ws.send_json({"type": "points", "points": to_strokes(letter(6))[0]})
+        guess = ws.receive_json()
+        assert guess["type"] == "guess" and guess["points"] == 80
+        assert len(guess["top_k"]) == 2
+        assert guess["top_k"][0]["probability"] >= guess["top_k"][1]["probability"]
+        assert set(guess["top_k"][0]) == {"label", "symbol", "probability"}
+        ws.send_json({"type": "end"})
+        assert ws.receive_json()["type"] == "result"
+
+
+def test_rejected_drawing_answers_retry(client):
+    with client.websocket_connect("/ws/evaluate") as ws:
+        ws.send_json({"type": "start", "expected_char": "Aa", "top_k": 0})
+        draw(ws, to_strokes(dot()))
+        ws.send_json({"type": "end"})
+        message = ws.receive_json()
+        assert (message["type"], message["status"]) == ("result", "retry")
+        assert message["analysis"]["retry_reason"]
+
+
+@pytest.mark.parametrize("messages, detail", [
+    ([{"type": "points", "points": []}], "Send a 'start' message first."),
+    ([{"type": "start"}], "expected_char"),
+    ([{"type": "start", "expected_char": "Aa"}, {"type": "wave"}], "Unknown message type: 'wave'"),
+    ([{"type": "start", "expected_char": "Aa"}, {"type": "points", "points": [{"x": []}]}], "numeric values"),
+])
+def test_protocol_errors_keep_the_connection_open(client, messages, detail):
+    with client.websocket_connect("/ws/evaluate") as ws:
+        for message in messages:
+            ws.send_json(message)
+        error = ws.receive_json()
+        assert (error["type"], error["status_code"]) == ("error", 400)
+        assert detail in error["detail"]
+
+        ws.send_text("not json")
+        assert ws.receive_json()["detail"] == "Messages must be JSON objects."
@@ -0,0 +1,199 @@
+"""
+@File: api.py
+@Description: Headless FastAPI pronunciation API (POST /analyze) for the game backend.
+
+The game backend posts the student's recording and the name of the teacher
+clip (multipart: `student_audio`, `target_audio_name`) and reads `accuracy`
+and `verdict` from the JSON answer. Unlike app.py this path never imports
+Gradio and never writes the upload to disk: the bytes are decoded in memory
+(soundfile), resampled only when they are not already 16 kHz (soxr), and the
+teacher embedding comes from the reference embedding store.
+
+    uvicorn api:app --host 0.0.0.0 --port 7860
+
+Raw PCM (16-bit little-endian mono) is accepted with a `sample_rate` form
+field, or with an `audio/L16; rate=...` / `audio/pcm` content type.
+
+Every forward pass (student clips and reference-store misses) goes through
+the length-bucketed batcher (batching.py), so concurrent students share
+padded forward passes instead of queueing one clip at a time.
+"""
+
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import numpy as np
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+import phononet
+from batching import LengthBucketBatcher
+from embedding_store import EmbeddingStore
+
+# ==========================================
+# 1. සැකසුම් (Environment)
+# ==========================================
+REFERENCE_DIR = os.getenv("PRON_REFERENCE_DIR", "reference_audio")
+MAX_UPLOAD_BYTES = int(os.getenv("PRON_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Forward passes එකවර එකක් (torch already uses every core for one pass)
+INFERENCE_WORKERS = int(os.getenv("PRON_INFERENCE_WORKERS", "1"))
+# Length-bucketed batching: clips per forward pass, wait for a bucket to fill, bucket edges (seconds)
+BATCH_MAX_SIZE = int(os.getenv("PRON_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("PRON_BATCH_MAX_WAIT_MS", "20"))
+BATCH_BUCKETS_S = tuple(float(s) for s in os.getenv("PRON_BATCH_BUCKETS_S", "1,1.5,2,3,5").split(",") if s.strip())
+RAW_PCM_TYPES = ("audio/l16", "audio/pcm", "audio/x-pcm")
+
+READY = False
+STARTUP_ERROR = None
+STARTUP_TIMINGS = {}
+model = MODEL_VERSION = STORE = None
+INFERENCE = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="pron-infer")
+BATCHER = LengthBucketBatcher(lambda speeches: phononet.embed_batch(model, speeches),
+                              max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                              bucket_edges_s=BATCH_BUCKETS_S, sample_rate=phononet.SAMPLE_RATE,
+                              executor=INFERENCE, slots=INFERENCE_WORKERS)
+
+# ==========================================
+# 2. Startup: model + embedding store + warm-up
+# ==========================================
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Model එක පූරණය කර එක් warm-up forward pass එකක් ධාවනය කරයි. අසාර්ථක වුවහොත්
+    process එක ජීවත්ව තබා /readyz 503 ලබා දෙයි.
+    """
+    global READY, STARTUP_ERROR, STARTUP_TIMINGS, model, MODEL_VERSION, STORE
+    t0 = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        model, MODEL_VERSION = phononet.load_model()
+        STORE = EmbeddingStore(dim=phononet.EMBEDDING_DIM)
+        STARTUP_TIMINGS["load_model"] = round(time.perf_counter() - t, 3)
+        t = time.perf_counter()
+        phononet.embed_speech(model, np.random.default_rng(0).normal(0, 0.1, phononet.SAMPLE_RATE).astype(np.float32))
+        STARTUP_TIMINGS["warm_up"] = round(time.perf_counter() - t, 3)
+        READY = True
+        print(f"✅ Pronunciation model loaded ({MODEL_VERSION})")
+    except Exception as e:
+        STARTUP_ERROR = f"{type(e).__name__}: {e}"
+        print(f"❌ Critical Error Loading Model: {e}")
+    STARTUP_TIMINGS["total"] = round(time.perf_counter() - t0, 3)
+    print(f"⏱️ Startup timings (s): {json.dumps(STARTUP_TIMINGS)}")
+
+    yield
+
+    READY = False
+    BATCHER.shutdown()
+    INFERENCE.shutdown(cancel_futures=True)
+
+app = FastAPI(title="Sinhala Mithuru Pronunciation API", lifespan=lifespan)
+
+# ==========================================
+# 3. Analysis
+# ==========================================
+def require_ready():
+    if not READY:
+        raise HTTPException(status_code=503, detail="Model is not loaded yet.", headers={"Retry-After": "5"})
+
+def reference_path(name):
+    """target_audio_name -> REFERENCE_DIR තුළ ඇති ගුරු clip එක (directory traversal නැත)."""
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid target_audio_name.")
+    path = os.path.join(REFERENCE_DIR, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"No reference audio named '{name}'.")
+    return path
+
+def pcm_rate(content_type, sample_rate):
+    """Raw PCM upload නම් එහි sample rate එක, නැතහොත් None (container format, soundfile decodes it)."""
+    if sample_rate:
+        return sample_rate
+    media_type, *params = [p.strip().lower() for p in (content_type or "").split(";")]
+    if media_type not in RAW_PCM_TYPES:
+        return None
+    for param in params:
+        key, _, value = param.partition("=")
+        if key.strip() == "rate" and value.strip().isdigit():
+            return int(value)
+    return phononet.SAMPLE_RATE
+
+def prepare_upload(data, rate):
+    """Upload bytes -> 16 kHz trimmed samples (HTTP 415 / 422 on bad audio)."""
+    try:
+        speech, sr = phononet.decode_audio(data, rate)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=f"{e} Send WAV / FLAC / OGG, or raw 16-bit PCM with sample_rate.")
+    try:
+        return phononet.prepare_speech(speech, sr)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def reference_embedding(path, loop):
+    """Worker thread: store එකෙන් ගුරු embedding එක; a miss is embedded through the batcher."""
+    compute = lambda p: asyncio.run_coroutine_threadsafe(BATCHER.submit(phononet.load_speech(p)), loop).result()
+    return STORE.get_or_compute(path, MODEL_VERSION, compute)
+
+# ==========================================
+# 4. Endpoints
+# ==========================================
+@app.post("/analyze")
+async def analyze(student_audio: UploadFile = File(...), target_audio_name: str = Form(...),
+                  sample_rate: Optional[int] = Form(None)):
+    """Student audio එක (memory තුළ) target_audio_name ගුරු clip එකට සසඳයි -> accuracy (%) + verdict."""
+    require_ready()
+    t0 = time.perf_counter()
+    teacher_path = reference_path(target_audio_name)
+    if sample_rate is not None and not 1000 <= sample_rate <= 192000:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 1000 and 192000.")
+    data = await student_audio.read(MAX_UPLOAD_BYTES + 1)
+    if not data:
+        raise HTTPException(status_code=400, detail="student_audio is empty.")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"student_audio is larger than {MAX_UPLOAD_BYTES} bytes.")
+    rate = pcm_rate(student_audio.content_type, sample_rate)
+
+    loop = asyncio.get_running_loop()
+    timings = {}
+    t = time.perf_counter()
+    speech = await loop.run_in_executor(None, prepare_upload, data, rate)
+    timings["decode"] = round((time.perf_counter() - t) * 1000, 2)
+
+    # ශිෂ්‍ය clip එක batcher හරහා, ගුරු embedding එක (store) සමගාමීව
+    t = time.perf_counter()
+    (emb_t, cached), emb_s = await asyncio.gather(
+        loop.run_in_executor(None, reference_embedding, teacher_path, loop), BATCHER.submit(speech))
+    timings["embed"] = round((time.perf_counter() - t) * 1000, 2)
+
+    raw_dist, accuracy, verdict = phononet.score(emb_t, emb_s)
+    timings["total"] = round((time.perf_counter() - t0) * 1000, 2)
+    return {
+        "accuracy": round(accuracy, 2),
+        "verdict": verdict,
+        "raw_distance": round(raw_dist, 4),
+        "reference_cached": cached,
+        "duration_s": round(len(speech) / phononet.SAMPLE_RATE, 3),
+        "timings_ms": timings,
+    }
+
+@app.get("/stats")
+async def stats():
+    return {"model_version": MODEL_VERSION, "batching": BATCHER.stats(),
+            "reference_store": STORE.stats() if STORE else None}
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: model පූරණය වී warm-up සම්පූර්ණ නම් පමණක් 200."""
+    body = {"ready": READY, "model_version": MODEL_VERSION, "startup_timings_s": STARTUP_TIMINGS}
+    if not READY:
+        body["error"] = STARTUP_ERROR
+        return JSONResponse(status_code=503, content=body)
+    return body
@@ -0,0 +1,140 @@
+"""
+@File: api_benchmark.py
+@Description: Startup time and per-request latency of api.py (/analyze) vs the Gradio path (app.py).
+
+Both paths load the same model (phononet.load_model) and score the same clips,
+so the numbers compare the serving paths only:
+
+    python api_benchmark.py --target අම්මා.wav --student student.wav --repeats 20
+
+- startup: a fresh process per path, interpreter start -> ready
+  (api: lifespan done and /readyz 200; gradio: `import app`, i.e. model loaded
+  and the Blocks UI built, without `demo.launch()`), then its first request.
+- latency: p50 / p95 over `--repeats` warm requests. api = POST /analyze with
+  the student bytes through an in-process TestClient; gradio =
+  app.analyze_pronunciation(teacher path, student path), the function the
+  button calls. Gradio's upload temp file and queue come on top of that, so
+  the Gradio numbers are a lower bound.
+
+It first checks phononet.frame_mask against transformers' own frame mask and
+that a single clip embeds the same with and without its attention mask.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+# ==========================================
+# 1. Frame mask check
+# ==========================================
+def check_frame_mask(seconds=(0.1, 0.5, 1.0, 2.37, 5.0)):
+    """frame_mask == backbone._get_feature_vector_attention_mask, and single-clip parity."""
+    import torch
+    from phononet import PROCESSOR, SAMPLE_RATE, frame_mask, load_model
+
+    model, _ = load_model(prefer_exported=False)
+    rng = np.random.default_rng(0)
+    speeches = [rng.normal(0, 0.1, int(s * SAMPLE_RATE)).astype(np.float32) for s in seconds]
+    inputs = PROCESSOR(speeches, sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True,
+                       return_attention_mask=True)
+    num_frames = int(model.backbone._get_feat_extract_output_lengths(inputs.input_values.shape[1]))
+    ours = frame_mask(model.config, inputs.attention_mask, num_frames)
+    theirs = model.backbone._get_feature_vector_attention_mask(num_frames, inputs.attention_mask)
+    single = PROCESSOR(speeches[2], sampling_rate=SAMPLE_RATE, return_tensors="pt", return_attention_mask=True)
+    with torch.inference_mode():
+        masked = model(single.input_values, single.attention_mask)
+        unmasked = model(single.input_values)
+    return {"frame_mask_identical": bool(torch.equal(ours.long(), theirs.long())),
+            "single_clip_max_abs_diff": float((masked - unmasked).abs().max())}
+
+# ==========================================
+# 2. Child process: one path
+# ==========================================
+def percentiles(latencies):
+    return {"p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1)}
+
+def run_api(spawned_at, target, student, repeats):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    with open(student, "rb") as f:
+        data = f.read()
+
+    def request():
+        response = client.post("/analyze", data={"target_audio_name": target},
+                               files={"student_audio": (os.path.basename(student), data, "audio/wav")})
+        response.raise_for_status()
+
+    with TestClient(api.app) as client:
+        if client.get("/readyz").status_code != 200:
+            raise RuntimeError(f"api.py is not ready: {api.STARTUP_ERROR}")
+        startup_s = time.time() - spawned_at
+        return startup_s, measure_requests(request, repeats)
+
+def run_gradio(spawned_at, target, student, repeats):
+    import app
+
+    startup_s = time.time() - spawned_at
+    teacher = os.path.join(os.getenv("PRON_REFERENCE_DIR", "reference_audio"), target)
+
+    def request():
+        html, labels = app.analyze_pronunciation(teacher, student)[:2]
+        if not labels:
+            raise RuntimeError(f"app.py failed: {html}")
+
+    return startup_s, measure_requests(request, repeats)
+
+def measure_requests(request, repeats):
+    latencies = []
+    for _ in range(repeats + 1):
+        t0 = time.perf_counter()
+        request()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {"first_ms": round(latencies[0], 1), **percentiles(latencies[1:])}
+
+# ==========================================
+# 3. Parent: both paths, fresh processes
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="api.py vs Gradio path: startup and per-request latency")
+    parser.add_argument("--target", required=True, help="teacher clip name in $PRON_REFERENCE_DIR")
+    parser.add_argument("--student", required=True, help="student recording (WAV)")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "SPAWNED_AT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run = run_api if args.child[0] == "api" else run_gradio
+        startup_s, latency = run(float(args.child[1]), args.target, args.student, args.repeats)
+        print(json.dumps({"path": args.child[0], "startup_s": round(startup_s, 2), **latency}))
+        return 0
+
+    report = {"repeats": args.repeats, "check": check_frame_mask(), "paths": []}
+    print(f"🔎 frame_mask identical: {report['check']['frame_mask_identical']}, "
+          f"single clip max |diff|: {report['check']['single_clip_max_abs_diff']:.2e}")
+    for path in ("gradio", "api"):
+        out = subprocess.run([sys.executable, __file__, "--child", path, repr(time.time()),
+                              "--target", args.target, "--student", args.student, "--repeats", str(args.repeats)],
+                             capture_output=True, text=True, check=True)
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        report["paths"].append(row)
+        print(f"📊 {path:<6} startup {row['startup_s']} s, first {row['first_ms']} ms, "
+              f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms")
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
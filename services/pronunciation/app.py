@@ -1,111 +1,39 @@
 import gradio as gr
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-import librosa
-import numpy as np
-import math
-import os
-from transformers import Wav2Vec2Model, Wav2Vec2Config, Wav2Vec2FeatureExtractor
-from huggingface_hub import hf_hub_download
+from phononet import EMBEDDING_DIM, get_emb, load_model, score
+from embedding_store import EmbeddingStore
 
 # ==========================================
-# 1. මොඩලයේ නිවැරදි ව්‍යුහය (Architecture)
+# 1. මොඩලය පූරණය කිරීම (ව්‍යුහය: phononet.py)
 # ==========================================
-class SelfAttentionPooling(nn.Module):
-    def __init__(self, input_dim):
-        super(SelfAttentionPooling, self).__init__()
-        self.W = nn.Linear(input_dim, 128)
-        self.V = nn.Linear(128, 1)
-
-    def forward(self, x, attention_mask=None):
-        scores = self.V(torch.tanh(self.W(x)))
-        if attention_mask is not None:
-            indices = torch.linspace(0, attention_mask.size(1) - 1, steps=x.size(1)).long().to(x.device)
-            mask = torch.index_select(attention_mask, 1, indices).unsqueeze(-1)
-            scores = scores.masked_fill(mask == 0, -1e4)
-        attn_weights = F.softmax(scores, dim=1)
-        return torch.sum(x * attn_weights, dim=1), attn_weights
-
-class SinhalaPhonoNet(nn.Module):
-    def __init__(self, base_model="facebook/wav2vec2-xls-r-300m", embedding_dim=256, num_classes=19):
-        super(SinhalaPhonoNet, self).__init__()
-        self.config = Wav2Vec2Config.from_pretrained(base_model, output_hidden_states=True)
-        self.backbone = Wav2Vec2Model.from_pretrained(base_model, config=self.config)
-        self.layer_weights = nn.Parameter(torch.ones(self.config.num_hidden_layers + 1))
-        self.attention = SelfAttentionPooling(self.config.hidden_size)
-        self.fc = nn.Sequential(
-            nn.Linear(self.config.hidden_size, 512),
-            nn.BatchNorm1d(512),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(512, embedding_dim),
-            nn.BatchNorm1d(embedding_dim)
-        )
-        self.classifier = nn.Linear(embedding_dim, num_classes)
-
-    def forward(self, input_values, attention_mask=None):
-        outputs = self.backbone(input_values=input_values, attention_mask=attention_mask)
-        stacked_hidden_states = torch.stack(outputs.hidden_states, dim=0)
-        weights = F.softmax(self.layer_weights, dim=0).view(-1, 1, 1, 1)
-        weighted_hidden_state = torch.sum(stacked_hidden_states * weights, dim=0)
-        pooled, _ = self.attention(weighted_hidden_state, attention_mask)
-        embeddings = self.fc(pooled)
-        return F.normalize(embeddings, p=2, dim=1)
-
-# ==========================================
-# 2. මොඩලය පූරණය කිරීම
-# ==========================================
-DEVICE = torch.device("cpu")
-PROCESSOR = Wav2Vec2FeatureExtractor.from_pretrained("facebook/wav2vec2-xls-r-300m")
-
-# 🔴 ඔබේ Repo ID එක මෙහි නිවැරදිව ලබා දෙන්න
-REPO_ID = "TD-jayadeera/SinhalaPhonoNet_TEC_v1_pp" 
-MODEL_FILENAME= "SinhalaPhonoNet_TEC_v1_pp.pth"
-
 try:
-    model_path = hf_hub_download(repo_id=REPO_ID, filename=MODEL_FILENAME)
-    model = SinhalaPhonoNet(num_classes=19).to(DEVICE)
-    model.load_state_dict(torch.load(model_path, map_location=DEVICE))
-    model.eval()
+    model, MODEL_VERSION = load_model()
 except Exception as e:
     print(f"Error: {e}")
 
+# ගුරු (reference) audio embeddings: content hash + model version අනුව (embedding_store.py)
+STORE = EmbeddingStore(dim=EMBEDDING_DIM)
+
 # ==========================================
-# 3. ප්‍රධාන Analysis Logic
+# 2. ප්‍රධාන Analysis Logic
 # ==========================================
 def analyze_pronunciation(teacher_audio, student_audio):
     if teacher_audio is None or student_audio is None:
         return "කරුණාකර ශබ්ද ගොනු දෙකම ලබා දෙන්න.", {}, ""
 
     try:
-        def get_emb(path):
-            speech, _ = librosa.load(path, sr=16000)
-            speech, _ = librosa.effects.trim(speech, top_db=25)
-            inputs = PROCESSOR(speech, sampling_rate=16000, return_tensors="pt", padding=True)
-            with torch.no_grad():
-                emb = model(inputs.input_values, inputs.attention_mask)
-            return emb.cpu().numpy()
-
-        emb_t = get_emb(teacher_audio)
-        emb_s = get_emb(student_audio)
-        raw_dist = float(np.linalg.norm(emb_t - emb_s))
-
-        # Calibration (Distance to Accuracy mapping)
-        center_point, steepness = 0.75, 12
-        accuracy = (1 / (1 + math.exp(steepness * (raw_dist - center_point)))) * 100
+        # ගුරු embedding එක store එකෙන් (පළමු වරට පමණක් forward pass); ශිෂ්‍යයාට පමණක් model එක
+        emb_t, _ = STORE.get_or_compute(teacher_audio, MODEL_VERSION, lambda path: get_emb(model, path))
+        emb_s = get_emb(model, student_audio)
+        raw_dist, accuracy, verdict = score(emb_t, emb_s)
 
-        # Verdict තීරණය කිරීම
-        if accuracy >= 85:
-            verdict = "EXCELLENT"
+        # Verdict අනුව පණිවිඩය
+        if verdict == "EXCELLENT":
             color = "green"
             msg = "ඉතාම නිවැරදියි! 🏆"
-        elif accuracy >= 65:
-            verdict = "GOOD"
+        elif verdict == "GOOD":
             color = "orange"
             msg = "හොඳයි, තව උත්සාහ කරන්න! ⭐"
         else:
-            verdict = "INCORRECT"
             color = "red"
             msg = "නැවත උත්සාහ කරන්න. ❌"
 
@@ -129,7 +57,7 @@ def analyze_pronunciation(teacher_audio, student_audio):
         return f"<p style='color:red;'>Error: {str(e)}</p>", {}, ""
 
 # ==========================================
-# 4. නවීන Gradio UI (Blocks)
+# 3. නවීන Gradio UI (Blocks)
 # ==========================================
 with gr.Blocks(theme='shivi/calm_sea_ocean') as demo:
     gr.Markdown("# 🎙️ සිංහල මිතුරු (Sinhala Mithuru) - Pronunciation Lab")
@@ -152,4 +80,5 @@ with gr.Blocks(theme='shivi/calm_sea_ocean') as demo:
         inputs=[t_input, s_input]
     )
 
-demo.launch()
\ No newline at end of file
+if __name__ == "__main__":
+    demo.launch()
\ No newline at end of file
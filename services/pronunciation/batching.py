@@ -0,0 +1,175 @@
+"""
+@File: batching.py
+@Description: Length-bucketed micro-batching of student clips in front of SinhalaPhonoNet.
+
+One wav2vec2-xls-r-300m forward pass per clip leaves concurrent students
+queueing behind each other. The batcher collects the clips that arrive
+within `max_wait_ms` and embeds them together, one padded forward pass per
+length bucket: a 0.6 s clip is never padded to the length of a 6 s one. The
+attention mask marks the real samples of every clip, so a clip's embedding
+does not depend on what it was batched with.
+
+Padding efficiency = real samples / (batch size * longest clip), per batch.
+/stats reports it per bucket, with batch sizes and queue waits.
+"""
+
+import asyncio
+import bisect
+from collections import Counter
+
+BUCKET_EDGES_S = (1.0, 1.5, 2.0, 3.0, 5.0)
+
+
+class LengthBucketBatcher:
+    """
+    ශිෂ්‍ය clips දිග අනුව buckets වලට බෙදා එක් bucket එකකට එක forward pass එකක්.
+
+    `embed_fn(list of 1-D float32 arrays)` must return an (N, dim) array (one
+    padded forward pass). The worker takes the bucket holding the oldest
+    waiting clip and closes it when it has `max_batch_size` clips or when that
+    clip has waited `max_wait_ms`; clips of other buckets keep waiting for the
+    next free slot. A lone clip with nothing else queued runs straight away.
+    With an `executor` (concurrent.futures) the forward pass runs on it, at
+    most `slots` batches at a time.
+    """
+
+    def __init__(self, embed_fn, max_batch_size=8, max_wait_ms=20.0, bucket_edges_s=BUCKET_EDGES_S,
+                 sample_rate=16000, executor=None, slots=1):
+        self.embed_fn = embed_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.edges = [int(s * sample_rate) for s in sorted(bucket_edges_s)]
+        self.bucket_names = [f"<{s:g}s" for s in sorted(bucket_edges_s)] + [f">={max(bucket_edges_s, default=0):g}s"]
+        self.n_slots = max(1, int(slots))
+        self._pending = {}      # bucket -> [(speech, future, t0)], oldest first
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._slots = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.batch_sizes = Counter()
+        self.bucket_stats = {name: {"batches": 0, "clips": 0, "real_samples": 0, "padded_samples": 0}
+                             for name in self.bucket_names}
+        self.queue_wait_ms_sum = self.queue_wait_ms_max = 0.0
+        self.errors = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._pending = {}
+            self._slots = asyncio.Semaphore(self.n_slots)
+            self._worker = loop.create_task(self._run())
+
+    def bucket(self, n_samples):
+        return bisect.bisect_right(self.edges, n_samples)
+
+    async def submit(self, speech):
+        """16 kHz clip එක queue එකට දමා එහි (1, dim) embedding එක ලැබෙන තෙක් රැඳී සිටියි."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((speech, future, self._loop.time()))
+        return await future
+
+    # ------------------------------------------
+    # Worker
+    # ------------------------------------------
+    def _add(self, item):
+        self._pending.setdefault(self.bucket(len(item[0])), []).append(item)
+
+    def _drain_queue(self):
+        while not self._queue.empty():
+            self._add(self._queue.get_nowait())
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            if not any(self._pending.values()):
+                self._add(await self._queue.get())
+            self._drain_queue()
+            bucket = min((b for b, items in self._pending.items() if items), key=lambda b: self._pending[b][0][2])
+            waiting = self._pending[bucket]
+
+            # Idle traffic: a lone clip runs now, otherwise wait for its bucket to fill.
+            if sum(map(len, self._pending.values())) > 1:
+                deadline = waiting[0][2] + self.max_wait
+                while len(waiting) < self.max_batch_size:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        self._add(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                    self._drain_queue()
+
+            items, self._pending[bucket] = waiting[:self.max_batch_size], waiting[self.max_batch_size:]
+            self._loop.create_task(self._dispatch(bucket, items))
+
+    async def _dispatch(self, bucket, items):
+        try:
+            await self._run_batch(bucket, items)
+        finally:
+            self._slots.release()
+
+    async def _run_batch(self, bucket, items):
+        now = self._loop.time()
+        live = [(speech, fut, t0) for speech, fut, t0 in items if not fut.done()]
+        if not live:
+            return
+        for _, _, t0 in live:
+            wait_ms = (now - t0) * 1000.0
+            self.queue_wait_ms_sum += wait_ms
+            self.queue_wait_ms_max = max(self.queue_wait_ms_max, wait_ms)
+        speeches = [speech for speech, _, _ in live]
+        stats = self.bucket_stats[self.bucket_names[bucket]]
+        stats["batches"] += 1
+        stats["clips"] += len(live)
+        stats["real_samples"] += sum(map(len, speeches))
+        stats["padded_samples"] += len(live) * max(map(len, speeches))
+        self.batch_sizes[len(live)] += 1
+
+        try:
+            if self.executor is not None:
+                embeddings = await self._loop.run_in_executor(self.executor, self.embed_fn, speeches)
+            else:
+                embeddings = self.embed_fn(speeches)
+        except Exception as e:
+            self.errors += 1
+            for _, fut, _ in live:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for i, (_, fut, _) in enumerate(live):
+            if not fut.done():
+                fut.set_result(embeddings[i:i + 1])
+
+    def shutdown(self):
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def stats(self):
+        clips = sum(s["clips"] for s in self.bucket_stats.values())
+        real = sum(s["real_samples"] for s in self.bucket_stats.values())
+        padded = sum(s["padded_samples"] for s in self.bucket_stats.values())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": (self._queue.qsize() if self._queue is not None else 0)
+                           + sum(map(len, self._pending.values())),
+            "batches": sum(self.batch_sizes.values()),
+            "clips": clips,
+            "errors": self.errors,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "mean_queue_wait_ms": round(self.queue_wait_ms_sum / clips, 2) if clips else None,
+            "max_queue_wait_ms": round(self.queue_wait_ms_max, 2),
+            "padding_efficiency": round(real / padded, 4) if padded else None,
+            "buckets": {name: {**s, "padding_efficiency": round(s["real_samples"] / s["padded_samples"], 4)
+                               if s["padded_samples"] else None}
+                        for name, s in self.bucket_stats.items() if s["batches"]},
+        }
@@ -0,0 +1,222 @@
+"""
+@File: embedding_store.py
+@Description: Persistent teacher (reference) embedding store for the pronunciation service.
+
+A reference clip never changes, so its wav2vec2 embedding is computed once
+and reused: scoring then costs one student forward pass and one vector
+distance. Entries are keyed by the SHA-256 of the audio file bytes and the
+model version (phononet.model_version), so a re-recorded clip or a new model
+never reuses a stale embedding.
+
+    <store>/embeddings.npy   float32 (capacity, 256) matrix, memory-mapped (np.lib.format.open_memmap)
+    <store>/index.json       {"dim", "rows", "entries": {key: {"row", "audio_sha256", "model_version", "name"}}}
+
+The matrix is written before the index, and both are replaced atomically,
+so a crash never leaves an index pointing at an unwritten row. A running
+service picks up rows added by the CLI on its next lookup.
+
+The CLI may precompute while the service is running: every insert (reload ->
+grow -> row write -> index write) holds an exclusive fcntl.flock on
+<store>/.lock, and lookups hold a shared one, so two processes never take the
+same row or write into a matrix file the other has just replaced. Without
+fcntl (Windows) only threads of one process are serialised; run one writer.
+
+    python embedding_store.py precompute --audio-dir reference_audio   # the whole word list
+    python embedding_store.py stats
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-process locking only
+    fcntl = None
+
+STORE_DIR = os.getenv("PRON_EMBEDDING_STORE", "embedding_store")
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac", ".webm")
+
+def audio_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def store_key(audio_hash, model_version):
+    return hashlib.sha256(f"{audio_hash}|{model_version}".encode()).hexdigest()
+
+class EmbeddingStore:
+    def __init__(self, root=STORE_DIR, dim=256):
+        self.root = root
+        self.dim = int(dim)
+        self.matrix_path = os.path.join(root, "embeddings.npy")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._index_stamp = None
+        self.index = {"dim": self.dim, "rows": 0, "entries": {}}
+        self.hits = self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        self._lock_file = open(os.path.join(root, ".lock"), "a+")
+        with self._locked():
+            self._reload()
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        """Threads: RLock. Processes (service + CLI): flock, shared for lookups, exclusive for inserts."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------
+    # Files
+    # ------------------------------------------
+    def _reload(self):
+        """
+        index.json වෙනස් වී ඇත්නම් (CLI / වෙනත් process) index සහ memmap නැවත විවෘත කරයි.
+        Every write replaces index.json, so (inode, mtime) identifies a version. Call under _locked().
+        """
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if stamp == self._index_stamp:
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index["dim"] != self.dim:
+            raise ValueError(f"{self.index_path} holds {index['dim']}-d embeddings, expected {self.dim}.")
+        self.index, self._index_stamp = index, stamp
+        self._matrix = np.lib.format.open_memmap(self.matrix_path, mode="r+")
+
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.index_path)
+        st = os.stat(self.index_path)
+        self._index_stamp = (st.st_ino, st.st_mtime_ns)
+
+    def _reserve(self, rows):
+        """Matrix එකේ ධාරිතාව දෙගුණ කරයි (new file + copy + atomic rename)."""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        tmp = self.matrix_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32,
+                                          shape=(max(64, 2 * capacity, rows), self.dim))
+        if capacity:
+            grown[:self.index["rows"]] = self._matrix[:self.index["rows"]]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp, self.matrix_path)
+        self._matrix = np.lib.format.open_memmap(self.matrix_path, mode="r+")
+
+    # ------------------------------------------
+    # Lookup / insert
+    # ------------------------------------------
+    def get(self, key):
+        """(dim,) float32 copy of the stored embedding, or None."""
+        with self._locked():
+            self._reload()
+            entry = self.index["entries"].get(key)
+            if entry is None:
+                return None
+            return np.array(self._matrix[entry["row"]])
+
+    def put(self, key, embedding, **info):
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(self.dim)
+        with self._locked(exclusive=True):
+            self._reload()
+            entry = self.index["entries"].get(key)
+            if entry is None:
+                entry = {"row": self.index["rows"]}
+                self._reserve(entry["row"] + 1)
+                self.index["rows"] += 1
+            self._matrix[entry["row"]] = embedding
+            self._matrix.flush()
+            entry.update(info)
+            self.index["entries"][key] = entry
+            self._write_index()
+
+    def get_or_compute(self, path, model_version, compute):
+        """
+        Reference audio එකේ embedding එක store එකෙන්, නැතහොත් `compute(path)` ->
+        (1, dim) and stored. Returns ((1, dim) embedding, hit).
+        """
+        audio_hash = audio_sha256(path)
+        key = store_key(audio_hash, model_version)
+        embedding = self.get(key)
+        if embedding is not None:
+            self.hits += 1
+            return embedding[np.newaxis], True
+        self.misses += 1
+        embedding = compute(path)
+        self.put(key, embedding, audio_sha256=audio_hash, model_version=model_version,
+                 name=os.path.basename(path))
+        return np.asarray(embedding, dtype=np.float32).reshape(1, self.dim), False
+
+    def stats(self):
+        with self._locked():
+            self._reload()
+            versions = {}
+            for entry in self.index["entries"].values():
+                versions[entry.get("model_version")] = versions.get(entry.get("model_version"), 0) + 1
+            return {"root": self.root, "dim": self.dim, "rows": self.index["rows"],
+                    "capacity": 0 if self._matrix is None else int(self._matrix.shape[0]),
+                    "model_versions": versions, "hits": self.hits, "misses": self.misses}
+
+# ==========================================
+# CLI: වචන ලැයිස්තුවේ සියලු reference audio සඳහා embeddings කලින් ගණනය කිරීම
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teacher reference embedding store")
+    parser.add_argument("command", choices=("precompute", "stats"))
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--audio-dir", help="precompute: directory of reference clips (<word>.wav)")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        print(json.dumps(EmbeddingStore(args.store).stats(), ensure_ascii=False, indent=2))
+        return 0
+    if not args.audio_dir:
+        parser.error("precompute needs --audio-dir")
+
+    from phononet import EMBEDDING_DIM, get_emb, load_model
+
+    model, version = load_model()
+    store = EmbeddingStore(args.store, EMBEDDING_DIM)
+    names = sorted(n for n in os.listdir(args.audio_dir) if n.lower().endswith(AUDIO_EXTENSIONS))
+    computed = failed = 0
+    for i, name in enumerate(names, 1):
+        try:
+            _, hit = store.get_or_compute(os.path.join(args.audio_dir, name), version,
+                                          lambda path: get_emb(model, path))
+        except Exception as e:
+            failed += 1
+            print(f"❌ {name}: {e}")
+            continue
+        computed += not hit
+        print(f"[{i}/{len(names)}] {'cached  ' if hit else 'computed'} {name}")
+    print(f"✅ {computed} computed, {len(names) - computed - failed} already stored, {failed} failed "
+          f"(model {version})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+@File: layer_analysis.py
+@Description: Learned layer-mixture weights of SinhalaPhonoNet and the layer cut-off (PRON_NUM_LAYERS) they allow.
+
+SinhalaPhonoNet mixes all 25 wav2vec2 hidden states (CNN output + 24
+encoder layers) with softmax(layer_weights). If the upper layers carry
+little weight, the model can run only the first K encoder layers
+(PRON_NUM_LAYERS=K) with the mixture renormalised over the first K + 1 states.
+
+    python layer_analysis.py weights
+    python layer_analysis.py parity --audio-dir reference_audio [--pairs pairs.csv] [--layers 24,20,16,12]
+
+`weights` reads only the checkpoint. For every K, `parity` embeds the clips
+with the full model and with the first K layers, then compares:
+- embedding drift
+- teacher/student distance, accuracy and verdict
+- embedding time
+
+`--pairs` is a CSV of `teacher,student` paths (real student attempts give the
+meaningful verdict agreement). Without it, every pair of clips in
+--audio-dir is compared.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+from collections import Counter
+
+import numpy as np
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".ogg", ".flac", ".webm")
+RETAINED_MASS = (0.99, 0.95, 0.9, 0.8)
+
+# ==========================================
+# 1. layer_weights -> mixture weights
+# ==========================================
+def mixture_weights(checkpoint=None):
+    """Trained checkpoint එකේ softmax(layer_weights): (num_hidden_layers + 1,) array."""
+    import torch
+    from phononet import checkpoint_path
+
+    state = torch.load(checkpoint or checkpoint_path(), map_location="cpu")
+    return torch.softmax(state["layer_weights"].float(), dim=0).numpy()
+
+def weights_report(weights):
+    """Per-state weight + cumulative mass, and the smallest K keeping each RETAINED_MASS share."""
+    cumulative = np.cumsum(weights)
+    n_layers = len(weights) - 1
+    return {
+        "num_hidden_layers": n_layers,
+        # state 0 = CNN features / input of layer 1, state k = output of encoder layer k
+        "states": [{"state": i, "weight": round(float(w), 5), "cumulative": round(float(c), 5)}
+                   for i, (w, c) in enumerate(zip(weights, cumulative))],
+        "min_layers_for_mass": {str(m): int(min(max(1, np.searchsorted(cumulative, m - 1e-9)), n_layers))
+                                for m in RETAINED_MASS},
+    }
+
+# ==========================================
+# 2. Parity: truncated vs full model
+# ==========================================
+def read_pairs(path, audio_dir, max_pairs, seed):
+    """Pair CSV (teacher,student) එක හෝ audio-dir හි සියලු clip pairs -> [(teacher, student)]."""
+    if path:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [row[:2] for row in csv.reader(f) if len(row) >= 2 and row[0] != "teacher"]
+        resolve = lambda p: p if os.path.isabs(p) or not audio_dir else os.path.join(audio_dir, p)
+        pairs = [(resolve(t), resolve(s)) for t, s in rows]
+    else:
+        names = sorted(n for n in os.listdir(audio_dir) if n.lower().endswith(AUDIO_EXTENSIONS))
+        pairs = [(os.path.join(audio_dir, a), os.path.join(audio_dir, b)) for a, b in itertools.combinations(names, 2)]
+    if len(pairs) > max_pairs:
+        pairs = random.Random(seed).sample(pairs, max_pairs)
+    return pairs
+
+def embed_all(model, speeches):
+    """(N, 256) embeddings, one clip per forward pass, and the seconds it took."""
+    from phononet import embed_speech
+
+    t0 = time.perf_counter()
+    embeddings = np.concatenate([embed_speech(model, speech) for speech in speeches])
+    return embeddings, time.perf_counter() - t0
+
+def parity_report(layers, pairs, weights, full, truncated, seconds, full_seconds):
+    """One K row: drift of the embeddings and of the pair scores vs the full model."""
+    from phononet import score
+
+    drift = np.linalg.norm(truncated - full, axis=1)
+    full_scores = [score(full[t], full[s]) for t, s in pairs]
+    cut_scores = [score(truncated[t], truncated[s]) for t, s in pairs]
+    distance_delta = np.array([abs(a[0] - b[0]) for a, b in zip(full_scores, cut_scores)])
+    accuracy_delta = np.array([abs(a[1] - b[1]) for a, b in zip(full_scores, cut_scores)])
+    changed = Counter(f"{a[2]}->{b[2]}" for a, b in zip(full_scores, cut_scores) if a[2] != b[2])
+    return {
+        "layers": layers,
+        "retained_weight_mass": round(float(weights[:layers + 1].sum()), 5),
+        "embed_seconds": round(seconds, 3),
+        "speedup": round(full_seconds / seconds, 3) if seconds else None,
+        "embedding_drift_mean": round(float(drift.mean()), 5),
+        "embedding_drift_max": round(float(drift.max()), 5),
+        "distance_abs_delta_mean": round(float(distance_delta.mean()), 5) if len(pairs) else None,
+        "distance_abs_delta_max": round(float(distance_delta.max()), 5) if len(pairs) else None,
+        "accuracy_abs_delta_mean_pp": round(float(accuracy_delta.mean()), 3) if len(pairs) else None,
+        "accuracy_abs_delta_max_pp": round(float(accuracy_delta.max()), 3) if len(pairs) else None,
+        "verdict_agreement": round(1 - sum(changed.values()) / len(pairs), 4) if len(pairs) else None,
+        "verdict_changes": dict(sorted(changed.items())),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SinhalaPhonoNet layer weights / layer cut-off parity")
+    parser.add_argument("command", choices=("weights", "parity"))
+    parser.add_argument("--checkpoint", help="weights: local .pth (default: the Hub checkpoint)")
+    parser.add_argument("--audio-dir", help="parity: clips to embed")
+    parser.add_argument("--pairs", help="parity: CSV of teacher,student paths (relative to --audio-dir)")
+    parser.add_argument("--layers", help="parity: comma separated K values (default: from the weights)")
+    parser.add_argument("--max-pairs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args(argv)
+
+    if args.command == "weights":
+        report = weights_report(mixture_weights(args.checkpoint))
+    else:
+        if not args.audio_dir:
+            parser.error("parity needs --audio-dir")
+        import torch
+        from phononet import load_model, load_speech
+
+        model, version = load_model(num_layers=None, prefer_exported=False)
+        weights = torch.softmax(model.layer_weights.detach().float(), dim=0).numpy()
+        n_layers = model.config.num_hidden_layers
+        if args.layers:
+            ks = sorted({int(k) for k in args.layers.split(",")}, reverse=True)
+        else:
+            suggested = weights_report(weights)["min_layers_for_mass"].values()
+            ks = sorted({n_layers, *suggested, 3 * n_layers // 4, n_layers // 2}, reverse=True)
+        ks = [n_layers] + [k for k in ks if 0 < k < n_layers]
+
+        pairs = read_pairs(args.pairs, args.audio_dir, args.max_pairs, args.seed)
+        paths = sorted({p for pair in pairs for p in pair}) or sorted(
+            os.path.join(args.audio_dir, n) for n in os.listdir(args.audio_dir) if n.lower().endswith(AUDIO_EXTENSIONS))
+        speeches = [load_speech(p) for p in paths]
+        row = {p: i for i, p in enumerate(paths)}
+        pairs = [(row[t], row[s]) for t, s in pairs]
+        print(f"🔎 {len(paths)} clips, {len(pairs)} pairs, K = {ks}")
+
+        embed_all(model, speeches[:1])  # warm-up
+        results, full = [], None
+        for k in ks:  # descending: truncate() only removes layers, one model serves every K
+            embeddings, seconds = embed_all(model.truncate(k), speeches)
+            if full is None:
+                full, full_seconds = embeddings, seconds
+            results.append(parity_report(k, pairs, weights, full, embeddings, seconds, full_seconds))
+            print(f"✅ K={k}: {seconds:.2f}s, verdict agreement {results[-1]['verdict_agreement']}")
+        report = {"model_version": version, "clips": len(paths), "pairs": len(pairs), "results": results}
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+@File: mixture_benchmark.py
+@Description: Peak memory / latency of the streaming vs stacked layer mixture (PRON_LAYER_MIXTURE).
+
+The stacked mixture keeps all K + 1 hidden states, (B, T, 1024) each, plus
+their torch.stack copy, alive at once. The streaming mixture keeps only a
+running weighted sum. This benchmark first checks that both modes give the
+same embeddings. Then, for each batch size, it runs both modes in a fresh
+process and records the peak RSS above the loaded-model baseline:
+
+    python mixture_benchmark.py --batch-sizes 1,4,16 --seconds 3
+
+Each measurement runs with MALLOC_MMAP_THRESHOLD_=65536, so large tensors
+are mmapped and returned to the OS when freed. RSS then follows the live
+tensors instead of glibc's arena high-water mark. Linux only (/proc/self/statm).
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+
+import numpy as np
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+def make_inputs(batch_size, seconds, seed=0):
+    from phononet import PROCESSOR, SAMPLE_RATE
+
+    rng = np.random.default_rng(seed)
+    # Different lengths (75-100 %): the batch is padded like a real bucket
+    speeches = [rng.normal(0, 0.1, int(seconds * SAMPLE_RATE * rng.uniform(0.75, 1.0))).astype(np.float32)
+                for _ in range(batch_size)]
+    return PROCESSOR(speeches, sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True,
+                     return_attention_mask=True)
+
+# ==========================================
+# 1. Child process: one (mode, batch size)
+# ==========================================
+def measure(mode, batch_size, seconds, repeats):
+    import torch
+    from phononet import load_model
+
+    model, _ = load_model(prefer_exported=False)
+    model.streaming_mixture = mode == "stream"
+    inputs = make_inputs(batch_size, seconds)
+    with torch.inference_mode():
+        model(inputs.input_values[:1, :16000], inputs.attention_mask[:1, :16000])  # warm-up (small)
+    gc.collect()
+    baseline = rss_bytes()
+
+    peak, stop = [baseline], threading.Event()
+    def sample():
+        while not stop.is_set():
+            peak[0] = max(peak[0], rss_bytes())
+            time.sleep(0.0005)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    latencies = []
+    with torch.inference_mode():
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            model(inputs.input_values, inputs.attention_mask)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    stop.set()
+    sampler.join()
+    return {
+        "mode": mode,
+        "batch_size": batch_size,
+        "frames": int(model.backbone._get_feat_extract_output_lengths(inputs.input_values.shape[1])),
+        "baseline_mb": round(baseline / 2**20, 1),
+        "peak_delta_mb": round((max(peak[0], rss_bytes()) - baseline) / 2**20, 1),
+        "latency_ms": round(float(np.median(latencies)), 1),
+    }
+
+# ==========================================
+# 2. Parent: equivalence check + memory table
+# ==========================================
+def check_equivalence(batch_sizes, seconds):
+    """එකම inputs මත stream vs stack embeddings: max |diff| and min cosine per batch size."""
+    import torch
+    from phononet import load_model
+
+    model, _ = load_model(prefer_exported=False)
+    rows = []
+    with torch.inference_mode():
+        for batch_size in batch_sizes:
+            inputs = make_inputs(batch_size, seconds)
+            out = {}
+            for mode in ("stack", "stream"):
+                model.streaming_mixture = mode == "stream"
+                out[mode] = model(inputs.input_values, inputs.attention_mask).numpy()
+            rows.append({"batch_size": batch_size,
+                         "max_abs_diff": float(np.abs(out["stack"] - out["stream"]).max()),
+                         "min_cosine": float((out["stack"] * out["stream"]).sum(axis=1).min())})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming vs stacked layer mixture: equivalence + peak memory")
+    parser.add_argument("--batch-sizes", default="1,4,16")
+    parser.add_argument("--seconds", type=float, default=3.0, help="longest clip in a batch")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "BATCH_SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]), args.seconds, args.repeats)))
+        return 0
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    report = {"seconds": args.seconds, "equivalence": check_equivalence(batch_sizes, args.seconds), "memory": []}
+    env = {**os.environ, "MALLOC_MMAP_THRESHOLD_": "65536"}
+    for batch_size in batch_sizes:
+        for mode in ("stack", "stream"):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, str(batch_size),
+                                  "--seconds", str(args.seconds), "--repeats", str(args.repeats)],
+                                 env=env, capture_output=True, text=True, check=True)
+            row = json.loads(out.stdout.strip().splitlines()[-1])
+            report["memory"].append(row)
+            print(f"📊 batch {batch_size:>2} {mode:<6} peak +{row['peak_delta_mb']} MB, {row['latency_ms']} ms")
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
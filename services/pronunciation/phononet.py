@@ -0,0 +1,334 @@
+"""
+@File: phononet.py
+@Description: SinhalaPhonoNet model, audio decoding, embeddings and scoring (shared by app.py, api.py and embedding_store.py).
+"""
+
+import io
+import os
+import json
+import math
+import threading
+import numpy as np
+import soundfile as sf
+import soxr
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import librosa
+from transformers import Wav2Vec2Model, Wav2Vec2Config, Wav2Vec2FeatureExtractor
+from huggingface_hub import hf_hub_download
+
+# ==========================================
+# 1. මොඩලයේ නිවැරදි ව්‍යුහය (Architecture)
+# ==========================================
+class SelfAttentionPooling(nn.Module):
+    def __init__(self, input_dim):
+        super(SelfAttentionPooling, self).__init__()
+        self.W = nn.Linear(input_dim, 128)
+        self.V = nn.Linear(128, 1)
+
+    def forward(self, x, attention_mask=None):
+        scores = self.V(torch.tanh(self.W(x)))
+        if attention_mask is not None:
+            indices = torch.linspace(0, attention_mask.size(1) - 1, steps=x.size(1)).long().to(x.device)
+            mask = torch.index_select(attention_mask, 1, indices).unsqueeze(-1)
+            scores = scores.masked_fill(mask == 0, -1e4)
+        attn_weights = F.softmax(scores, dim=1)
+        return torch.sum(x * attn_weights, dim=1), attn_weights
+
+# Streaming layer mixture: the forward running on this thread accumulates into
+# _MIXTURE.active. The hooks hold no reference to a model (deepcopy-safe).
+_MIXTURE = threading.local()
+
+def _mix_state(hidden_states):
+    mix = getattr(_MIXTURE, "active", None)
+    if mix is None:
+        return
+    weight = mix["weights"][mix["count"]]
+    if mix["sum"] is None:
+        mix["sum"] = hidden_states * weight
+    else:
+        mix["sum"].add_(hidden_states, alpha=weight)
+    mix["count"] += 1
+
+def _layer_input_hook(module, args, kwargs):
+    """Encoder layer k එකට ඇතුළු වන state එක = hidden_states[k]."""
+    _mix_state(args[0] if args else kwargs["hidden_states"])
+
+def _final_state_hook(module, args, output):
+    """Final layer_norm (xls-r) / last layer output = hidden_states[K]."""
+    _mix_state(output[0] if isinstance(output, tuple) else output)
+
+def frame_mask(config, attention_mask, num_frames):
+    """
+    Sample mask (B, S) -> (B, num_frames) mask of the CNN feature encoder's output
+    frames: each clip's length goes through every conv layer, floor((L - kernel) / stride) + 1
+    (the same arithmetic as transformers' Wav2Vec2 feature encoder, without its private helpers).
+    """
+    lengths = attention_mask.sum(dim=-1)
+    for kernel, stride in zip(config.conv_kernel, config.conv_stride):
+        lengths = torch.div(lengths - kernel, stride, rounding_mode="floor") + 1
+    frames = torch.arange(num_frames, device=attention_mask.device)
+    return (frames.unsqueeze(0) < lengths.unsqueeze(1)).to(attention_mask.dtype)
+
+class SinhalaPhonoNet(nn.Module):
+    def __init__(self, base_model="facebook/wav2vec2-xls-r-300m", embedding_dim=256, num_classes=19):
+        super(SinhalaPhonoNet, self).__init__()
+        self.config = Wav2Vec2Config.from_pretrained(base_model, output_hidden_states=True)
+        self.backbone = Wav2Vec2Model.from_pretrained(base_model, config=self.config)
+        self.layer_weights = nn.Parameter(torch.ones(self.config.num_hidden_layers + 1))
+        self.attention = SelfAttentionPooling(self.config.hidden_size)
+        self.fc = nn.Sequential(
+            nn.Linear(self.config.hidden_size, 512),
+            nn.BatchNorm1d(512),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(512, embedding_dim),
+            nn.BatchNorm1d(embedding_dim)
+        )
+        self.classifier = nn.Linear(embedding_dim, num_classes)
+        self.num_layers = self.config.num_hidden_layers
+        self.streaming_mixture = True
+        self._register_mixture_hooks()
+
+    def _register_mixture_hooks(self):
+        for handle in getattr(self, "_mixture_hooks", ()):
+            handle.remove()
+        encoder = self.backbone.encoder
+        last = encoder.layer_norm if self.config.do_stable_layer_norm else encoder.layers[-1]
+        self._mixture_hooks = [layer.register_forward_pre_hook(_layer_input_hook, with_kwargs=True)
+                               for layer in encoder.layers]
+        self._mixture_hooks.append(last.register_forward_hook(_final_state_hook))
+
+    def truncate(self, num_layers):
+        """
+        Encoder එකේ පළමු K layers පමණක් තබා ගනී (in place, K may only go down).
+        The final encoder layer_norm is dropped as well, so hidden_states[0..K]
+        equal the full model's, and forward renormalises softmax(layer_weights)
+        over those K + 1 states.
+        """
+        num_layers = int(num_layers)
+        if not 0 < num_layers <= self.num_layers:
+            raise ValueError(f"num_layers must be in 1..{self.num_layers}, got {num_layers}.")
+        if num_layers < self.config.num_hidden_layers:
+            encoder = self.backbone.encoder
+            encoder.layers = encoder.layers[:num_layers]
+            if self.config.do_stable_layer_norm:  # xls-r: layer_norm after the last layer
+                encoder.layer_norm = nn.Identity()
+            self._register_mixture_hooks()
+        self.num_layers = num_layers
+        return self
+
+    def _streamed_mixture(self, input_values, attention_mask):
+        """
+        softmax(layer_weights) බර කළ එකතුව, encoder එක එක් එක් state එක නිපදවන විට
+        (hooks): only the running sum is kept, not the K + 1 (B, T, 1024) hidden states.
+        """
+        weights = F.softmax(self.layer_weights[:self.num_layers + 1], dim=0).tolist()
+        mix = {"weights": weights, "sum": None, "count": 0}
+        _MIXTURE.active = mix
+        try:
+            self.backbone(input_values=input_values, attention_mask=attention_mask, output_hidden_states=False)
+        finally:
+            _MIXTURE.active = None
+        if mix["count"] != len(weights):
+            raise RuntimeError(f"Layer mixture saw {mix['count']} hidden states, expected {len(weights)}.")
+        return mix["sum"]
+
+    def forward(self, input_values, attention_mask=None):
+        if self.streaming_mixture and not self.training:
+            weighted_hidden_state = self._streamed_mixture(input_values, attention_mask)
+        else:
+            outputs = self.backbone(input_values=input_values, attention_mask=attention_mask)
+            stacked_hidden_states = torch.stack(outputs.hidden_states, dim=0)
+            weights = F.softmax(self.layer_weights[:len(outputs.hidden_states)], dim=0).view(-1, 1, 1, 1)
+            weighted_hidden_state = torch.sum(stacked_hidden_states * weights, dim=0)
+        if attention_mask is not None:
+            # Sample mask -> exact frame mask (batched clips: padding frames never get pooling weight).
+            # A single unpadded clip gets an all-ones mask, so its embedding is unchanged.
+            attention_mask = frame_mask(self.config, attention_mask, weighted_hidden_state.shape[1])
+        pooled, _ = self.attention(weighted_hidden_state, attention_mask)
+        embeddings = self.fc(pooled)
+        return F.normalize(embeddings, p=2, dim=1)
+
+# ==========================================
+# 2. මොඩලය පූරණය කිරීම
+# ==========================================
+DEVICE = torch.device("cpu")
+BASE_MODEL = "facebook/wav2vec2-xls-r-300m"
+PROCESSOR = Wav2Vec2FeatureExtractor.from_pretrained(BASE_MODEL)
+SAMPLE_RATE = 16000
+TRIM_TOP_DB = 25
+EMBEDDING_DIM = 256
+# wav2vec2 feature encoder එකට අවම වශයෙන් 25 ms (400 samples) අවශ්‍යයි; 0.1 s ට අඩු = කථනයක් නැත
+MIN_SPEECH_SAMPLES = SAMPLE_RATE // 10
+
+# Encoder layers to run (truncate); 0 = all. Choose K with `python layer_analysis.py parity`.
+NUM_LAYERS = int(os.getenv("PRON_NUM_LAYERS", "0"))
+# stream: running weighted sum of the hidden states (hooks); stack: torch.stack of all of them
+LAYER_MIXTURE = os.getenv("PRON_LAYER_MIXTURE", "stream")
+
+# Int8 TorchScript export (`python quantize.py`), used instead of the float model when present
+EXPORTED_MODEL = os.getenv("PRON_EXPORTED_MODEL", os.path.join("exported", "phononet_int8.pt"))
+PREFER_EXPORTED = os.getenv("PRON_PREFER_EXPORTED", "1") == "1"
+
+# torch thread pools (0 = torch default, sized to all cores). The inter-op pool is
+# fixed at the first parallel op, so both are applied here at import time
+TORCH_INTRA_OP_THREADS = int(os.getenv("PRON_TORCH_INTRA_OP_THREADS", "0"))
+TORCH_INTER_OP_THREADS = int(os.getenv("PRON_TORCH_INTER_OP_THREADS", "0"))
+
+def configure_torch_threads(intra_op, inter_op):
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        torch.set_num_interop_threads(inter_op)
+
+configure_torch_threads(TORCH_INTRA_OP_THREADS, TORCH_INTER_OP_THREADS)
+
+# 🔴 ඔබේ Repo ID එක මෙහි නිවැරදිව ලබා දෙන්න
+REPO_ID = "TD-jayadeera/SinhalaPhonoNet_TEC_v1_pp"
+MODEL_FILENAME= "SinhalaPhonoNet_TEC_v1_pp.pth"
+
+def model_version(model_path, num_layers=None):
+    """
+    Embeddings cache key එකට model version එක: Hub cache එකේ blob නම (LFS sha256),
+    otherwise size + mtime of a local weights file. Preprocessing settings and
+    a layer cut-off are part of it, a change there invalidates stored embeddings too.
+    """
+    blob = os.path.basename(os.path.realpath(model_path))
+    if blob == os.path.basename(model_path):
+        st = os.stat(model_path)
+        blob = f"{st.st_size}-{st.st_mtime_ns}"
+    version = f"{REPO_ID}/{MODEL_FILENAME}@{blob[:16]}:sr{SAMPLE_RATE}:trim{TRIM_TOP_DB}"
+    return version + (f":layers{num_layers}" if num_layers else "")
+
+def checkpoint_path():
+    """Trained weights (.pth) in the Hub cache, downloaded on first use."""
+    return hf_hub_download(repo_id=REPO_ID, filename=MODEL_FILENAME)
+
+def exported_meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+def load_exported(path, source_version):
+    """
+    Int8 TorchScript export එක -> (module, model version), or None when it was
+    exported from another checkpoint / layer cut-off or its .json metadata is
+    missing / unreadable (the float model is used then).
+    """
+    meta_path = exported_meta_path(path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Cannot read {meta_path} ({e}): using the float model. Re-run `python quantize.py`.")
+        return None
+    if not isinstance(meta, dict) or "model_version" not in meta:
+        print(f"⚠️ {meta_path} has no model_version: using the float model. Re-run `python quantize.py`.")
+        return None
+    if meta.get("source_version") != source_version:
+        print(f"⚠️ {path} was exported from {meta.get('source_version')}, not {source_version}: "
+              f"using the float model. Re-run `python quantize.py`.")
+        return None
+    if meta.get("torch") != torch.__version__:
+        print(f"⚠️ {path} was exported with torch {meta.get('torch')}, running {torch.__version__}.")
+    module = torch.jit.load(path, map_location=DEVICE)
+    module.eval()
+    return module, meta["model_version"]
+
+def load_model(num_layers=NUM_LAYERS, prefer_exported=PREFER_EXPORTED):
+    """
+    Hub එකෙන් weights බාගෙන eval mode මොඩලය -> (model, model version string).
+    With num_layers (< all) only the first K encoder layers run (SinhalaPhonoNet.truncate).
+    A matching int8 TorchScript export (EXPORTED_MODEL) is preferred: it skips
+    building the float backbone altogether.
+    """
+    model_path = checkpoint_path()
+    if num_layers and num_layers >= Wav2Vec2Config.from_pretrained(BASE_MODEL).num_hidden_layers:
+        num_layers = None
+    version = model_version(model_path, num_layers)
+    if prefer_exported and os.path.exists(EXPORTED_MODEL):
+        exported = load_exported(EXPORTED_MODEL, version)
+        if exported is not None:
+            return exported
+
+    model = SinhalaPhonoNet(base_model=BASE_MODEL, num_classes=19).to(DEVICE)
+    model.load_state_dict(torch.load(model_path, map_location=DEVICE))
+    if num_layers:
+        model.truncate(num_layers)
+    model.streaming_mixture = LAYER_MIXTURE == "stream"
+    model.eval()
+    return model, version
+
+# ==========================================
+# 3. Audio -> Embedding
+# ==========================================
+def decode_audio(data, pcm_sample_rate=None):
+    """
+    Upload bytes -> (float32 mono samples, sample rate), temp file නොමැතිව (in memory).
+    WAV / FLAC / OGG are decoded with soundfile; with `pcm_sample_rate` the bytes
+    are raw 16-bit little-endian mono PCM. Raises ValueError if they cannot be decoded.
+    """
+    if pcm_sample_rate:
+        if len(data) % 2:
+            raise ValueError("Raw PCM must be 16-bit samples (even byte count).")
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0, int(pcm_sample_rate)
+    try:
+        speech, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    except (RuntimeError, TypeError) as e:  # sf.LibsndfileError is a RuntimeError
+        raise ValueError(f"Unsupported audio: {e}") from e
+    return speech.mean(axis=1), sr
+
+def prepare_speech(speech, sr):
+    """
+    Mono float32 -> 16 kHz, නිශ්ශබ්ද කොටස් කපා දමා (top_db=25). Resampling (soxr HQ,
+    what librosa.load(sr=16000) uses) only runs when the rate is not already 16 kHz.
+    """
+    if sr != SAMPLE_RATE:
+        speech = soxr.resample(speech, sr, SAMPLE_RATE, quality="HQ")
+    speech, _ = librosa.effects.trim(np.ascontiguousarray(speech, dtype=np.float32), top_db=TRIM_TOP_DB)
+    if len(speech) < MIN_SPEECH_SAMPLES:
+        raise ValueError("No speech found in the audio.")
+    return speech
+
+def load_speech(path):
+    """Audio file -> 16 kHz mono trimmed samples (same processing as uploaded audio)."""
+    speech, sr = librosa.load(path, sr=None, mono=True)
+    return prepare_speech(speech, sr)
+
+def embed_batch(model, speeches):
+    """
+    16 kHz clips list එකක් -> (N, 256) L2-normalised embeddings, one wav2vec2 forward
+    pass. Clips are normalised one by one and zero-padded to the longest; the
+    attention mask keeps the padding out of the encoder and the pooling.
+    """
+    inputs = PROCESSOR(speeches, sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True,
+                       return_attention_mask=True)
+    with torch.inference_mode():
+        emb = model(inputs.input_values, inputs.attention_mask)
+    return emb.cpu().numpy()
+
+def embed_speech(model, speech):
+    """16 kHz samples -> (1, 256) L2-normalised embedding."""
+    return embed_batch(model, [speech])
+
+def get_emb(model, path):
+    """Audio file -> (1, 256) L2-normalised embedding."""
+    return embed_speech(model, load_speech(path))
+
+# ==========================================
+# 4. Distance -> Accuracy / Verdict
+# ==========================================
+CENTER_POINT, STEEPNESS = 0.75, 12
+
+def score(emb_t, emb_s):
+    """Teacher / student embeddings -> (raw distance, accuracy %, EXCELLENT | GOOD | INCORRECT)."""
+    raw_dist = float(np.linalg.norm(emb_t - emb_s))
+    # Calibration (Distance to Accuracy mapping)
+    accuracy = (1 / (1 + math.exp(STEEPNESS * (raw_dist - CENTER_POINT)))) * 100
+    if accuracy >= 85:
+        verdict = "EXCELLENT"
+    elif accuracy >= 65:
+        verdict = "GOOD"
+    else:
+        verdict = "INCORRECT"
+    return raw_dist, accuracy, verdict
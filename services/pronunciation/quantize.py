@@ -0,0 +1,203 @@
+"""
+@File: quantize.py
+@Description: Dynamic int8 + TorchScript export of SinhalaPhonoNet for CPU serving.
+
+Pipeline:
+1. Quantise every nn.Linear of the float model to int8 with dynamic
+   activation scales (torch.ao.quantization.quantize_dynamic). These are the
+   wav2vec2 attention and feed-forward layers and the embedding head. The CNN
+   feature encoder stays float32.
+2. Trace the result to TorchScript on a padded two-clip batch, so the
+   attention-mask path is recorded.
+3. Check that the trace generalises to other clip lengths and batch sizes.
+4. Embed a reference set with the float model, the eager int8 model and
+   the int8 TorchScript module. For each, report:
+   - cosine drift against the float embeddings
+   - teacher/student verdict agreement and accuracy delta
+   - batch 1 latency
+   - throughput in length-sorted batches
+
+The export is published (`exported/phononet_int8.pt` + `.json` metadata)
+only when it meets both thresholds; a rejected run also deletes an export
+published by an earlier run, so the service falls back to the float model. The loader (phononet.load_model) then
+prefers it as long as it was exported from the current checkpoint and layer
+cut-off:
+
+    python quantize.py --audio-dir reference_audio --pairs pairs.csv --report quantize.json
+    PRON_PREFER_EXPORTED=0 uvicorn api:app     # back to the float model
+
+The exported model has its own model version, so reference embeddings are
+recomputed (`python embedding_store.py precompute ...`).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+
+# ==========================================
+# 1. Quantise + trace
+# ==========================================
+def quantize(model):
+    """nn.Linear -> dynamic int8 (in place: the float model is not needed afterwards)."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def model_inputs(speeches):
+    from phononet import PROCESSOR, SAMPLE_RATE
+
+    inputs = PROCESSOR(speeches, sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True,
+                       return_attention_mask=True)
+    return inputs.input_values, inputs.attention_mask
+
+def synthetic_clips(seconds, seed=0):
+    from phononet import SAMPLE_RATE
+
+    rng = np.random.default_rng(seed)
+    return [rng.normal(0, 0.1, int(s * SAMPLE_RATE)).astype(np.float32) for s in seconds]
+
+def trace(model):
+    """TorchScript trace on a padded batch (1.5 s + 1.0 s): the mask path is part of the graph."""
+    import torch
+
+    with torch.no_grad():
+        return torch.jit.trace(model, model_inputs(synthetic_clips((1.5, 1.0))), check_trace=False)
+
+def check_trace(traced, eager):
+    """Trace vs eager on lengths / batch sizes it was not traced with -> max |diff|."""
+    import torch
+
+    diff = 0.0
+    with torch.inference_mode():
+        for seconds in ((0.6,), (4.0,), (2.2, 0.8, 1.7)):
+            inputs = model_inputs(synthetic_clips(seconds, seed=len(seconds)))
+            diff = max(diff, float((traced(*inputs) - eager(*inputs)).abs().max()))
+    return diff
+
+# ==========================================
+# 2. Validation
+# ==========================================
+def measure(model, speeches, batch_size):
+    """Embeddings (batch 1), p50/p95 batch 1 latency and clips/s in length-sorted batches."""
+    import torch
+
+    latencies, embeddings = [], []
+    with torch.inference_mode():
+        model(*model_inputs(speeches[:1]))  # warm-up
+        for speech in speeches:
+            t0 = time.perf_counter()
+            embeddings.append(model(*model_inputs([speech])).numpy())
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+        order = np.argsort([len(s) for s in speeches])
+        t0 = time.perf_counter()
+        for i in range(0, len(order), batch_size):
+            model(*model_inputs([speeches[j] for j in order[i:i + batch_size]]))
+        batched_s = time.perf_counter() - t0
+    return np.concatenate(embeddings), {
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "throughput_per_s": round(len(latencies) / (sum(latencies) / 1000.0), 2),
+        f"batch{batch_size}_throughput_per_s": round(len(speeches) / batched_s, 2),
+    }
+
+def compare(reference, embeddings, pairs):
+    """Float embeddings vs a variant: cosine drift + verdict agreement over the teacher/student pairs."""
+    from phononet import score
+
+    cosine = np.sum(reference * embeddings, axis=1)  # both L2-normalised
+    ref_scores = [score(reference[t], reference[s]) for t, s in pairs]
+    var_scores = [score(embeddings[t], embeddings[s]) for t, s in pairs]
+    return {
+        "cosine_mean": round(float(cosine.mean()), 6),
+        "cosine_min": round(float(cosine.min()), 6),
+        "verdict_agreement": round(float(np.mean([a[2] == b[2] for a, b in zip(ref_scores, var_scores)])), 4)
+                             if pairs else None,
+        "accuracy_abs_delta_mean_pp": round(float(np.mean([abs(a[1] - b[1]) for a, b in zip(ref_scores, var_scores)])), 3)
+                                      if pairs else None,
+    }
+
+def main(argv=None):
+    import torch
+    from phononet import EXPORTED_MODEL, exported_meta_path, load_model, load_speech
+    from layer_analysis import AUDIO_EXTENSIONS, read_pairs
+
+    parser = argparse.ArgumentParser(description="Export and gate the int8 TorchScript SinhalaPhonoNet.")
+    parser.add_argument("--audio-dir", required=True, help="reference set (teacher clips / student attempts)")
+    parser.add_argument("--pairs", help="CSV of teacher,student paths for verdict agreement (relative to --audio-dir)")
+    parser.add_argument("--max-pairs", type=int, default=5000)
+    parser.add_argument("--output", default=EXPORTED_MODEL)
+    parser.add_argument("--batch-size", type=int, default=8, help="batch size of the throughput measurement")
+    parser.add_argument("--min-cosine-mean", type=float, default=0.995)
+    parser.add_argument("--min-verdict-agreement", type=float, default=0.98)
+    parser.add_argument("--max-trace-diff", type=float, default=1e-3)
+    parser.add_argument("--report", help="write the JSON report here as well")
+    args = parser.parse_args(argv)
+
+    model, version = load_model(prefer_exported=False)
+    pairs = read_pairs(args.pairs, args.audio_dir, args.max_pairs, seed=0)
+    paths = sorted({p for pair in pairs for p in pair}) or sorted(
+        os.path.join(args.audio_dir, n) for n in os.listdir(args.audio_dir) if n.lower().endswith(AUDIO_EXTENSIONS))
+    speeches = [load_speech(p) for p in paths]
+    index = {p: i for i, p in enumerate(paths)}
+    pairs = [(index[t], index[s]) for t, s in pairs]
+    print(f"🔎 {len(paths)} clips, {len(pairs)} pairs, threads={torch.get_num_threads()}")
+
+    report = {"source_version": version, "clips": len(paths), "pairs": len(pairs),
+              "threads": torch.get_num_threads(), "variants": {}}
+    reference, timing = measure(model, speeches, args.batch_size)
+    report["variants"]["eager_fp32"] = timing
+
+    quantize(model)
+    embeddings, timing = measure(model, speeches, args.batch_size)
+    report["variants"]["eager_int8"] = {**compare(reference, embeddings, pairs), **timing}
+
+    traced = trace(model)
+    trace_diff = check_trace(traced, model)
+    embeddings, timing = measure(traced, speeches, args.batch_size)
+    row = {**compare(reference, embeddings, pairs), **timing, "trace_max_abs_diff": trace_diff}
+    row["passed"] = (row["cosine_mean"] >= args.min_cosine_mean and trace_diff <= args.max_trace_diff
+                     and (row["verdict_agreement"] is None or row["verdict_agreement"] >= args.min_verdict_agreement))
+    report["variants"]["torchscript_int8"] = row
+    report["thresholds"] = {"min_cosine_mean": args.min_cosine_mean,
+                            "min_verdict_agreement": args.min_verdict_agreement,
+                            "max_trace_diff": args.max_trace_diff}
+
+    if row["passed"]:
+        # Model file ඉන්පසු metadata, both atomic (tmp + rename)
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        tmp = args.output + ".tmp"
+        torch.jit.save(traced, tmp)
+        os.replace(tmp, args.output)
+        meta = {"model_version": f"{version}:int8-ts", "source_version": version,
+                "quantization": "dynamic int8 (nn.Linear)", "format": "torchscript trace",
+                "torch": torch.__version__, "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "validation": {k: row[k] for k in ("cosine_mean", "cosine_min", "verdict_agreement")}}
+        with open(exported_meta_path(args.output) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(exported_meta_path(args.output) + ".tmp", exported_meta_path(args.output))
+        report["output"] = args.output
+    else:
+        # කලින් publish වූ export එක තවදුරටත් gate එක සමත් නොවේ: model file ඉන්පසු metadata
+        stale = [path for path in (args.output, exported_meta_path(args.output)) if os.path.exists(path)]
+        for path in stale:
+            os.remove(path)
+        if stale:
+            report["unpublished"] = stale
+            print(f"🗑️ Removed stale export: {', '.join(stale)}")
+    print(f"{'✅ Published' if row['passed'] else '❌ Rejected'} int8 TorchScript: "
+          f"cosine_mean={row['cosine_mean']:.5f} verdict_agreement={row['verdict_agreement']} "
+          f"trace_diff={trace_diff:.2e}")
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if row["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""LengthBucketBatcher (batching.py): bucket selection, per-caller embeddings and padding-efficiency stats."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from batching import LengthBucketBatcher
+
+# 10 "samples" per second keeps the clips tiny: bucket edges at 10, 15, 20, 30 and 50 samples
+RATE = 10
+
+
+def clip(n, clip_id):
+    return np.full(n, clip_id, dtype=np.float32)
+
+
+class RecordingEmbedder:
+    """embed_fn stand-in: (clip id, length) per clip, and the lengths of every batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, speeches):
+        self.batches.append([len(s) for s in speeches])
+        return np.array([[s[0], len(s)] for s in speeches], dtype=np.float32)
+
+
+def run(batcher, lengths):
+    async def submit_all():
+        return await asyncio.gather(*[batcher.submit(clip(n, i)) for i, n in enumerate(lengths)])
+
+    return asyncio.run(submit_all())
+
+
+def test_bucket_selection():
+    batcher = LengthBucketBatcher(None, sample_rate=RATE)
+    assert batcher.bucket_names == ["<1s", "<1.5s", "<2s", "<3s", "<5s", ">=5s"]
+    # An edge belongs to the bucket above it
+    assert [batcher.bucket(n) for n in (1, 9, 10, 14, 15, 29, 30, 49, 50, 500)] == [0, 0, 1, 1, 2, 3, 4, 4, 5, 5]
+
+
+@pytest.mark.parametrize("with_executor", [False, True])
+def test_clips_are_batched_per_bucket(with_executor):
+    embedder = RecordingEmbedder()
+    executor = ThreadPoolExecutor(1) if with_executor else None
+    batcher = LengthBucketBatcher(embedder, max_wait_ms=20, sample_rate=RATE, executor=executor)
+    lengths = [5, 25, 8, 28, 5]
+    try:
+        results = run(batcher, lengths)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for i, (n, embedding) in enumerate(zip(lengths, results)):
+        assert embedding.shape == (1, 2)
+        np.testing.assert_array_equal(embedding[0], [i, n])
+    assert sorted(map(sorted, embedder.batches)) == [[5, 5, 8], [25, 28]]
+
+
+def test_padding_efficiency_stats():
+    batcher = LengthBucketBatcher(RecordingEmbedder(), max_wait_ms=20, sample_rate=RATE)
+    run(batcher, [5, 25, 8, 28, 5])
+    stats = batcher.stats()
+    assert (stats["batches"], stats["clips"], stats["errors"]) == (2, 5, 0)
+    assert stats["batch_sizes"] == {2: 1, 3: 1}
+    assert stats["buckets"] == {
+        "<1s": {"batches": 1, "clips": 3, "real_samples": 18, "padded_samples": 24, "padding_efficiency": 0.75},
+        "<3s": {"batches": 1, "clips": 2, "real_samples": 53, "padded_samples": 56, "padding_efficiency": 0.9464},
+    }
+    assert stats["padding_efficiency"] == round(71 / 80, 4)
+    assert stats["queue_depth"] == 0
+
+
+def test_max_batch_size_splits_a_bucket():
+    embedder = RecordingEmbedder()
+    batcher = LengthBucketBatcher(embedder, max_batch_size=2, max_wait_ms=20, sample_rate=RATE)
+    results = run(batcher, [3, 4, 5, 6, 7])
+    assert [int(r[0, 0]) for r in results] == [0, 1, 2, 3, 4]
+    assert embedder.batches == [[3, 4], [5, 6], [7]]
+
+
+def test_lone_clip_runs_without_waiting():
+    embedder = RecordingEmbedder()
+    batcher = LengthBucketBatcher(embedder, max_wait_ms=60_000, sample_rate=RATE)
+
+    async def lone():
+        return await asyncio.wait_for(batcher.submit(clip(12, 7)), timeout=5)
+
+    np.testing.assert_array_equal(asyncio.run(lone()), [[7, 12]])
+    assert embedder.batches == [[12]]
+
+
+def test_embed_error_reaches_every_clip_in_the_batch():
+    def broken(speeches):
+        raise RuntimeError("forward failed")
+
+    batcher = LengthBucketBatcher(broken, max_wait_ms=20, sample_rate=RATE)
+
+    async def submit_all():
+        return await asyncio.gather(*[batcher.submit(clip(5, i)) for i in range(3)], return_exceptions=True)
+
+    errors = asyncio.run(submit_all())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert batcher.stats()["errors"] == 1
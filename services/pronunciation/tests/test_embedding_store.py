@@ -0,0 +1,102 @@
+"""EmbeddingStore (embedding_store.py): put/get, growth, reload across instances and processes."""
+
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from embedding_store import EmbeddingStore, store_key
+
+DIM = 8
+
+
+def vector(i):
+    return np.full(DIM, i, dtype=np.float32) + np.arange(DIM, dtype=np.float32) / 10
+
+
+def test_put_get(tmp_path):
+    store = EmbeddingStore(str(tmp_path), DIM)
+    assert store.get("missing") is None
+    store.put("a", vector(1), name="a.wav")
+    store.put("b", vector(2))
+    np.testing.assert_array_equal(store.get("a"), vector(1))
+    np.testing.assert_array_equal(store.get("b"), vector(2))
+    assert store.index["entries"]["a"]["name"] == "a.wav"
+    # Overwrite keeps the row
+    store.put("a", vector(3))
+    np.testing.assert_array_equal(store.get("a"), vector(3))
+    assert store.index["rows"] == 2
+
+
+def test_grow_keeps_rows(tmp_path):
+    store = EmbeddingStore(str(tmp_path), DIM)
+    for i in range(200):  # 64 -> 128 -> 256 rows
+        store.put(f"k{i}", vector(i))
+    assert store.stats()["capacity"] == 256 and store.stats()["rows"] == 200
+    for i in range(200):
+        np.testing.assert_array_equal(store.get(f"k{i}"), vector(i))
+
+
+def test_reload_across_instances(tmp_path):
+    service, cli = EmbeddingStore(str(tmp_path), DIM), EmbeddingStore(str(tmp_path), DIM)
+    service.put("s0", vector(0))
+    for i in range(100):  # the CLI grows the matrix under the service's memmap
+        cli.put(f"c{i}", vector(i + 1))
+    np.testing.assert_array_equal(service.get("c99"), vector(100))
+    service.put("s1", vector(-1))  # a writer with a stale view must not take a CLI row
+    np.testing.assert_array_equal(cli.get("s1"), vector(-1))
+    np.testing.assert_array_equal(cli.get("c0"), vector(1))
+    assert EmbeddingStore(str(tmp_path), DIM).stats()["rows"] == 102
+
+
+def test_dim_mismatch(tmp_path):
+    EmbeddingStore(str(tmp_path), DIM).put("a", vector(1))
+    with pytest.raises(ValueError):
+        EmbeddingStore(str(tmp_path), DIM * 2)
+
+
+def test_get_or_compute(tmp_path):
+    clip = tmp_path / "word.wav"
+    clip.write_bytes(b"RIFF fake audio")
+    store = EmbeddingStore(str(tmp_path / "store"), DIM)
+    calls = []
+    compute = lambda path: calls.append(path) or vector(7)[np.newaxis]
+    first, hit = store.get_or_compute(str(clip), "v1", compute)
+    second, hit2 = store.get_or_compute(str(clip), "v1", compute)
+    assert (hit, hit2) == (False, True) and len(calls) == 1
+    assert first.shape == second.shape == (1, DIM)
+    store.get_or_compute(str(clip), "v2", compute)  # new model version -> new entry
+    assert len(calls) == 2 and store.stats()["model_versions"] == {"v1": 1, "v2": 1}
+
+
+def _writer(root, prefix, n):
+    store = EmbeddingStore(root, DIM)
+    for i in range(n):
+        store.put(f"{prefix}{i}", vector(i if prefix == "a" else -i))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_processes(tmp_path):
+    root = str(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_writer, args=(root, prefix, 150)) for prefix in ("a", "b")]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(60)
+        assert w.exitcode == 0
+
+    store = EmbeddingStore(root, DIM)
+    with open(os.path.join(root, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    rows = [entry["row"] for entry in index["entries"].values()]
+    assert len(rows) == 300 and sorted(rows) == list(range(300))  # no row taken twice
+    for i in range(150):
+        np.testing.assert_array_equal(store.get(f"a{i}"), vector(i))
+        np.testing.assert_array_equal(store.get(f"b{i}"), vector(-i))
+
+
+def test_store_key_depends_on_version():
+    assert store_key("abc", "v1") != store_key("abc", "v2")